@@ -0,0 +1,338 @@
+"""
+Spec (benchmarks/run.py):
+
+- Reproducible backend benchmarks on synthetic data (benchmarks/synthetic.py)
+  with a deterministic local weather stub – no network, nothing written to
+  backend/data/.
+
+- Measures, per desk-log size:
+    train_full      – train_model() from CSV: seconds, rows/s, peak memory
+    train_cached    – retrain of the unchanged log from the columnar cache
+  and, per feedback-file size:
+    predict         – predict_busy_score() latency percentiles (ms)
+    batch           – predict_busy_scores() for every spot: calls/s, spots/s
+    timeline        – predict_timeline() over a week at 15 minutes (ms)
+
+- Writes one JSON document (meta + results) to --out, by default
+  benchmarks/results/<UTC timestamp>-<git commit>.json. --compare OLD.json
+  prints the change of each headline number against an earlier run.
+
+Usage (from backend/):
+    python benchmarks/run.py --rows 10000,1000000 --feedback-rows 1000,100000
+    python benchmarks/run.py --rows 50000000 --skip-memory
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+for _path in (BACKEND_DIR, BENCH_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import numpy as np
+import pandas as pd
+
+import feedback_log
+import model
+import weather
+from weather_store import WeatherStore
+
+from synthetic import stub_weather_series, write_desk_logs, write_feedback  # noqa: E402
+
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+# ---------- Environment ----------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "workers": args.workers,
+    }
+
+
+@contextmanager
+def isolated_backend(workdir: Path, seed: int) -> Iterator[None]:
+    """Point model/weather at `workdir` and stub the weather upstream."""
+    saved = {
+        name: getattr(model, name)
+        for name in ("DATA_DIR", "LOOKUP_PATH", "FEEDBACK_PATH", "FEEDBACK_LOG_PATH", "DESK_MAPPING_PATH")
+    }
+    saved_weather = (weather._store, weather._cache, weather._fetcher)
+
+    model.DATA_DIR = workdir
+    model.LOOKUP_PATH = workdir / "lookup.json"
+    model.FEEDBACK_PATH = workdir / "feedback.csv"
+    model.FEEDBACK_LOG_PATH = workdir / "feedback_log"
+    model.DESK_MAPPING_PATH = workdir / "desk_mapping.json"
+
+    series = stub_weather_series(seed=seed)
+    weather._store = WeatherStore(workdir / "weather.sqlite")
+    weather._cache = weather.WeatherCache()
+    weather.set_fetcher(lambda: series)
+    try:
+        yield
+    finally:
+        # Don't leave the process-wide log pointing into workdir
+        feedback_log.close_feedback_log()
+        weather._store.close()
+        weather._store, weather._cache, weather._fetcher = saved_weather
+        for name, value in saved.items():
+            setattr(model, name, value)
+
+
+def _quiet(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """train_model() prints progress; keep benchmark output readable."""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        return fn(*args, **kwargs)
+
+
+def _timed(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    start = time.perf_counter()
+    _quiet(fn, *args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _peak_memory_mb(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    """Peak traced allocation (Python + NumPy buffers) while fn runs."""
+    tracemalloc.start()
+    try:
+        _quiet(fn, *args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    arr = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "p99_ms": round(float(np.percentile(arr, 99)), 4),
+        "mean_ms": round(float(arr.mean()), 4),
+    }
+
+
+# ---------- Benchmarks ----------
+
+def bench_training(workdir: Path, rows: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    logs = workdir / f"desk_logs_{rows}.csv"
+    if not logs.exists():
+        write_desk_logs(logs, rows, seed=args.seed)
+
+    shutil.rmtree(workdir / "log_cache", ignore_errors=True)
+
+    seconds = _timed(model.train_model, logs=logs, workers=args.workers, cache=True)
+    full = {"name": "train_full", "rows": rows, "seconds": round(seconds, 4), "rows_per_s": round(rows / seconds)}
+
+    seconds = _timed(model.train_model, logs=logs, workers=args.workers, cache=True)
+    cached = {"name": "train_cached", "rows": rows, "seconds": round(seconds, 4), "rows_per_s": round(rows / seconds)}
+
+    if not args.skip_memory:
+        # In-process (workers=1) so tracemalloc sees every allocation
+        cached["peak_mb"] = round(_peak_memory_mb(model.train_model, logs=logs, workers=1, cache=True), 2)
+        full["peak_mb"] = round(_peak_memory_mb(model.train_model, logs=logs, workers=1, cache=False), 2)
+
+    return [full, cached]
+
+
+def bench_prediction(workdir: Path, feedback_rows: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    # A new file per size: rewriting one path would be tailed by the
+    # process-wide aggregator, and the first call wouldn't be cold
+    model.FEEDBACK_PATH = workdir / f"feedback-{feedback_rows}.csv"
+    feedback_log.close_feedback_log()
+    write_feedback(model.FEEDBACK_PATH, feedback_rows, seed=args.seed)
+    rng = random.Random(args.seed)
+    spots = model.known_spots()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def timestamp() -> str:
+        return (now + timedelta(minutes=rng.randrange(0, 48 * 60))).isoformat()
+
+    # First call parses the whole feedback file; report it separately
+    cold = _timed(model.predict_busy_score, spots[0], timestamp())
+
+    samples = []
+    for _ in range(args.predict_calls):
+        spot, ts = rng.choice(spots), timestamp()
+        start = time.perf_counter()
+        model.predict_busy_score(spot, ts)
+        samples.append(time.perf_counter() - start)
+
+    batch_calls = max(1, args.predict_calls // 10)
+    start = time.perf_counter()
+    for _ in range(batch_calls):
+        model.predict_busy_scores(None, timestamp())
+    batch_seconds = time.perf_counter() - start
+
+    timeline_samples = []
+    for _ in range(max(1, args.predict_calls // 100)):
+        t0 = now + timedelta(hours=rng.randrange(0, 24))
+        start = time.perf_counter()
+        model.predict_timeline(rng.choice(spots), t0.isoformat(), (t0 + timedelta(days=7)).isoformat(), "15")
+        timeline_samples.append(time.perf_counter() - start)
+
+    return [
+        {
+            "name": "predict",
+            "feedback_rows": feedback_rows,
+            "calls": len(samples),
+            "cold_ms": round(cold * 1000, 4),
+            **_percentiles_ms(samples),
+        },
+        {
+            "name": "batch",
+            "feedback_rows": feedback_rows,
+            "calls": batch_calls,
+            "spots": len(spots),
+            "calls_per_s": round(batch_calls / batch_seconds, 1),
+            "spots_per_s": round(batch_calls * len(spots) / batch_seconds, 1),
+        },
+        {
+            "name": "timeline",
+            "feedback_rows": feedback_rows,
+            "calls": len(timeline_samples),
+            "points": 7 * 24 * 4 + 1,
+            **_percentiles_ms(timeline_samples),
+        },
+    ]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="findmydesk-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        with isolated_backend(workdir, args.seed):
+            for rows in args.rows:
+                print(f"⏱  training on {rows:,} rows…")
+                results.extend(bench_training(workdir, rows, args))
+
+            # Predictions run against the model trained on the largest log
+            for feedback_rows in args.feedback_rows:
+                print(f"⏱  predicting with {feedback_rows:,} feedback rows…")
+                results.extend(bench_prediction(workdir, feedback_rows, args))
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"meta": _meta(args), "results": results}
+
+
+# ---------- Reporting ----------
+
+# Headline number per benchmark and whether bigger is better
+HEADLINES = {
+    "train_full": ("rows_per_s", True),
+    "train_cached": ("rows_per_s", True),
+    "predict": ("p99_ms", False),
+    "batch": ("spots_per_s", True),
+    "timeline": ("p50_ms", False),
+}
+
+
+def _key(result: Dict[str, Any]) -> tuple:
+    return (result["name"], result.get("rows"), result.get("feedback_rows"))
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    before = {_key(r): r for r in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        old = before.get(_key(result))
+        metric, higher_is_better = HEADLINES[result["name"]]
+        if old is None or not old.get(metric) or result.get(metric) is None:
+            continue
+        change = (result[metric] - old[metric]) / old[metric] * 100
+        better = (change > 0) == higher_is_better
+        size = result.get("rows") or result.get("feedback_rows")
+        lines.append(
+            f"{result['name']:<13} {size:>11,}  {metric:<12} {old[metric]:>12} → {result[metric]:>12}"
+            f"  ({change:+.1f}%{'' if abs(change) < 5 else (' better' if better else ' WORSE')})"
+        )
+    return lines
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(float(part)) for part in text.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=_sizes, default=[10_000, 100_000, 1_000_000],
+                        help="desk-log sizes, comma separated (e.g. 10000,1e6,5e7)")
+    parser.add_argument("--feedback-rows", type=_sizes, default=[1_000, 100_000],
+                        help="feedback.csv sizes, comma separated")
+    parser.add_argument("--predict-calls", type=int, default=2_000)
+    parser.add_argument("--workers", type=int, default=1, help="training worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-memory", action="store_true", help="skip the (slower) traced-memory pass")
+    parser.add_argument("--workdir", help="reuse generated data here instead of a temp dir")
+    parser.add_argument("--keep", action="store_true", help="keep the temp workdir")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args(argv)
+    if not args.rows:
+        parser.error("--rows needs at least one size (predictions use the last trained model)")
+
+    report = run(args)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{report['meta']['commit'] or 'nogit'}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for result in report["results"]:
+        print(json.dumps(result))
+    print(f"📄 Results written to {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} ({baseline['meta'].get('commit')}):")
+        for line in compare(report, baseline):
+            print("  " + line)
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Spec (benchmarks/synthetic.py):
+
+- write_desk_logs(path, rows, seed):
+    Deterministic desk_logs.csv of `rows` rows, written in chunks so 50M
+    rows never sit in memory. The desk label mix looks like the real
+    export: mostly exact DESK_TO_LIBRARY labels, some with extra text
+    (fuzzy matches), some desks we don't map, a few rows with no desk or
+    an unparsable timestamp. Timestamps follow opening hours and weekdays.
+
+- write_feedback(path, rows, seed):
+    Deterministic feedback.csv shaped like the Supabase export (quoted
+    multi-line comments included), created_at spread over the last 30 days.
+
+- stub_weather_series(hours, seed):
+    Deterministic {hour: weather} series around now, for
+    weather.set_fetcher(), so benchmarks never touch the network.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+
+# (label, weight) – exact labels, labels with extra text, desks we don't map
+DESK_MIX: List[Tuple[str, float]] = [
+    ("David Lam Circ", 0.10), ("Lam Ref", 0.04),
+    ("Educ Circ", 0.06), ("Education Ref", 0.02),
+    ("Woodward Circ", 0.10), ("Woodward Ref", 0.04),
+    ("Law Circ", 0.06), ("Law Library Circ", 0.03),
+    ("Asian Circ", 0.05), ("Asian Ref", 0.02),
+    ("Xwi7xwa Circ", 0.02), ("Xwi7xwa Off Desk", 0.01),
+    ("Chapman LC Desk", 0.08), ("Chapman", 0.03),
+    ("Lam Circ Desk 2", 0.04), ("Woodward Circ (Evening)", 0.03),
+    ("Chapman LC Desk - Laptop Lending", 0.03),
+    ("Koerner Circ", 0.10), ("Chat", 0.08), ("Virtual Reference", 0.04),
+    ("", 0.02),  # missing desk
+]
+
+# Relative traffic per hour of day (UTC, as the logs are bucketed)
+HOUR_WEIGHTS = np.array([
+    1, 0.5, 0.2, 0.1, 0.1, 0.2, 0.5, 1.5, 4, 7, 9, 10,
+    10, 10, 9, 9, 8, 7, 6, 5, 4, 3, 2, 1.5,
+])
+
+# Monday … Sunday
+WEEKDAY_WEIGHTS = np.array([1.0, 1.0, 1.0, 0.95, 0.8, 0.4, 0.5])
+
+# Share of rows with a timestamp that doesn't parse
+BAD_TIMESTAMP_RATE = 0.005
+
+LOG_START = datetime(2023, 1, 2)  # a Monday
+LOG_DAYS = 730
+
+SPOTS = ["IKBLC", "Koerner", "David Lam", "Education", "Woodward", "Law", "Asian", "Xwi7xwa", "Chapman"]
+
+
+def _day_weights() -> np.ndarray:
+    weights = WEEKDAY_WEIGHTS[np.arange(LOG_DAYS) % 7]
+    return weights / weights.sum()
+
+
+def _desk_chunk(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    labels = np.array([label for label, _ in DESK_MIX], dtype=object)
+    weights = np.array([w for _, w in DESK_MIX])
+    desks = labels[rng.choice(len(labels), size=n, p=weights / weights.sum())]
+
+    days = rng.choice(LOG_DAYS, size=n, p=_day_weights())
+    hours = rng.choice(24, size=n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = days * 86400 + hours * 3600 + rng.integers(0, 3600, size=n)
+
+    stamps = np.datetime64(LOG_START, "s") + seconds.astype("timedelta64[s]")
+    date_time = np.char.replace(np.datetime_as_string(stamps, unit="s").astype(str), "T", " ").astype(object)
+    date_time[rng.random(n) < BAD_TIMESTAMP_RATE] = "n/a"
+
+    return pd.DataFrame({"desk": desks, "date_time": date_time, "patron_type": "Student"})
+
+
+def write_desk_logs(path: Any, rows: int, seed: int = 0) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("desk,date_time,patron_type\n")
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            _desk_chunk(rng, n).to_csv(f, header=False, index=False)
+            written += n
+    return path
+
+
+def write_feedback(path: Any, rows: int, seed: int = 0, now: datetime | None = None) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now(timezone.utc)
+
+    ages = rng.uniform(0, 30 * 86400, size=rows)
+    created = [
+        (now - timedelta(seconds=float(age))).strftime("%Y-%m-%d %H:%M:%S.%f+00")
+        for age in ages
+    ]
+    comments = np.array(["", "quiet", "Study spot was pretty alright\n", "packed, no outlets"], dtype=object)
+
+    df = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "created_at": created,
+        "accuracy_rating": rng.integers(1, 11, size=rows),
+        "busy_rating": rng.integers(1, 11, size=rows),
+        "client_session_id": [hashlib.md5(str(i).encode()).hexdigest() for i in range(rows)],
+        "comment": comments[rng.integers(0, len(comments), size=rows)],
+        "spot_id": np.array(SPOTS, dtype=object)[rng.integers(0, len(SPOTS), size=rows)],
+    })
+    df.to_csv(path, index=False)
+    return path
+
+
+def stub_weather_series(hours: int = 24 * 40, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Hourly series centred on the current hour, same values for the same seed."""
+    rng = np.random.default_rng(seed)
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours // 2)
+
+    series = {}
+    for i in range(hours):
+        hour = start + timedelta(hours=i)
+        series[f"{hour.strftime('%Y-%m-%d')}T{hour.hour:02d}:00"] = {
+            "temp": round(float(8 + 6 * np.sin(i / 24 * 2 * np.pi) + rng.normal(0, 1)), 1),
+            "precip": round(float(max(0.0, rng.normal(0.3, 1.0))), 1),
+            "cloud": int(rng.integers(0, 101)),
+            "wind": round(float(abs(rng.normal(12, 6))), 1),
+        }
+    return series
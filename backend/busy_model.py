@@ -0,0 +1,270 @@
+"""
+Spec (busy_model.py):
+
+- BusyModel:
+    Dense form of the trained lookup. Scores live in one preallocated
+    float32 array of shape [library + 1 × day × slot] (the last row is the
+    global pattern, NaN = no observations) with a library → row index
+    table, so prediction is a few integer lookups however fine the model.
+    A weekly model has 7 days (Monday = 0) × N time-of-day slots; the
+    legacy 3-hour lookup is 1 day × 8 slots.
+
+- BusyModel.from_lookup(lookup) / to_lookup():
+    Convert from/to the JSON lookup shape. With a "weekly" section
+    {"slot_minutes", "per_library": {lib: [[score|null per slot] per day]},
+    "global": [...]} that tensor is served; otherwise the legacy
+    {"version", "per_library": {lib: {"<bin>": score}}, "global": {...}}.
+
+- save(path) / BusyModel.load(path):
+    Binary artifact (lookup.bin):
+        8 bytes   magic b"BUSYMDL1"
+        4 bytes   little-endian uint32 header length
+        header    UTF-8 JSON {version, libraries, shape: [days, slots], ...}
+        padding   up to a 64-byte boundary
+        data      float32 little-endian array, row-major
+    load() memory-maps the matrix read-only, so every worker process
+    serving the same file shares one physical copy through the page cache.
+    save() writes a temp file and renames it over the target, so readers
+    with the old file mapped are never affected.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"BUSYMDL1"
+_ALIGN = 64
+
+# Score used when neither the library nor the global pattern has the slot
+DEFAULT_SCORE = 0.5
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class BusyModel:
+    def __init__(
+        self,
+        libraries: Sequence[str],
+        matrix: np.ndarray,
+        version: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.libraries = list(libraries)
+        self.index = {lib: i for i, lib in enumerate(self.libraries)}
+        self.matrix = matrix  # [len(libraries) + 1, n_days, n_slots], float32
+        self.version = version
+        self.meta = meta or {}
+
+    @property
+    def n_days(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def n_slots(self) -> int:
+        return self.matrix.shape[2]
+
+    @property
+    def slot_minutes(self) -> int:
+        return MINUTES_PER_DAY // self.n_slots
+
+    @property
+    def global_row(self) -> np.ndarray:
+        return self.matrix[-1]
+
+    # ----- scoring -----
+
+    def cell(self, weekday: Any, minute: Any) -> Tuple[Any, Any]:
+        """
+        (day, slot) index for a weekday (Monday = 0) and minute of day.
+        Works element-wise on integer arrays too.
+        """
+        day = weekday if self.n_days == 7 else 0
+        return day, minute * self.n_slots // MINUTES_PER_DAY
+
+    def score(self, spot: str, weekday: int, minute: int) -> Tuple[float, str]:
+        """(score, "per_library" | "global_fallback") for one spot."""
+        day, slot = self.cell(weekday, minute)
+        row = self.index.get(spot)
+        if row is not None:
+            value = self.matrix[row, day, slot]
+            if not np.isnan(value):
+                return float(value), "per_library"
+
+        value = self.matrix[-1, day, slot]
+        return (DEFAULT_SCORE if np.isnan(value) else float(value)), "global_fallback"
+
+    def scores(self, spots: Sequence[str], weekday: int, minute: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized score(): (float64 scores, per-library hit mask)."""
+        day, slot = self.cell(weekday, minute)
+        rows = np.array([self.index.get(spot, -1) for spot in spots], dtype=np.int64)
+        known = rows >= 0
+
+        values = np.full(len(rows), np.nan)
+        values[known] = self.matrix[rows[known], day, slot]
+        hit = ~np.isnan(values)
+
+        fallback = self.matrix[-1, day, slot]
+        values[~hit] = DEFAULT_SCORE if np.isnan(fallback) else fallback
+        return values, hit
+
+    def series(self, spot: str, weekdays: np.ndarray, minutes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """score() for one spot at many (weekday, minute) points, as arrays."""
+        day, slot = self.cell(weekdays, minutes)
+        fallback = self.matrix[-1, day, slot].astype(np.float64)
+        fallback[np.isnan(fallback)] = DEFAULT_SCORE
+
+        row = self.index.get(spot)
+        if row is None:
+            return fallback, np.zeros(len(fallback), dtype=bool)
+
+        values = self.matrix[row, day, slot].astype(np.float64)
+        hit = ~np.isnan(values)
+        return np.where(hit, values, fallback), hit
+
+    # ----- JSON lookup shape -----
+
+    @classmethod
+    def from_lookup(cls, lookup: Dict[str, Any], min_bins: int = 8) -> "BusyModel":
+        if "weekly" in lookup:
+            return cls._from_weekly(lookup)
+
+        per_library = lookup.get("per_library", {})
+        global_lookup = lookup.get("global", {})
+
+        libraries = sorted(per_library)
+        bin_keys = [int(b) for bins in (*per_library.values(), global_lookup) for b in bins]
+        n_bins = max([min_bins] + [b + 1 for b in bin_keys])
+
+        matrix = np.full((len(libraries) + 1, 1, n_bins), np.nan, dtype=np.float32)
+        for i, lib in enumerate(libraries):
+            for b, score in per_library[lib].items():
+                matrix[i, 0, int(b)] = score
+        for b, score in global_lookup.items():
+            matrix[-1, 0, int(b)] = score
+
+        meta = {k: v for k, v in lookup.items() if k not in ("version", "per_library", "global")}
+        return cls(libraries, matrix, lookup.get("version"), meta)
+
+    @classmethod
+    def _from_weekly(cls, lookup: Dict[str, Any]) -> "BusyModel":
+        weekly = lookup["weekly"]
+        per_library = weekly.get("per_library", {})
+        libraries = sorted(per_library)
+
+        rows = [per_library[lib] for lib in libraries] + [weekly["global"]]
+        # None → NaN on the float conversion
+        matrix = np.array(rows, dtype=np.float64).astype(np.float32)
+
+        meta = {k: v for k, v in lookup.items() if k not in ("version", "weekly")}
+        return cls(libraries, matrix, lookup.get("version"), meta)
+
+    def to_lookup(self) -> Dict[str, Any]:
+        if self.n_days > 1:
+            return self._to_weekly()
+
+        def row_dict(row: np.ndarray) -> Dict[str, float]:
+            return {
+                str(b): round(float(row[b]), 4)
+                for b in range(len(row))
+                if not np.isnan(row[b])
+            }
+
+        lookup: Dict[str, Any] = {
+            "version": self.version,
+            "per_library": {
+                lib: row_dict(self.matrix[i, 0])
+                for i, lib in enumerate(self.libraries)
+            },
+            "global": row_dict(self.matrix[-1, 0]),
+        }
+        lookup.update(self.meta)
+        return lookup
+
+    def _to_weekly(self) -> Dict[str, Any]:
+        lookup: Dict[str, Any] = {"version": self.version}
+        lookup.update(self.meta)
+        lookup["weekly"] = {
+            "slot_minutes": self.slot_minutes,
+            "per_library": {
+                lib: weekly_rows(self.matrix[i])
+                for i, lib in enumerate(self.libraries)
+            },
+            "global": weekly_rows(self.matrix[-1]),
+        }
+        return lookup
+
+    # ----- binary artifact -----
+
+    def save(self, path: Any) -> None:
+        path = Path(path)
+        header = json.dumps({
+            "version": self.version,
+            "libraries": self.libraries,
+            "shape": [self.n_days, self.n_slots],
+            "meta": self.meta,
+        }).encode("utf-8")
+
+        prefix = len(MAGIC) + 4 + len(header)
+        padding = b"\0" * (-prefix % _ALIGN)
+        data = np.ascontiguousarray(self.matrix, dtype="<f4").tobytes()
+
+        fd, tmp = tempfile.mkstemp(prefix=".lookup-", suffix=".bin", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(padding)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Any) -> "BusyModel":
+        path = Path(path)
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a busy model artifact")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        prefix = len(MAGIC) + 4 + header_len
+        offset = prefix + (-prefix % _ALIGN)
+        if "shape" in header:
+            shape = (len(header["libraries"]) + 1, *header["shape"])
+        else:
+            # Artifacts written before the weekly model: one day of n_bins
+            shape = (len(header["libraries"]) + 1, 1, header["n_bins"])
+
+        if path.stat().st_size < offset + int(np.prod(shape)) * 4:
+            raise ValueError(f"{path} is truncated")
+
+        matrix = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=shape)
+        return cls(header["libraries"], matrix, header.get("version"), header.get("meta"))
+
+
+def weekly_rows(scores: np.ndarray) -> List[List[Optional[float]]]:
+    """[day × slot] scores as JSON-ready nested lists (NaN → None)."""
+    values = np.round(np.asarray(scores, dtype=np.float64), 4)
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    return cells.tolist()
+
+
+def as_busy_model(lookup: Any) -> BusyModel:
+    """Accept either a BusyModel or a JSON-shaped lookup dict."""
+    if isinstance(lookup, BusyModel):
+        return lookup
+    return BusyModel.from_lookup(lookup)
@@ -0,0 +1,176 @@
+"""
+Spec (desk_mapping.py):
+
+- DeskMatcher(mapping):
+    Compiled form of a {raw desk label: library} mapping. An exact label
+    wins; otherwise the first key (in mapping order) contained in the
+    label, case-insensitively – the same rule as a linear scan over the
+    keys. The keys are compiled into an Aho-Corasick automaton, so a label
+    is matched in one pass over its characters whatever the number of
+    keys, overlapping keys included. Results are memoized per distinct
+    raw label.
+
+- DeskMatcher.unmapped(label_rows):
+    {label: rows} for the labels in a {label: row count} tally that don't
+    map to any library, busiest first.
+
+- MappingFile(defaults):
+    Built-in mapping extended/overridden by an optional JSON file
+    ({"<desk label>": "<library>"}). get(path) stats the file and
+    recompiles only when it changed, so new desks need no code change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+
+def _automaton(keys: List[str]) -> Tuple[List[Dict[str, int]], List[int], List[int]]:
+    """
+    Aho-Corasick automaton over `keys`: (goto, fail, best), where best[node]
+    is the lowest index of a key that ends at that node or at any suffix of
+    it reachable by failure links (len(keys) if none).
+    """
+    none = len(keys)
+    goto: List[Dict[str, int]] = [{}]
+    best: List[int] = [none]
+    for index, key in enumerate(keys):
+        node = 0
+        for ch in key:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                best.append(none)
+            node = nxt
+        best[node] = min(best[node], index)
+
+    # Breadth-first, so a node's failure target is final before its children
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, child in goto[node].items():
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[child] = goto[f].get(ch, 0)
+            best[child] = min(best[child], best[fail[child]])
+            queue.append(child)
+    return goto, fail, best
+
+
+class DeskMatcher:
+    def __init__(self, mapping: Mapping[str, str]) -> None:
+        self.mapping: Dict[str, str] = dict(mapping)
+        self._libraries = list(self.mapping.values())
+        self._goto, self._fail, self._best = _automaton([key.lower() for key in self.mapping])
+        self._memo: Dict[Any, Optional[str]] = {}
+
+        payload = json.dumps(list(self.mapping.items()))
+        self.digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def match(self, raw: Any) -> Optional[str]:
+        """Library for a raw desk label, or None if it can't be mapped."""
+        try:
+            return self._memo[raw]
+        except (KeyError, TypeError):
+            pass
+
+        library = self._match(raw)
+        try:
+            self._memo[raw] = library
+        except TypeError:
+            pass  # unhashable label; just don't cache it
+        return library
+
+    def _match(self, raw: Any) -> Optional[str]:
+        if pd.isna(raw):
+            return None
+
+        s = str(raw).strip()
+
+        # Direct mapping first
+        if s in self.mapping:
+            return self.mapping[s]
+
+        # Fuzzy "contains" mapping, in case the desk label has extra text:
+        # the lowest mapping index among all keys ending at any position
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node, best = 0, best_at[0]
+        for ch in s.lower():
+            if best == 0:
+                break
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best_at[node] < best:
+                best = best_at[node]
+
+        if best == len(self._libraries):
+            return None
+        return self._libraries[best]
+
+    def unmapped(self, label_rows: Mapping[Any, int]) -> Dict[str, int]:
+        rows = {
+            str(label): int(count)
+            for label, count in label_rows.items()
+            if count and self.match(label) is None
+        }
+        return dict(sorted(rows.items(), key=lambda item: (-item[1], item[0])))
+
+
+class MappingFile:
+    """
+    Holds the compiled matcher for `defaults` plus an optional mapping
+    file, recompiled when the file's (mtime, size) changes.
+    """
+
+    def __init__(self, defaults: Mapping[str, str]) -> None:
+        self.defaults = defaults
+        self._lock = threading.Lock()
+        # (path, stamp, matcher) – replaced as a whole, never mutated
+        self._entry: Optional[Tuple[str, Any, DeskMatcher]] = None
+
+    @staticmethod
+    def _stamp(path: Path) -> Any:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, str]:
+        with open(path, "r", encoding="utf-8") as f:
+            extra = json.load(f)
+
+        if not isinstance(extra, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in extra.items()
+        ):
+            raise ValueError(f"{path} must be a JSON object of desk label → library name")
+        return extra
+
+    def get(self, path: Any) -> DeskMatcher:
+        path = Path(path)
+        stamp = self._stamp(path)
+
+        entry = self._entry
+        if entry is not None and entry[0] == str(path) and entry[1] == stamp:
+            return entry[2]
+
+        with self._lock:
+            mapping = dict(self.defaults)
+            if stamp is not None:
+                mapping.update(self._read(path))
+            matcher = DeskMatcher(mapping)
+            self._entry = (str(path), stamp, matcher)
+            return matcher
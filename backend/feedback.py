@@ -0,0 +1,414 @@
+"""
+Spec (feedback.py):
+
+- FeedbackAggregator(path, half_life_hours):
+    Keeps running per-spot busy_rating sums/counts partitioned by UTC day
+    for feedback.csv, plus exponentially decayed sums (half-life
+    FEEDBACK_HALF_LIFE_HOURS, 0 turns them off). The file is parsed once;
+    afterwards only bytes appended past the last consumed offset are read.
+    If the file is replaced, truncated or rewritten in place (new header,
+    or the bytes just before the consumed offset changed – e.g. a fresh
+    export written over it) the aggregates are rebuilt from scratch.
+
+- average(spot, cutoff):
+    Mean busy_rating (1–10) for a spot over the day partitions on or after
+    cutoff's day, or None. Only the partitions inside the window are
+    visited, so the cost doesn't grow with history.
+
+- decayed(spot, now):
+    (mean, weight): busy_rating averaged with weight 2^(-age / half-life),
+    and the total weight left at `now` (≈ how many fresh reports it's
+    worth). Each spot keeps [reference time, Σ w·rating, Σ w], rescaled
+    when a newer report arrives, so updates and queries are O(1).
+    Reports without created_at aren't part of it. Reports dated more than
+    FEEDBACK_MAX_SKEW_SECONDS past the wall clock when they're read are
+    held apart and only count when `now` reaches them, so a future-dated
+    row can't become the reference time and outweigh everything else.
+    Sums whose reference time is after `now` aren't decayed (age 0).
+
+- add(records):
+    Folds feedback that didn't come from the file (POST /feedback, replayed
+    from the feedback log) into the same per-spot day buckets. Kept apart
+    from the file's buckets, so a rebuild of the file leaves it alone.
+
+- version():
+    Token that changes whenever the aggregates do (after a refresh/add).
+
+- get_aggregator(path):
+    Process-wide aggregator for a feedback file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_EPOCH = pd.Timestamp("1970-01-01", tz="UTC")
+
+# A report loses half its weight in the decayed score every this many hours
+FEEDBACK_HALF_LIFE_HOURS = float(os.getenv("FEEDBACK_HALF_LIFE_HOURS", "6"))
+
+# Reports may be dated this far past the wall clock (client clock skew)
+FEEDBACK_MAX_SKEW_SECONDS = 300
+
+# Bytes before the consumed offset that must be unchanged for a tail read
+_MARK_BYTES = 4096
+
+# (spot, day number since epoch or None, rating sum, row count,
+#  newest created_at in epoch seconds or None, decayed rating sum and
+#  decayed weight relative to that newest report)
+Delta = Tuple[str, Optional[int], float, int, Optional[float], float, float]
+
+
+def _complete_prefix(data: bytes) -> int:
+    """
+    Length of the longest prefix of `data` made of whole CSV records, i.e.
+    ending on a newline that isn't inside a quoted field (comments may
+    contain newlines).
+    """
+    end = 0
+    pos = 0
+    in_quotes = False
+    for line in data.split(b"\n")[:-1]:
+        pos += len(line) + 1
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            end = pos
+    return end
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _Sums:
+    """Per-spot day partitions and decayed running sums for one source."""
+
+    def __init__(self, half_life_s: float) -> None:
+        self.half_life_s = half_life_s
+        # spot (upper-case) -> {day number since epoch or None: [sum, count]}
+        self.daily: Dict[str, Dict[Optional[int], List[float]]] = {}
+        # spot (upper-case) -> [reference epoch seconds, Σ w·rating, Σ w]
+        self.decay: Dict[str, List[float]] = {}
+        # spot (upper-case) -> [[epoch seconds, rating·w, w]] for reports
+        # dated in the future when read; counted only once `now` reaches them
+        self.pending: Dict[str, List[List[float]]] = {}
+        self.last_day: Optional[int] = None
+
+    def apply(self, deltas: List[Delta], sign: int) -> None:
+        for spot, day, total, count, newest, dsum, dweight in deltas:
+            acc = self.daily.setdefault(spot, {}).setdefault(day, [0.0, 0])
+            acc[0] += sign * total
+            acc[1] += sign * count
+            if day is not None and (self.last_day is None or day > self.last_day):
+                self.last_day = day
+
+            if newest is None or not self.half_life_s:
+                continue
+            if self._park(spot, [newest, dsum, dweight], sign):
+                continue
+            state = self.decay.setdefault(spot, [newest, 0.0, 0.0])
+            if newest > state[0]:
+                # Age what's there to the newer reference time
+                scale = 2.0 ** (-(newest - state[0]) / self.half_life_s)
+                state[0], state[1], state[2] = newest, state[1] * scale, state[2] * scale
+            else:
+                scale = 2.0 ** (-(state[0] - newest) / self.half_life_s)
+                dsum, dweight = dsum * scale, dweight * scale
+            state[1] += sign * dsum
+            state[2] += sign * dweight
+
+    def _park(self, spot: str, report: List[float], sign: int) -> bool:
+        """Keep (or drop again) a future-dated report out of the running sums."""
+        if sign > 0:
+            if report[0] <= time.time() + FEEDBACK_MAX_SKEW_SECONDS:
+                return False
+            self.pending.setdefault(spot, []).append(report)
+            return True
+        parked = self.pending.get(spot, [])
+        if report not in parked:
+            return False
+        parked.remove(report)
+        return True
+
+    def window(self, key: str, first_day: Optional[int]) -> Tuple[float, int]:
+        """Sum/count over the partitions on/after first_day, plus undated rows."""
+        days = self.daily.get(key, {})
+        if first_day is not None and self.last_day is not None and self.last_day - first_day < len(days):
+            parts = [days.get(day) for day in range(first_day, self.last_day + 1)]
+            parts.append(days.get(None))
+        else:
+            parts = [acc for day, acc in days.items() if day is None or first_day is None or day >= first_day]
+
+        total, count = 0.0, 0
+        for acc in parts:
+            if acc is not None:
+                total += acc[0]
+                count += acc[1]
+        return total, count
+
+
+class FeedbackAggregator:
+    def __init__(self, path: Any, half_life_hours: Optional[float] = None) -> None:
+        self.path = Path(path)
+        self.half_life_hours = FEEDBACK_HALF_LIFE_HOURS if half_life_hours is None else half_life_hours
+        self._lock = threading.Lock()
+        self._reset()
+        # Feedback submitted to the API
+        self._live = _Sums(self.half_life_hours * 3600.0)
+        self._live_rows = 0
+
+    def _reset(self) -> None:
+        self._identity: Optional[Tuple[int, int]] = None
+        self._mtime_ns: Optional[int] = None
+        self._offset = 0
+        # Digest of the _MARK_BYTES before _offset when it was consumed
+        self._mark = _digest(b"")
+        self._header: Optional[str] = None
+        # Aggregates of feedback.csv
+        self._sums = _Sums(self.half_life_hours * 3600.0)
+        # Last record when the file doesn't end in a newline. It's counted,
+        # but re-read together with whatever gets appended after it.
+        self._tail = b""
+        self._tail_deltas: List[Delta] = []
+
+    # ----- ingestion -----
+
+    def refresh(self) -> None:
+        """Consume whatever has been appended to the file since last time."""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._reset()
+            return
+
+        identity = (st.st_dev, st.st_ino)
+        if identity == self._identity and st.st_size == self._offset and st.st_mtime_ns == self._mtime_ns:
+            return
+
+        with self._lock:
+            with open(self.path, "rb") as f:
+                if (
+                    identity != self._identity
+                    or st.st_size < self._offset
+                    or not self._same_header(f)
+                    or not self._same_mark(f)
+                ):
+                    # Replaced, truncated or rewritten in place: start over
+                    self._reset()
+                    self._identity = identity
+                self._mtime_ns = st.st_mtime_ns
+
+                if st.st_size == self._offset:
+                    return
+
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+                f.seek(max(0, st.st_size - _MARK_BYTES))
+                mark = _digest(f.read(min(st.st_size, _MARK_BYTES)))
+
+            if self._header is None:
+                nl = data.find(b"\n")
+                if nl < 0:
+                    return  # header not fully written yet
+                self._header = data[: nl + 1].decode("utf-8")
+                self._offset += nl + 1
+                data = data[nl + 1:]
+
+            if self._tail:
+                self._sums.apply(self._tail_deltas, -1)
+                data = self._tail + data
+                self._tail, self._tail_deltas = b"", []
+
+            consumed = _complete_prefix(data)
+            if consumed:
+                self._sums.apply(self._parse(data[:consumed]), 1)
+
+            rest = data[consumed:]
+            if rest.strip() and rest.count(b'"') % 2 == 0:
+                self._tail, self._tail_deltas = rest, self._parse(rest + b"\n")
+                self._sums.apply(self._tail_deltas, 1)
+
+            self._offset, self._mark = st.st_size, mark
+
+    def _same_header(self, f) -> bool:
+        if self._header is None:
+            return True
+        header = self._header.encode("utf-8")
+        f.seek(0)
+        return f.read(len(header)) == header
+
+    def _same_mark(self, f) -> bool:
+        f.seek(max(0, self._offset - _MARK_BYTES))
+        return _digest(f.read(min(self._offset, _MARK_BYTES))) == self._mark
+
+    def add(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Count validated feedback records ({spot_id, busy_rating, created_at
+        ISO string}) straight into memory.
+        """
+        deltas: List[Delta] = []
+        for record in records:
+            created = datetime.fromisoformat(record["created_at"])
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            t = created.timestamp()
+            rating = float(record["busy_rating"])
+            deltas.append((str(record["spot_id"]).upper(), int(t // 86400), rating, 1, t, rating, 1.0))
+
+        with self._lock:
+            self._live.apply(deltas, 1)
+            self._live_rows += len(deltas)
+
+    def _parse(self, body: bytes) -> List[Delta]:
+        """Per-(spot, day) rating sums for a run of whole CSV records."""
+        try:
+            df = pd.read_csv(io.StringIO(self._header + body.decode("utf-8")), dtype=str)
+        except Exception:
+            return []
+
+        if df.empty:
+            return []
+
+        # Normalize column names (lowercase, strip spaces)
+        df.columns = [c.strip().lower() for c in df.columns]
+
+        if not {"spot_id", "busy_rating"}.issubset(df.columns):
+            return []
+
+        df["spot"] = df["spot_id"].astype(str).str.upper()
+        df["busy_rating"] = pd.to_numeric(df["busy_rating"], errors="coerce")
+        df = df.dropna(subset=["busy_rating"])
+
+        if "created_at" in df.columns:
+            created = pd.to_datetime(df["created_at"], errors="coerce", utc=True, format="ISO8601")
+            seconds = (created - _EPOCH) / pd.Timedelta(seconds=1)
+            df = df.assign(day=(created - _EPOCH) // pd.Timedelta(days=1), t=seconds)
+            df = df.dropna(subset=["day"])
+        else:
+            # Exports without created_at can't be windowed or decayed: bucket None
+            df = df.assign(day=-1, t=np.nan)
+
+        if df.empty:
+            return []
+
+        # Future-dated rows get a delta each, so _Sums can park them alone
+        limit = time.time() + FEEDBACK_MAX_SKEW_SECONDS
+        df = df.assign(part=df["t"].where(df["t"] > limit, -1.0))
+
+        keys = ["spot", "day", "part"]
+        newest = df.groupby(keys)["t"].transform("max")
+        half_life_s = self.half_life_hours * 3600.0
+        weight = np.exp2(-(newest - df["t"]) / half_life_s) if half_life_s else pd.Series(0.0, index=df.index)
+        df = df.assign(w=weight, ws=weight * df["busy_rating"])
+
+        sums = df.groupby(keys).agg(
+            total=("busy_rating", "sum"),
+            count=("busy_rating", "count"),
+            newest=("t", "max"),
+            ws=("ws", "sum"),
+            w=("w", "sum"),
+        )
+        return [
+            (
+                spot,
+                None if day == -1 else int(day),
+                float(row["total"]),
+                int(row["count"]),
+                None if day == -1 else float(row["newest"]),
+                float(row["ws"]),
+                float(row["w"]),
+            )
+            for (spot, day, _), row in sums.iterrows()
+        ]
+
+    # ----- queries -----
+
+    def version(self) -> Tuple[Any, ...]:
+        """Changes whenever refresh() consumed new bytes/started over, or add() ran."""
+        self.refresh()
+        with self._lock:
+            return (self._identity, self._offset, self._mark.hex(), self._live_rows)
+
+    def average(self, spot: str, cutoff: Optional[datetime] = None) -> Optional[float]:
+        """
+        Mean busy_rating for `spot` over day buckets on/after cutoff's UTC day.
+        Rows from exports without created_at are always included.
+        """
+        self.refresh()
+
+        key = spot.upper()
+        first_day = None if cutoff is None else (pd.Timestamp(cutoff) - _EPOCH) // pd.Timedelta(days=1)
+        total, count = 0.0, 0
+
+        with self._lock:
+            for sums in (self._sums, self._live):
+                s, c = sums.window(key, None if first_day is None else int(first_day))
+                total += s
+                count += c
+
+        if count == 0:
+            return None
+        return total / count
+
+    def decayed(self, spot: str, now: datetime) -> Tuple[Optional[float], float]:
+        """
+        (decay-weighted mean busy_rating or None, total weight as of now).
+        Sums with a reference time after `now` aren't decayed.
+        """
+        self.refresh()
+        if not self.half_life_hours:
+            return None, 0.0
+
+        key = spot.upper()
+        half_life_s = self.half_life_hours * 3600.0
+        with self._lock:
+            states = [list(sums.decay[key]) for sums in (self._sums, self._live) if key in sums.decay]
+            # Future-dated reports only once they're due
+            states += [
+                list(report)
+                for sums in (self._sums, self._live)
+                for report in sums.pending.get(key, ())
+                if report[0] <= now.timestamp()
+            ]
+        if not states:
+            return None, 0.0
+
+        # Decay every source to `now`
+        total = weight = 0.0
+        for t, s, w in states:
+            scale = 2.0 ** (-max(0.0, now.timestamp() - t) / half_life_s)
+            total += s * scale
+            weight += w * scale
+
+        if weight <= 1e-12:
+            return None, 0.0
+        return total / weight, weight
+
+
+_aggregator: Optional[FeedbackAggregator] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator(path: Any) -> FeedbackAggregator:
+    global _aggregator
+    path = Path(path)
+    agg = _aggregator
+    if agg is None or agg.path != path:
+        with _aggregator_lock:
+            agg = _aggregator
+            if agg is None or agg.path != path:
+                agg = FeedbackAggregator(path)
+                _aggregator = agg
+    return agg
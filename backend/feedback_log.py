@@ -0,0 +1,292 @@
+"""
+Spec (feedback_log.py):
+
+- FeedbackLog(path, on_commit):
+    Append-only JSON-lines log of feedback submitted to the API,
+    partitioned by the UTC day of created_at: path/YYYY-MM-DD.jsonl.
+    append() and append_async() hand records to one writer thread that
+    group-commits whatever is pending (waiting up to FEEDBACK_FLUSH_MS for
+    a burst to join the batch), writes it, fsyncs each partition it touched
+    once (FEEDBACK_FSYNC=0 skips the fsync) and only then calls
+    on_commit(records) and acknowledges every caller in the batch. An
+    acknowledged record is on disk.
+
+- replay(since):
+    Records already in the log, in order, from the partitions on/after
+    the `since` date (all when None) – older days aren't read at all. A
+    torn last line (crash mid write, never acknowledged) is dropped and
+    cut off its partition.
+
+- get_feedback_log(path, aggregator, since):
+    Process-wide log whose commits feed `aggregator`; the existing log is
+    replayed into it (from `since`) on first use. Reading never creates
+    the directory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import re
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# How long the writer waits for more submissions before committing a batch
+FEEDBACK_FLUSH_MS = float(os.getenv("FEEDBACK_FLUSH_MS", "2"))
+
+# fsync every batch before acknowledging it (turn off only for tests/benchmarks)
+FEEDBACK_FSYNC = os.getenv("FEEDBACK_FSYNC", "1") != "0"
+
+# Upper bound on records written per batch
+FEEDBACK_MAX_BATCH = 5000
+
+# Partition files kept open by the writer (most recently written first)
+FEEDBACK_OPEN_PARTITIONS = 4
+
+_PARTITION = re.compile(r"^(\d{4}-\d{2}-\d{2})\.jsonl$")
+
+Record = Dict[str, Any]
+# Called once per batch with None (committed) or the exception that failed it
+Ack = Callable[[Optional[BaseException]], None]
+
+
+class FeedbackLog:
+    def __init__(
+        self,
+        path: Any,
+        on_commit: Optional[Callable[[List[Record]], None]] = None,
+        flush_ms: Optional[float] = None,
+        fsync: Optional[bool] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.on_commit = on_commit
+        self.flush_seconds = (FEEDBACK_FLUSH_MS if flush_ms is None else flush_ms) / 1000.0
+        self.fsync = FEEDBACK_FSYNC if fsync is None else fsync
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[List[Record], Ack]] = []
+        self._closed = False
+        # Open partition files by day, least recently written first
+        self._files: Dict[str, Any] = {}
+        self._writer: Optional[threading.Thread] = None
+        # Batches written, so tests/metrics can see group commit working
+        self.batches = 0
+
+    # ----- reading -----
+
+    def partitions(self) -> List[str]:
+        """Days (YYYY-MM-DD) that have a partition, oldest first."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(m.group(1) for m in map(_PARTITION.match, names) if m)
+
+    def replay(self, since: Optional[date] = None) -> List[Record]:
+        first = None if since is None else since.isoformat()
+        records = []
+        for day in self.partitions():
+            if first is None or day >= first:
+                records.extend(self._read_partition(self.path / f"{day}.jsonl"))
+        return records
+
+    @staticmethod
+    def _read_partition(path: Path) -> List[Record]:
+        with open(path, "rb") as f:
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # Torn write from a crash; it was never acknowledged
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+        records = []
+        for line in data[:end].splitlines():
+            if line.strip():
+                records.append(json.loads(line))
+        return records
+
+    # ----- writing -----
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, name="feedback-log", daemon=True)
+            self._writer.start()
+
+    def _submit(self, records: List[Record], ack: Ack) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("feedback log is closed")
+            self._ensure_writer()
+            self._pending.append((records, ack))
+            self._cond.notify()
+
+    def append(self, records: List[Record]) -> None:
+        """Write records durably; returns once they're committed."""
+        if not records:
+            return
+        done = threading.Event()
+        outcome: List[Optional[BaseException]] = []
+
+        def ack(error: Optional[BaseException]) -> None:
+            outcome.append(error)
+            done.set()
+
+        self._submit(records, ack)
+        done.wait()
+        if outcome[0] is not None:
+            raise outcome[0]
+
+    async def append_async(self, records: List[Record]) -> None:
+        """append() without blocking the event loop while the batch commits."""
+        if not records:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def settle(error: Optional[BaseException]) -> None:
+            if future.done():
+                return
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+        self._submit(records, lambda error: loop.call_soon_threadsafe(settle, error))
+        await future
+
+    def _take_batch(self) -> List[Tuple[List[Record], Ack]]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+            queued = sum(len(records) for records, _ in self._pending)
+
+        # Group commit: let a burst of concurrent submitters join this batch
+        if self.flush_seconds > 0 and queued < FEEDBACK_MAX_BATCH:
+            time.sleep(self.flush_seconds)
+
+        with self._cond:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+
+            records = [record for chunk, _ in batch for record in chunk]
+            error = self._commit(records)
+            if error is None and self.on_commit is not None:
+                try:
+                    self.on_commit(records)
+                except Exception as exc:
+                    # Durable already; the next replay will pick them up
+                    print(f"⚠️ Feedback aggregate update failed: {exc}")
+
+            for _, ack in batch:
+                ack(error)
+
+    def _partition(self, day: str) -> Any:
+        f = self._files.pop(day, None)
+        if f is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            path = self.path / f"{day}.jsonl"
+            created = not path.exists()
+            f = open(path, "ab")
+            if created and self.fsync:
+                # Make the new file's directory entry durable too
+                dir_fd = os.open(self.path, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            while len(self._files) >= FEEDBACK_OPEN_PARTITIONS:
+                self._files.pop(next(iter(self._files))).close()
+        self._files[day] = f
+        return f
+
+    def _commit(self, records: List[Record]) -> Optional[BaseException]:
+        by_day: Dict[str, List[bytes]] = {}
+        for record in records:
+            line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+            by_day.setdefault(_day(record), []).append(line)
+
+        written: List[Tuple[Any, int]] = []
+        try:
+            for day, lines in by_day.items():
+                f = self._partition(day)
+                written.append((f, f.tell()))
+                f.write(b"".join(lines))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except BaseException as exc:
+            # Don't leave half a batch for the next one to append onto
+            for f, start in written:
+                try:
+                    f.truncate(start)
+                    f.seek(start)
+                except OSError:
+                    pass
+            return exc
+        self.batches += 1
+        return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def _day(record: Record) -> str:
+    """UTC day of a record's created_at (today when it has none)."""
+    created = record.get("created_at")
+    if not created:
+        return datetime.now(timezone.utc).date().isoformat()
+    dt = datetime.fromisoformat(created)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date().isoformat()
+
+
+_log: Optional[FeedbackLog] = None
+_log_key: Optional[Tuple[str, int]] = None
+_log_lock = threading.Lock()
+
+
+def get_feedback_log(path: Any, aggregator: Any, since: Optional[date] = None) -> FeedbackLog:
+    """Log at `path` feeding `aggregator` (replayed into it the first time)."""
+    global _log, _log_key
+    key = (str(path), id(aggregator))
+    if _log_key == key:
+        return _log
+
+    with _log_lock:
+        if _log_key != key:
+            log = FeedbackLog(path, on_commit=aggregator.add)
+            aggregator.add(log.replay(since))
+            if _log is not None:
+                _log.close()
+            _log, _log_key = log, key
+        return _log
+
+
+def close_feedback_log() -> None:
+    global _log, _log_key
+    with _log_lock:
+        if _log is not None:
+            _log.close()
+        _log, _log_key = None, None
@@ -0,0 +1,228 @@
+"""
+Spec (feedback_sync.py):
+
+- Sources (fetch_page(after_id, limit) → rows ordered by id):
+    SupabaseSource(url, key, table) – PostgREST: id=gt.<cursor>, order=id,
+    limit=<page>. Needs a key that may select (service role); the anon key
+    is insert-only under the table's RLS policies.
+    SQLiteSource(path, table) – local stand-in with the same columns, for
+    tests and offline setups.
+
+- FeedbackSync(source, csv_path, state_path).run():
+    Pulls rows with id past the persisted cursor, page by page, and appends
+    them to feedback.csv in its own column order – the FeedbackAggregator
+    already reads only appended bytes, so a sync costs only the new rows.
+    Numeric spot_ids (the frontend's registry ids) are written as spot
+    names so they match predictions. State (cursor + the CSV's identity
+    and size) lives in data/feedback_sync_state.json; rows appended before
+    a crash, or a replaced export, move the cursor past the ids already in
+    the file instead of duplicating them.
+    Returns {"fetched", "pages", "cursor"}.
+
+- source_from_env() / sync_from_env():
+    FEEDBACK_SYNC_SQLITE, else SUPABASE_URL + SUPABASE_SERVICE_KEY, else
+    None (sync off). main.py runs the sync every FEEDBACK_SYNC_SECONDS.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+import metrics
+import spots
+import model
+
+FEEDBACK_SYNC_SECONDS = float(os.getenv("FEEDBACK_SYNC_SECONDS", "60"))
+FEEDBACK_SYNC_PAGE_SIZE = int(os.getenv("FEEDBACK_SYNC_PAGE_SIZE", "1000"))
+
+# Column order for a feedback.csv the sync creates (same as the export)
+COLUMNS = ["id", "created_at", "accuracy_rating", "busy_rating", "client_session_id", "comment", "spot_id"]
+
+Row = Dict[str, Any]
+
+
+class SupabaseSource:
+    def __init__(self, url: str, key: str, table: str = "feedback", timeout: float = 30.0) -> None:
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self.timeout = timeout
+
+    def fetch_page(self, after_id: int, limit: int) -> List[Row]:
+        resp = requests.get(
+            self.endpoint,
+            params={"select": "*", "id": f"gt.{after_id}", "order": "id.asc", "limit": str(limit)},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+
+class SQLiteSource:
+    def __init__(self, path: Any, table: str = "feedback") -> None:
+        self.path = Path(path)
+        self.table = table
+
+    def fetch_page(self, after_id: int, limit: int) -> List[Row]:
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f'SELECT * FROM "{self.table}" WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+
+def source_from_env() -> Optional[Any]:
+    sqlite_path = os.getenv("FEEDBACK_SYNC_SQLITE")
+    if sqlite_path:
+        return SQLiteSource(sqlite_path)
+
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
+    if url and key:
+        return SupabaseSource(url, key)
+    return None
+
+
+def sync_from_env() -> Optional["FeedbackSync"]:
+    source = source_from_env()
+    if source is None:
+        return None
+    return FeedbackSync(source, model.FEEDBACK_PATH, model.FEEDBACK_SYNC_STATE_PATH)
+
+
+def _spot_names() -> Dict[str, str]:
+    return {str(s["id"]): s["name"] for s in spots.get_index().spots if s.get("id") is not None}
+
+
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class FeedbackSync:
+    def __init__(
+        self,
+        source: Any,
+        csv_path: Any,
+        state_path: Any,
+        page_size: Optional[int] = None,
+    ) -> None:
+        self.source = source
+        self.csv_path = Path(csv_path)
+        self.state_path = Path(state_path)
+        self.page_size = page_size or FEEDBACK_SYNC_PAGE_SIZE
+
+    # ----- state -----
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _max_id(self, offset: int) -> int:
+        """Largest id among the CSV's records starting at byte `offset`."""
+        with open(self.csv_path, "rb") as f:
+            header = f.readline()
+            f.seek(max(offset, len(header)))
+            body = f.read()
+
+        reader = csv.DictReader(io.StringIO((header + body).decode("utf-8")))
+        largest = 0
+        for record in reader:
+            try:
+                largest = max(largest, int(record.get("id") or 0))
+            except ValueError:
+                continue
+        return largest
+
+    def _resume_cursor(self, state: Dict[str, Any]) -> int:
+        try:
+            st = self.csv_path.stat()
+        except FileNotFoundError:
+            return 0  # nothing local: pull everything
+
+        identity = [st.st_dev, st.st_ino]
+        if state.get("file") != identity or st.st_size < state.get("size", 0):
+            # New or replaced file (e.g. a manual export): continue after it
+            return self._max_id(0)
+        if st.st_size > state["size"]:
+            # Rows appended after the last saved cursor (crash mid-sync)
+            return max(state["cursor"], self._max_id(state["size"]))
+        return state["cursor"]
+
+    def _save_state(self, cursor: int) -> None:
+        st = self.csv_path.stat()
+        model.write_json_atomic(self.state_path, {
+            "cursor": cursor,
+            "file": [st.st_dev, st.st_ino],
+            "size": st.st_size,
+        })
+
+    # ----- sync -----
+
+    def _append(self, rows: List[Row]) -> None:
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.csv_path, "a+b") as f:
+            f.seek(0)
+            header = f.readline().decode("utf-8")
+            f.seek(0, os.SEEK_END)
+
+            out = io.StringIO()
+            writer = csv.writer(out, lineterminator="\n")
+            if header:
+                columns = next(csv.reader([header]))
+                if f.tell() and not _ends_with_newline(f):
+                    out.write("\n")
+            else:
+                columns = COLUMNS
+                writer.writerow(columns)
+
+            names = _spot_names()
+            for row in rows:
+                row = {str(k).strip().lower(): v for k, v in row.items()}
+                spot = _cell(row.get("spot_id"))
+                row["spot_id"] = names.get(spot, spot)
+                writer.writerow([_cell(row.get(c.strip().lower())) for c in columns])
+
+            f.write(out.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, max_pages: Optional[int] = None) -> Dict[str, int]:
+        with metrics.stage("feedback.sync"):
+            cursor = self._resume_cursor(self._load_state())
+            fetched = pages = 0
+
+            while max_pages is None or pages < max_pages:
+                rows = self.source.fetch_page(cursor, self.page_size)
+                if not rows:
+                    break
+                self._append(rows)
+                cursor = max(int(row["id"]) for row in rows)
+                self._save_state(cursor)
+                fetched += len(rows)
+                pages += 1
+                if len(rows) < self.page_size:
+                    break
+
+            return {"fetched": fetched, "pages": pages, "cursor": cursor}
+
+
+def _ends_with_newline(f) -> bool:
+    f.seek(-1, os.SEEK_END)
+    last = f.read(1)
+    f.seek(0, os.SEEK_END)
+    return last == b"\n"
@@ -0,0 +1,139 @@
+"""
+Spec (log_cache.py):
+
+- Columnar cache of parsed desk logs, so retraining on an unchanged CSV
+  skips pd.read_csv + pd.to_datetime entirely.
+
+- One cache entry per source file, in <cache_dir>/<hash of path>/:
+    meta.json      – source size, mtime_ns, sampled digest, desk labels
+    desk.i32       – desk label code per row (index into meta["labels"])
+    epoch.i64      – UTC timestamp per row as epoch seconds (NAT if unparsable)
+  The .i32/.i64 files are raw little-endian arrays opened with np.memmap.
+
+- load(path, cache_dir):
+    Returns a CachedLog if the entry matches the file's current size,
+    mtime and digest, else None.
+
+- CacheWriter(path, cache_dir):
+    append(desk_codes, epoch) per parsed chunk, then commit(labels).
+    The entry is built in a temp dir and renamed into place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Value stored in epoch.i64 for rows whose timestamp didn't parse
+NAT = np.iinfo(np.int64).min
+
+_FORMAT = 1
+_SAMPLE_BYTES = 1 << 20
+
+
+def source_key(path: Path) -> Dict[str, Any]:
+    """
+    Identity of a source file: size + mtime, plus a digest of its first
+    and last MiB so an in-place rewrite with the same size is still caught
+    without hashing gigabytes on every retrain.
+    """
+    st = path.stat()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(st.st_size).encode("ascii"))
+    with open(path, "rb") as f:
+        h.update(f.read(_SAMPLE_BYTES))
+        if st.st_size > _SAMPLE_BYTES:
+            f.seek(max(_SAMPLE_BYTES, st.st_size - _SAMPLE_BYTES))
+            h.update(f.read(_SAMPLE_BYTES))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": h.hexdigest()}
+
+
+def _entry_dir(path: Path, cache_dir: Path) -> Path:
+    name = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / name
+
+
+@dataclass
+class CachedLog:
+    labels: List[str]
+    desk: np.ndarray   # int32 memmap
+    epoch: np.ndarray  # int64 memmap
+
+    def __len__(self) -> int:
+        return len(self.desk)
+
+
+def _open(entry: Path, name: str, dtype: Any, rows: int) -> np.ndarray:
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(entry / name, dtype=dtype, mode="r", shape=(rows,))
+
+
+def load(path: Path, cache_dir: Path) -> Optional[CachedLog]:
+    entry = _entry_dir(path, cache_dir)
+    try:
+        with open(entry / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if meta.get("format") != _FORMAT or meta.get("source") != source_key(path):
+        return None
+
+    rows = meta["rows"]
+    return CachedLog(
+        labels=meta["labels"],
+        desk=_open(entry, "desk.i32", "<i4", rows),
+        epoch=_open(entry, "epoch.i64", "<i8", rows),
+    )
+
+
+class CacheWriter:
+    def __init__(self, path: Path, cache_dir: Path) -> None:
+        self.path = path
+        self.cache_dir = cache_dir
+        # Key taken before parsing: if the file changes underneath us the
+        # entry simply won't match next time.
+        self._source = source_key(path)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp = Path(tempfile.mkdtemp(prefix=".building-", dir=cache_dir))
+        self._desk = open(self._tmp / "desk.i32", "wb")
+        self._epoch = open(self._tmp / "epoch.i64", "wb")
+        self._rows = 0
+
+    def append(self, desk_codes: np.ndarray, epoch: np.ndarray) -> None:
+        self._desk.write(np.ascontiguousarray(desk_codes, dtype="<i4").tobytes())
+        self._epoch.write(np.ascontiguousarray(epoch, dtype="<i8").tobytes())
+        self._rows += len(desk_codes)
+
+    def commit(self, labels: List[str]) -> None:
+        self._desk.close()
+        self._epoch.close()
+
+        meta = {
+            "format": _FORMAT,
+            "source": self._source,
+            "source_path": str(self.path),
+            "rows": self._rows,
+            "labels": labels,
+        }
+        with open(self._tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        entry = _entry_dir(self.path, self.cache_dir)
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(self._tmp, entry)
+
+    def abort(self) -> None:
+        self._desk.close()
+        self._epoch.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
@@ -1,15 +1,130 @@
 """
 Spec:
 - GET , health check, returns {"status": "backend running"}
-- GET /train, runs train_model(), returns message + entry counts
+- POST /train?full=false, starts train_model() (incremental unless full=true)
+  as a background job in its own process, returns 202 + the job (job_id,
+  status, progress); the new model is served once it's renamed into place
+- GET /train/{job_id}, job status, progress and (when done) result or error
+- GET /train/{job_id}/progress, just {job_id, status, progress}
+- GET /train?full=false (deprecated), trains inside the request and returns
+  message + mode + model version + entry counts
+- GET /spots/nearby?lat=&lng=&radius=500&k=5&features=quiet,outlets&timestamp=,
+  the k least busy registry spots (shared/spot_coordinates.json) within
+  radius metres having every feature, found through the spot grid index
+  and scored in one batch
+- POST /feedback {spot_id, busy_rating 1–10, accuracy_rating?, comment?,
+  client_session_id?, created_at? (422 if in the future or older than the
+  feedback window)}, and POST /feedback/bulk with a list of
+  up to FEEDBACK_BULK_MAX of them: written to the feedback log and fsynced
+  before the 201, and counted in predictions right away
 - GET /predict?spot=...&timestamp=..., predicts busy score using predict_busy_score()
+- GET /predict/batch?spots=A,B&timestamp=..., scores many spots (default: all) in one pass
+- GET /predict/stream, Server-Sent Events: a snapshot of every known spot's
+  busy_score, then deltas whenever the model, feedback, weather or time slot
+  changes – one shared computation per change for all clients
+- GET /predict/timeline?spot=...&start=...&end=...&step=..., scores one spot over a
+  time range in one vectorized pass (defaults: next 24h in 15-minute steps)
+- /predict endpoints are async; weather goes through a pooled httpx client,
+  and the file/SQLite-backed stages (model load, feedback aggregates, grid,
+  response-cache validators, weather store) run in worker threads
+- /predict and /predict/batch answer from the precomputed prediction grid
+  (next 48h, with "computed_at") when they can, else compute live
+- /predict and /predict/batch send a weak ETag and Cache-Control derived from
+  the model, feedback and weather versions and the request's time slot,
+  answer a matching If-None-Match with 304, and keep recent results in a
+  bounded LRU (response_cache.py)
+- /predict and /predict/batch take ?debug=true to add a per-stage latency
+  breakdown ("stages", in ms) to the response
+- GET /metrics, Prometheus text format: stage and request latency
+  histograms, cache hit/miss counters, Open-Meteo latency and errors
+- On startup, warms the local weather store in a background thread and
+  starts the scheduler that keeps the prediction grid fresh; when a feedback
+  source is configured (Supabase service key or a SQLite stand-in), also
+  pulls new feedback rows into data/feedback.csv every FEEDBACK_SYNC_SECONDS
 """
 
-from fastapi import FastAPI
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from model import train_model, predict_busy_score
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from model import (
+  known_spots,
+  train_model,
+  predict_busy_score_async,
+  predict_busy_scores_async,
+  predict_timeline_async,
+  feedback_aggregator,
+  submit_feedback_async,
+  check_feedback_time,
+)
+import feedback_log
+import feedback_sync
+import metrics
+import prediction_grid
+import response_cache
+import score_stream
+import spots
+import training_jobs
+import weather
+
+
+def _warm_weather():
+  try:
+    weather.warm_up()
+  except Exception as exc:
+    print(f"⚠️ Weather warm-up failed: {exc}")
+
+
+async def _refresh_grid_forever():
+  grid = prediction_grid.get_grid()
+  while True:
+    try:
+      # Rebuilds only when the model, feedback, weather or hour changed
+      await asyncio.to_thread(grid.refresh)
+    except FileNotFoundError:
+      pass  # nothing trained yet; /predict reports that itself
+    except Exception as exc:
+      print(f"⚠️ Prediction grid refresh failed: {exc}")
+    await asyncio.sleep(prediction_grid.GRID_REFRESH_SECONDS)
+
 
-app = FastAPI()
+async def _sync_feedback_forever(sync):
+  while True:
+    try:
+      # Pulls only rows past the stored cursor, in pages
+      result = await asyncio.to_thread(sync.run)
+      if result["fetched"]:
+        print(f"✅ Synced {result['fetched']} feedback rows (cursor {result['cursor']})")
+    except Exception as exc:
+      print(f"⚠️ Feedback sync failed: {exc}")
+    await asyncio.sleep(feedback_sync.FEEDBACK_SYNC_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # Don't hold up startup on the Open-Meteo round-trip
+  threading.Thread(target=_warm_weather, daemon=True).start()
+  # Replay feedback submitted before the last shutdown/crash
+  await asyncio.to_thread(feedback_aggregator)
+  scheduler = asyncio.create_task(_refresh_grid_forever())
+  sync = feedback_sync.sync_from_env()
+  syncer = asyncio.create_task(_sync_feedback_forever(sync)) if sync else None
+  yield
+  scheduler.cancel()
+  if syncer:
+    syncer.cancel()
+  await score_stream.get_broadcaster().close()
+  await weather.aclose_async_client()
+  feedback_log.close_feedback_log()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -20,22 +135,256 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+  if not metrics.METRICS_ENABLED:
+    return await call_next(request)
+
+  start = time.perf_counter()
+  response = await call_next(request)
+  # Route template, not the raw path, so labels stay bounded
+  route = request.scope.get("route")
+  metrics.HTTP_SECONDS.observe(
+    time.perf_counter() - start,
+    getattr(route, "path", "unmatched"),
+    str(response.status_code),
+  )
+  return response
+
+
+def _grid_lookup(spots, timestamp, inputs=None):
+  # With `inputs`, only a grid built from exactly those inputs may answer
+  with metrics.stage("predict.grid"):
+    cached = prediction_grid.get_grid().lookup(spots, timestamp, inputs)
+  if cached is None:
+    metrics.cache_miss("prediction_grid")
+  else:
+    metrics.cache_hit("prediction_grid")
+  return cached
+
+
 @app.get("/")
 def root():
   return {"status": "backend running"}
 
 
-@app.get("/train")
-def train():
+@app.get("/train", deprecated=True)
+def train(full: bool = False):
+  # Kept for old clients; blocks a worker for the whole run – use POST /train
+  # Incremental by default; ?full=true rebuilds from the whole log history
+  result = train_model(incremental=not full)
+  # Serve live until the scheduler rebuilds the grid on the new model
+  prediction_grid.get_grid().mark_stale()
+  return {"message": "training complete", **training_jobs.summary(result)}
+
+
+@app.post("/train", status_code=202)
+def start_training(full: bool = False):
+  return training_jobs.get_jobs().start(full=full)
+
+
+def _training_job(job_id: str):
+  job = training_jobs.get_jobs().get(job_id)
+  if job is None:
+    raise HTTPException(status_code=404, detail=f"Unknown training job {job_id}")
+  return job
+
+
+@app.get("/train/{job_id}")
+def training_status(job_id: str):
+  return _training_job(job_id)
+
+
+@app.get("/train/{job_id}/progress")
+def training_progress(job_id: str):
+  job = _training_job(job_id)
+  return {"job_id": job_id, "status": job["status"], "progress": job["progress"]}
+
+
+# Most records accepted by one POST /feedback/bulk
+FEEDBACK_BULK_MAX = 1000
+
+
+class FeedbackIn(BaseModel):
+  spot_id: str = Field(min_length=1)
+  busy_rating: int = Field(ge=1, le=10)
+  accuracy_rating: int | None = Field(default=None, ge=1, le=10)
+  comment: str | None = None
+  client_session_id: str | None = None
+  created_at: datetime | None = None  # default: now
 
-  result = train_model()
-  return {
-    "message": "training complete",
-    "per_library_entries": sum(len(v) for v in result["per_library"].values()),
-    "global_entries": len(result["global"])
-  }
+  @field_validator("created_at")
+  @classmethod
+  def _recent(cls, value: datetime | None) -> datetime | None:
+    # Within FEEDBACK_WINDOW_DAYS and not (beyond clock skew) in the future
+    return None if value is None else check_feedback_time(value)
+
+
+@app.post("/feedback", status_code=201)
+async def post_feedback(item: FeedbackIn):
+  accepted = await submit_feedback_async([item.model_dump(exclude_none=True)])
+  return {"accepted": accepted}
+
+
+@app.post("/feedback/bulk", status_code=201)
+async def post_feedback_bulk(items: list[FeedbackIn]):
+  if len(items) > FEEDBACK_BULK_MAX:
+    raise HTTPException(status_code=400, detail=f"At most {FEEDBACK_BULK_MAX} records per request")
+  accepted = await submit_feedback_async([item.model_dump(exclude_none=True) for item in items])
+  return {"accepted": accepted}
+
+
+def _from_response_cache(request: Request, prepared):
+  """(304 response | cached predictions | None) for a prepared request."""
+  if prepared is None:
+    return None
+  if response_cache.matches(request.headers.get("if-none-match"), prepared.etag):
+    return Response(status_code=304, headers=prepared.headers)
+  return response_cache.get_cache().get(prepared.key, prepared.dt)
+
+
+async def _remember(prepared, predictions, response: Response, computed: bool):
+  """
+  Cache fresh predictions and send validators, unless weather failed or the
+  inputs moved on while computing (the result may not match the key).
+  """
+  if prepared is None:
+    return
+  if not response_cache.cacheable(predictions):
+    response.headers["Cache-Control"] = "no-cache"
+    return
+  if computed:
+    current = await asyncio.to_thread(prediction_grid.PredictionGrid.current_inputs)
+    if current != prepared.inputs:
+      response.headers["Cache-Control"] = "no-cache"
+      return
+    response_cache.get_cache().put(prepared.key, predictions)
+  response.headers.update(prepared.headers)
 
 
 @app.get("/predict")
-def predict(spot: str, timestamp: str | None = None):
-  return predict_busy_score(spot, timestamp)
+async def predict(
+  request: Request,
+  response: Response,
+  spot: str,
+  timestamp: str | None = None,
+  debug: bool = False,
+):
+  # Debug responses measure the pipeline, so they skip the response cache
+  prepared = None if debug else await asyncio.to_thread(response_cache.prepare, "/predict", [spot], timestamp)
+  cached = _from_response_cache(request, prepared)
+  if isinstance(cached, Response):
+    return cached
+
+  computed = cached is None
+  with metrics.trace(debug) as stages:
+    if computed:
+      cached = await asyncio.to_thread(_grid_lookup, [spot], timestamp, prepared and prepared.inputs)
+      if cached is None:
+        cached = [await predict_busy_score_async(spot, timestamp)]
+
+  await _remember(prepared, cached, response, computed)
+  result = cached[0]
+  if stages is not None:
+    result = {**result, "stages": metrics.breakdown_ms(stages)}
+  return result
+
+
+@app.get("/predict/batch")
+async def predict_batch(
+  request: Request,
+  response: Response,
+  spots: str | None = None,
+  timestamp: str | None = None,
+  debug: bool = False,
+):
+  spot_list = None
+  if spots:
+    spot_list = [s.strip() for s in spots.split(",") if s.strip()]
+
+  grid_spots = await asyncio.to_thread(known_spots) if spot_list is None else spot_list
+  prepared = None if debug else await asyncio.to_thread(
+    response_cache.prepare, "/predict/batch", grid_spots, timestamp
+  )
+  predictions = _from_response_cache(request, prepared)
+  if isinstance(predictions, Response):
+    return predictions
+
+  computed = predictions is None
+  with metrics.trace(debug) as stages:
+    if computed:
+      predictions = await asyncio.to_thread(
+        _grid_lookup, grid_spots, timestamp, prepared and prepared.inputs
+      )
+      if predictions is None:
+        predictions = await predict_busy_scores_async(spot_list, timestamp)
+
+  await _remember(prepared, predictions, response, computed)
+  result = {"count": len(predictions), "predictions": predictions}
+  if stages is not None:
+    result["stages"] = metrics.breakdown_ms(stages)
+  return result
+
+
+# Bounds for /spots/nearby
+NEARBY_MAX_RADIUS_M = 5000
+NEARBY_MAX_K = 50
+
+
+@app.get("/spots/nearby")
+async def spots_nearby(
+  lat: float,
+  lng: float,
+  radius: float = 500,
+  k: int = 5,
+  features: str | None = None,
+  timestamp: str | None = None,
+):
+  if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+    raise HTTPException(status_code=400, detail="lat/lng out of range")
+  if not 0 < radius <= NEARBY_MAX_RADIUS_M:
+    raise HTTPException(status_code=400, detail=f"radius must be in (0, {NEARBY_MAX_RADIUS_M}] metres")
+  if not 1 <= k <= NEARBY_MAX_K:
+    raise HTTPException(status_code=400, detail=f"k must be in [1, {NEARBY_MAX_K}]")
+
+  tags = [f.strip() for f in features.split(",") if f.strip()] if features else []
+  # The registry file is stat'ed (and maybe reloaded) off the event loop
+  index = await asyncio.to_thread(spots.get_index)
+  nearby = index.within(lat, lng, radius, tags)
+  if not nearby:
+    return {"count": 0, "spots": []}
+
+  names = [spot["name"] for spot, _ in nearby]
+  predictions = await asyncio.to_thread(_grid_lookup, names, timestamp)
+  if predictions is None:
+    predictions = await predict_busy_scores_async(names, timestamp)
+
+  ranked = spots.rank_nearby(nearby, predictions, k)
+  return {"count": len(ranked), "spots": ranked}
+
+
+@app.get("/predict/stream")
+async def predict_stream():
+  return StreamingResponse(
+    score_stream.events(score_stream.get_broadcaster()),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+  )
+
+
+@app.get("/predict/timeline")
+async def predict_timeline(
+  spot: str,
+  start: str | None = None,
+  end: str | None = None,
+  step: str | None = None,
+):
+  try:
+    return await predict_timeline_async(spot, start, end, step)
+  except ValueError as exc:
+    raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+  return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,262 @@
+"""
+Spec (metrics.py):
+
+- Counter / Histogram:
+    Minimal thread-safe Prometheus-style metrics with labels. No client
+    library needed; render() produces the text exposition format served
+    by GET /metrics.
+
+- stage(name):
+    Context manager timing one pipeline stage into
+    findmydesk_stage_seconds{stage=name}. Inside trace() the duration is
+    also added to that request's stage breakdown (?debug=true).
+
+- cache_hit(cache) / cache_miss(cache) / cache_evicted(cache, count):
+    findmydesk_cache_requests_total{cache, result} and
+    findmydesk_cache_evictions_total{cache}.
+
+- METRICS_ENABLED (env, default on):
+    When off, stage() outside a trace is a shared no-op and counters are
+    not touched, so the instrumented code pays one attribute check.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Seconds; covers sub-millisecond cache hits up to multi-minute retrains
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, ([*s[0]], s[1], s[2])) for labels, s in self._series.items())
+
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+# ---------- Registry ----------
+
+STAGE_SECONDS = Histogram(
+    "findmydesk_stage_seconds",
+    "Time spent in each prediction/training stage.",
+    ["stage"],
+)
+HTTP_SECONDS = Histogram(
+    "findmydesk_http_request_seconds",
+    "HTTP request latency by route and status.",
+    ["route", "status"],
+)
+CACHE_REQUESTS = Counter(
+    "findmydesk_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss).",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "findmydesk_cache_evictions_total",
+    "Entries evicted from bounded caches.",
+    ["cache"],
+)
+WEATHER_UPSTREAM_SECONDS = Histogram(
+    "findmydesk_weather_upstream_seconds",
+    "Latency of Open-Meteo downloads by outcome.",
+    ["outcome"],
+)
+WEATHER_UPSTREAM_ERRORS = Counter(
+    "findmydesk_weather_upstream_errors_total",
+    "Failed Open-Meteo downloads.",
+)
+
+REGISTRY = [
+    STAGE_SECONDS,
+    HTTP_SECONDS,
+    CACHE_REQUESTS,
+    CACHE_EVICTIONS,
+    WEATHER_UPSTREAM_SECONDS,
+    WEATHER_UPSTREAM_ERRORS,
+]
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def cache_hit(cache: str) -> None:
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache, "hit")
+
+
+def cache_miss(cache: str) -> None:
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache, "miss")
+
+
+def cache_evicted(cache: str, count: int = 1) -> None:
+    if METRICS_ENABLED and count:
+        CACHE_EVICTIONS.inc(cache, amount=count)
+
+
+def weather_upstream(seconds: float, ok: bool) -> None:
+    if METRICS_ENABLED:
+        WEATHER_UPSTREAM_SECONDS.observe(seconds, "ok" if ok else "error")
+        if not ok:
+            WEATHER_UPSTREAM_ERRORS.inc()
+
+
+# ---------- Stage timing ----------
+
+# Per-request stage breakdown while trace() is active: {stage: seconds}
+_trace: ContextVar[Optional[Dict[str, float]]] = ContextVar("findmydesk_trace", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Stage":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.start
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe(elapsed, self.name)
+        breakdown = _trace.get()
+        if breakdown is not None:
+            breakdown[self.name] = breakdown.get(self.name, 0.0) + elapsed
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    if not METRICS_ENABLED and _trace.get() is None:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+@contextmanager
+def trace(enabled: bool = True) -> Iterator[Optional[Dict[str, float]]]:
+    """Collect a {stage: seconds} breakdown for the code inside (if enabled)."""
+    if not enabled:
+        yield None
+        return
+
+    breakdown: Dict[str, float] = {}
+    token = _trace.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _trace.reset(token)
+
+
+def breakdown_ms(breakdown: Dict[str, float]) -> Dict[str, float]:
+    return {name: round(seconds * 1000, 4) for name, seconds in breakdown.items()}
@@ -3,49 +3,110 @@
 Spec (model.py):
 
 - normalize_desk_to_library(raw):
-    Maps raw desk names from CSV to standardized library names.
+    Maps raw desk names from CSV to standardized library names, using the
+    compiled matcher for DESK_TO_LIBRARY + data/desk_mapping.json.
 
 - get_bin_from_hour(hour):
     Converts hour (0–23) into 3-hour bin index 0–7.
 
-- train_model():
-    Loads desk_logs.csv, maps desks→libraries, bins timestamps,
-    builds normalized per-library and global busy patterns.
-    Saves lookup.json and returns:
+- train_model(chunksize, incremental, logs, workers):
+    Streams desk logs (one CSV, a directory or a glob; files are counted
+    in parallel worker processes), maps desks→libraries, counts
+    observations per weekday × SLOT_MINUTES slot and builds normalized
+    per-library and global busy patterns (sparse slots are smoothed toward
+    weekday × 3-hour and 3-hour bins).
+    incremental=True only reads rows appended since the last run
+    (per-file raw counts + byte watermarks live in lookup_state.json).
+    Parsed logs are cached as memory-mapped columns in data/log_cache/.
+    Reports progress through an optional callback (training_jobs.py).
+    Saves lookup.json (for inspection) + lookup.bin (served), each via
+    temp file + rename, and returns:
         {
+          "version": "<UTC training timestamp>",
           "per_library": {lib: {bin: score}},
-          "global": {bin: score}
+          "global": {bin: score},
+          "weekly": {slot_minutes, per_library: {lib: [[score]]}, global}
         }
 
 - get_feedback_score(spot):
-    Reads feedback.csv (last 14 days), averages busy_rating for spot,
-    returns normalized score 0–1 or None.
+    Recency-weighted busy_rating for spot (half-life
+    FEEDBACK_HALF_LIFE_HOURS) from the incremental feedback aggregates,
+    normalized to 0–1; None once the reports have decayed below
+    FEEDBACK_MIN_WEIGHT as of the start of the UTC hour. With a half-life
+    of 0, the plain average over the last FEEDBACK_WINDOW_DAYS instead.
+
+- submit_feedback(items) / submit_feedback_async:
+    Appends feedback to data/feedback_log/<UTC day>.jsonl (group-committed,
+    fsynced before returning) and updates the in-memory aggregates; the log is
+    replayed into them on first use after a restart.
 
 - load_lookup():
-    Loads lookup.json (requires /train first).
+    Returns the trained model as a BusyModel (requires /train first).
+    Served from an in-memory LookupHolder that memory-maps lookup.bin
+    (or parses lookup.json) only when it changes.
+
+- model_version():
+    Version stamp of the lookup currently served.
 
 - apply_weather_adjustment(base_score, dt):
     Calls get_weather(), computes weather factor, returns adjusted score
     and weather details.
 
+- predict_busy_scores(spots, timestamp):
+    Batch prediction: resolves lookup, bin and weather once and scores
+    many spots (default: all known spots) in one vectorized pass.
+
+- predict_busy_scores_async / predict_busy_score_async:
+    Same pipeline for async callers; weather comes from get_weather_async().
+
+- predict_timeline(spot, start, end, step) / predict_timeline_async:
+    Busy scores for one spot at every step in [start, end], computed as
+    arrays: one model slice, one feedback aggregate, one weather lookup.
+
+- Stages (metrics.stage):
+    predict.load_lookup / model / feedback / weather / finish and
+    train.count / smooth / write are timed into /metrics and, under
+    ?debug=true, into the response's "stages".
+
 - predict_busy_score(spot, timestamp):
-    Uses 3-hour bin model, optional feedback, and weather to compute:
+    Uses the weekday × time-slot model, optional feedback, and weather to compute:
         {
-          spot, bin, model_score, feedback_score,
+          spot, bin, weekday, slot, model_score, model_version, feedback_score,
           score_before_weather, weather, busy_score
         }
 """
 
 from __future__ import annotations
 
+import asyncio
+import glob
+import hashlib
+import io
 import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from weather import get_weather  # must return dict with temp/precip/cloud/wind
+import log_cache
+import metrics
+from metrics import stage
+from desk_mapping import DeskMatcher, MappingFile
+from busy_model import BusyModel, as_busy_model, weekly_rows
+from feedback import FEEDBACK_MAX_SKEW_SECONDS, FeedbackAggregator, get_aggregator
+from feedback_log import FeedbackLog, get_feedback_log
+from weather import (  # dicts with temp/precip/cloud/wind
+    get_weather,
+    get_weather_async,
+    get_weather_hours,
+    get_weather_hours_async,
+)
 
 # ---------- Paths ----------
 
@@ -53,8 +114,11 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
 DESK_LOGS_PATH = DATA_DIR / "desk_logs.csv"
-FEEDBACK_PATH = DATA_DIR / "feedback.csv"   # optional (Supabase export)
+FEEDBACK_PATH = DATA_DIR / "feedback.csv"   # optional (Supabase export / feedback_sync.py)
+FEEDBACK_SYNC_STATE_PATH = DATA_DIR / "feedback_sync_state.json"  # sync cursor
+FEEDBACK_LOG_PATH = DATA_DIR / "feedback_log"  # feedback POSTed to the API, one file per UTC day
 LOOKUP_PATH = DATA_DIR / "lookup.json"
+DESK_MAPPING_PATH = DATA_DIR / "desk_mapping.json"  # optional extra desk → library entries
 
 # ---------- Libraries & Mapping ----------
 
@@ -113,27 +177,25 @@ DESK_TO_LIBRARY: Dict[str, str] = {
 }
 
 
-def normalize_desk_to_library(raw: Any) -> Optional[str]:
-    """
-    Map a raw 'desk' string from the CSV to one of our TARGET_LIBRARIES.
-    Returns None if it can't be mapped.
-    """
-    if pd.isna(raw):
-        return None
+_desk_mapping = MappingFile(DESK_TO_LIBRARY)
 
-    s = str(raw).strip()
 
-    # Direct mapping first
-    if s in DESK_TO_LIBRARY:
-        return DESK_TO_LIBRARY[s]
+def get_desk_matcher() -> DeskMatcher:
+    """
+    Compiled matcher for DESK_TO_LIBRARY plus DESK_MAPPING_PATH (if it
+    exists; entries there add new desks or override built-in ones).
+    Recompiled when the file changes.
+    """
+    return _desk_mapping.get(DESK_MAPPING_PATH)
 
-    # Fuzzy "contains" mapping, in case the desk label has extra text
-    lower = s.lower()
-    for key, lib in DESK_TO_LIBRARY.items():
-        if key.lower() in lower:
-            return lib
 
-    return None
+def normalize_desk_to_library(raw: Any) -> Optional[str]:
+    """
+    Map a raw 'desk' string from the CSV to one of our TARGET_LIBRARIES.
+    Exact labels first, then the first mapping key contained in the label
+    (case-insensitive). Returns None if it can't be mapped.
+    """
+    return get_desk_matcher().match(raw)
 
 
 def get_bin_from_hour(hour: int) -> int:
@@ -148,23 +210,518 @@ def get_bin_from_hour(hour: int) -> int:
     return hour // 3
 
 
+# Resolution of the weekday × time-of-day model; must divide a 3-hour bin
+SLOT_MINUTES = int(os.getenv("SLOT_MINUTES", "15"))
+N_DAYS = 7
+
+
+def _n_slots() -> int:
+    if SLOT_MINUTES <= 0 or 180 % SLOT_MINUTES:
+        raise ValueError(f"SLOT_MINUTES must divide 180, got {SLOT_MINUTES}")
+    return 24 * 60 // SLOT_MINUTES
+
+
 # ---------- Training ----------
 
-def train_model() -> Dict[str, Any]:
+N_BINS = 8
+
+# Pseudo-count for shrinking a sparse slot's score toward the coarser bin
+SMOOTHING_COUNT = 5.0
+
+# Row order of the per-(library, day, slot) count tensors used during training
+LIBRARIES = sorted(TARGET_LIBRARIES)
+_LIBRARY_CODE = {lib: i for i, lib in enumerate(LIBRARIES)}
+
+# Rows per chunk when streaming desk_logs.csv; bounds training memory
+TRAIN_CHUNK_ROWS = 250_000
+
+
+def _label_libraries(labels: List[Any], memo: Dict[Any, int]) -> np.ndarray:
+    """
+    Library row index per desk label, plus a trailing -1 slot so code -1
+    (missing desk) maps to "unmapped". The desk matcher runs once per
+    distinct label per training run thanks to `memo`.
+    """
+    matcher = get_desk_matcher()
+    table = np.empty(len(labels) + 1, dtype=np.int64)
+    for i, label in enumerate(labels):
+        if label not in memo:
+            memo[label] = _LIBRARY_CODE.get(matcher.match(label), -1)
+        table[i] = memo[label]
+    table[-1] = -1
+    return table
+
+
+def _empty_counts() -> np.ndarray:
+    return np.zeros((len(LIBRARIES), N_DAYS, _n_slots()), dtype=np.int64)
+
+
+def _count_matrix(lib_codes: np.ndarray, epoch: np.ndarray) -> np.ndarray:
+    """Observation counts as a [len(LIBRARIES) × N_DAYS × slots] int64 tensor."""
+    n_slots = _n_slots()
+    weekday = (epoch // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+    slot = (epoch % 86400) // (SLOT_MINUTES * 60)
+    flat = (lib_codes * N_DAYS + weekday) * n_slots + slot
+    counts = np.bincount(flat, minlength=len(LIBRARIES) * N_DAYS * n_slots)
+    return counts.reshape(len(LIBRARIES), N_DAYS, n_slots)
+
+
+def _parse_chunk(chunk: pd.DataFrame, label_index: Dict[Any, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Columnar form of one chunk of desk logs: (desk label code, UTC epoch
+    seconds) per row that has a desk. `label_index` assigns codes and is
+    shared across chunks of the same file.
+    """
+    codes, labels = pd.factorize(chunk["desk"])
+    table = np.array([label_index.setdefault(label, len(label_index)) for label in labels] + [-1], dtype=np.int32)
+    desk_codes = table[codes]
+
+    has_desk = desk_codes >= 0
+    desk_codes = desk_codes[has_desk]
+
+    # Parse timestamps; force UTC so we never get tz-mismatch later
+    dt = pd.to_datetime(chunk["date_time"][has_desk], errors="coerce", utc=True)
+    epoch = dt.dt.tz_convert(None).to_numpy("datetime64[s]").astype(np.int64)  # NaT → log_cache.NAT
+
+    return desk_codes, epoch
+
+
+def _count_arrays(desk_codes: np.ndarray, epoch: np.ndarray, lib_of_label: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Partial aggregate for columnar desk logs.
+    Returns (count tensor, rows that mapped to a library).
+    """
+    # Map desk label to library row; keep only libraries we actually show on the map
+    lib_codes = lib_of_label[desk_codes]
+    mapped = lib_codes >= 0
+    valid = mapped & (epoch != log_cache.NAT)
+
+    return _count_matrix(lib_codes[valid], epoch[valid]), int(mapped.sum())
+
+
+def _tally_labels(totals: np.ndarray, desk_codes: np.ndarray, n_labels: int) -> np.ndarray:
+    """Running row count per desk label code (grows as new labels appear)."""
+    rows = np.bincount(desk_codes, minlength=n_labels)
+    rows[: len(totals)] += totals
+    return rows
+
+
+def _label_rows(labels: List[Any], totals: np.ndarray) -> Dict[str, int]:
+    return {str(label): int(rows) for label, rows in zip(labels, totals)}
+
+
+def _count_cached(
+    cached: log_cache.CachedLog,
+    chunksize: int,
+    memo: Dict[Any, int],
+) -> Tuple[np.ndarray, int, Dict[str, int]]:
+    """Count a cached log straight from its memory-mapped columns."""
+    lib_of_label = _label_libraries(cached.labels, memo)
+    counts = _empty_counts()
+    mapped_rows = 0
+    totals = np.zeros(0, dtype=np.int64)
+    for i in range(0, len(cached), chunksize):
+        desk_codes = np.asarray(cached.desk[i:i + chunksize])
+        chunk_counts, chunk_mapped = _count_arrays(
+            desk_codes,
+            np.asarray(cached.epoch[i:i + chunksize]),
+            lib_of_label,
+        )
+        counts += chunk_counts
+        mapped_rows += chunk_mapped
+        totals = _tally_labels(totals, desk_codes, len(cached.labels))
+    return counts, mapped_rows, _label_rows(cached.labels, totals)
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file, for pd.read_csv."""
+
+    def __init__(self, f, start: int, end: int) -> None:
+        self._f = f
+        self._remaining = max(0, end - start)
+        f.seek(start)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        n = min(len(buf), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._f.read(n)
+        buf[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _count_range(
+    path: Path,
+    start: int,
+    end: int,
+    columns: List[str],
+    chunksize: int,
+    memo: Dict[Any, int],
+    cache_dir: Optional[Path] = None,
+) -> Tuple[np.ndarray, int, Dict[str, int]]:
+    """
+    Stream bytes [start, end) of a desk log and count it chunk by chunk.
+    start=0 reads the header from the file; otherwise `columns` names them.
+    Returns (count tensor, mapped rows, rows per raw desk label).
+
+    With a cache_dir, a whole-file read is answered from the columnar
+    cache when it's still valid, and (re)builds it while parsing otherwise.
+    """
+    counts = _empty_counts()
+    mapped_rows = 0
+    if end <= start:
+        return counts, mapped_rows, {}
+
+    writer = None
+    if cache_dir is not None and start == 0 and end == path.stat().st_size:
+        cached = log_cache.load(path, cache_dir)
+        if cached is not None:
+            metrics.cache_hit("log_cache")
+            return _count_cached(cached, chunksize, memo)
+        metrics.cache_miss("log_cache")
+        writer = log_cache.CacheWriter(path, cache_dir)
+
+    label_index: Dict[Any, int] = {}
+    totals = np.zeros(0, dtype=np.int64)
+    try:
+        with open(path, "rb") as f:
+            source = io.BufferedReader(_ByteRange(f, start, end))
+            header_args: Dict[str, Any] = {} if start == 0 else {"header": None, "names": columns}
+            reader = pd.read_csv(
+                source,
+                usecols=["desk", "date_time"],
+                dtype={"desk": "category", "date_time": "string"},
+                chunksize=chunksize,
+                **header_args,
+            )
+            for chunk in reader:
+                desk_codes, epoch = _parse_chunk(chunk, label_index)
+                if writer is not None:
+                    writer.append(desk_codes, epoch)
+
+                lib_of_label = _label_libraries(list(label_index), memo)
+                chunk_counts, chunk_mapped = _count_arrays(desk_codes, epoch, lib_of_label)
+                counts += chunk_counts
+                mapped_rows += chunk_mapped
+                totals = _tally_labels(totals, desk_codes, len(label_index))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if writer is not None:
+        writer.commit(list(label_index))
+
+    return counts, mapped_rows, _label_rows(list(label_index), totals)
+
+
+# ---------- Incremental training state ----------
+
+def _state_path() -> Path:
+    """Raw counts + watermark, persisted next to lookup.json."""
+    return Path(LOOKUP_PATH).with_name("lookup_state.json")
+
+
+def _prefix_digest(path: Path, length: int) -> str:
+    """
+    Fingerprint of a file's first `length` bytes – its first and last 4 KiB
+    – to notice it was replaced or rewritten up to the watermark.
+    """
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(min(length, 4096)))
+        if length > 4096:
+            f.seek(max(4096, length - 4096))
+            h.update(f.read(length - max(4096, length - 4096)))
+    return h.hexdigest()
+
+
+def _whole_lines_end(path: Path, size: int) -> int:
+    """Offset just past the last newline in the first `size` bytes (0 if none)."""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - (1 << 16))
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            pos = start
+    return 0
+
+
+def _mapping_digest() -> str:
+    """Counts are only reusable while the desk → library mapping is unchanged."""
+    payload = json.dumps([get_desk_matcher().digest, LIBRARIES])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _load_state() -> Dict[str, Dict[str, Any]]:
+    """
+    Per-file watermarks from the last run ({path: {offset, head, columns,
+    counts}}), or {} when there's nothing reusable (→ full rebuild).
+    """
+    state_file = _state_path()
+    if not state_file.exists():
+        return {}
+
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+    if (
+        state.get("mapping") != _mapping_digest()
+        or state.get("libraries") != LIBRARIES
+        or state.get("slot_minutes") != SLOT_MINUTES
+    ):
+        return {}
+
+    return state.get("files", {})
+
+
+def _watermark_valid(path: Path, size: int, watermark: Dict[str, Any]) -> bool:
+    """True if `path` only had rows appended since `watermark` was taken."""
+    offset = watermark["offset"]
+    return size >= offset and _prefix_digest(path, offset) == watermark["head"]
+
+
+def _save_state(files: Dict[str, Dict[str, Any]]) -> None:
+    state = {
+        "libraries": LIBRARIES,
+        "mapping": _mapping_digest(),
+        "slot_minutes": SLOT_MINUTES,
+        "files": files,
+    }
+    write_json_atomic(_state_path(), state)
+
+
+def write_json_atomic(path: Any, obj: Any, **dump_kwargs: Any) -> None:
+    """
+    Write JSON to a temp file in the same directory, fsync it, then rename
+    it over `path`, so readers see either the old file or the new one.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}-", suffix=path.suffix, dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ---------- Partitioned logs ----------
+
+# Worker processes for counting multiple log files in parallel
+TRAIN_WORKERS = os.cpu_count() or 1
+
+
+def resolve_log_files(logs: Any) -> List[Path]:
+    """
+    Desk log partitions for a path spec: a single CSV, a directory
+    (every *.csv in it) or a glob pattern like "data/logs/2024-*.csv".
+    """
+    spec = str(logs)
+    if any(ch in spec for ch in "*?["):
+        files = sorted(Path(p) for p in glob.glob(spec))
+    elif Path(spec).is_dir():
+        files = sorted(Path(spec).glob("*.csv"))
+    else:
+        files = [Path(spec)] if Path(spec).exists() else []
+
+    if not files:
+        raise FileNotFoundError(f"Desk logs file not found at {logs}")
+    return files
+
+
+def _count_partition(
+    job: Tuple[Path, int, int, int, List[str], int, Optional[Path]],
+) -> Tuple[np.ndarray, np.ndarray, int, Dict[str, int]]:
+    """
+    Process-pool entry point: count one byte range [start, end) of one log
+    file. Rows past `split` (an unterminated last line) are returned as
+    separate counts: they're in this model but not in the watermark, and
+    skipped if the line is too incomplete to parse.
+    """
+    path, start, split, end, columns, chunksize, cache_dir = job
+    memo: Dict[Any, int] = {}
+    counts, mapped_rows, labels = _count_range(path, start, split, columns, chunksize, memo, cache_dir)
+    try:
+        tail, tail_mapped, tail_labels = _count_range(path, split, end, columns, chunksize, memo)
+    except pd.errors.ParserError:
+        tail, tail_mapped, tail_labels = _empty_counts(), 0, {}
+    for label, rows in tail_labels.items():
+        labels[label] = labels.get(label, 0) + rows
+    return counts, tail, mapped_rows + tail_mapped, labels
+
+
+def _log_cache_dir() -> Path:
+    return Path(DATA_DIR) / "log_cache"
+
+
+def _read_columns(path: Path) -> List[str]:
+    required_cols = {"desk", "date_time"}
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    if not required_cols.issubset(columns):
+        raise ValueError(f"desk_logs.csv missing required columns: {required_cols}")
+    return columns
+
+
+def _normalized(counts: np.ndarray) -> Dict[str, float]:
+    """{bin: count / max_count} for the non-empty bins of one count row."""
+    max_count = counts.max()
+    scores = counts / max_count if max_count else np.zeros(len(counts))
+    return {
+        str(b): round(float(scores[b]), 4)
+        for b in np.flatnonzero(counts)
+    }
+
+
+def _peak_normalized(counts: np.ndarray, axes: Tuple[int, ...]) -> np.ndarray:
+    """counts / max over `axes` (0 where that max is 0)."""
+    peak = counts.max(axis=axes, keepdims=True)
+    return np.divide(counts, peak, out=np.zeros(counts.shape), where=peak > 0)
+
+
+def _shrink(scores: np.ndarray, counts: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """Blend toward `prior` with weight SMOOTHING_COUNT / (count + SMOOTHING_COUNT)."""
+    weight = counts / (counts + SMOOTHING_COUNT)
+    return weight * scores + (1.0 - weight) * prior
+
+
+def _smoothed_scores(counts: np.ndarray) -> np.ndarray:
+    """
+    Busy scores for [..., N_DAYS, slots] counts, same shape, NaN where the
+    3-hour bin has no observations at all.
+
+    Each level is normalized by its own peak; a slot is shrunk toward its
+    weekday × 3-hour bin, which is shrunk toward the all-days 3-hour bin,
+    so sparse slots borrow from coarser data instead of jumping around.
+    """
+    per_bin = counts.shape[-1] // N_BINS
+
+    day_bins = counts.reshape(*counts.shape[:-1], N_BINS, per_bin).sum(axis=-1)  # [..., day, bin]
+    bins = day_bins.sum(axis=-2)  # [..., bin]
+
+    bin_scores = _peak_normalized(bins, (-1,))
+    day_bin_scores = _shrink(_peak_normalized(day_bins, (-2, -1)), day_bins, bin_scores[..., None, :])
+    slot_scores = _shrink(
+        _peak_normalized(counts, (-2, -1)),
+        counts,
+        np.repeat(day_bin_scores, per_bin, axis=-1),
+    )
+
+    empty = np.repeat(bins == 0, per_bin, axis=-1)[..., None, :]
+    return np.where(empty, np.nan, slot_scores)
+
+
+def _bin_counts(counts: np.ndarray) -> np.ndarray:
+    """[library × N_DAYS × slots] counts collapsed to [library × 3-hour bin]."""
+    per_bin = counts.shape[-1] // N_BINS
+    return counts.sum(axis=1).reshape(len(counts), N_BINS, per_bin).sum(axis=-1)
+
+
+def _lookup_from_counts(counts: np.ndarray) -> Dict[str, Any]:
+    weekly_scores = _smoothed_scores(np.concatenate([counts, counts.sum(axis=0, keepdims=True)]))
+    counts = _bin_counts(counts)
+
+    per_library_lookup: Dict[str, Dict[str, float]] = {
+        lib: _normalized(counts[i])
+        for i, lib in enumerate(LIBRARIES)
+        if counts[i].any()
+    }
+
+    global_counts = counts.sum(axis=0)
+    global_lookup = {
+        str(b): (
+            round(float(global_counts[b] / global_counts.max()), 4)
+            if global_counts.max() else 0.0
+        )
+        for b in np.flatnonzero(global_counts)
+    }
+
+    return {
+        "version": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ"),
+        "per_library": per_library_lookup,
+        "global": global_lookup,
+        "weekly": {
+            "slot_minutes": SLOT_MINUTES,
+            "per_library": {
+                lib: weekly_rows(weekly_scores[i])
+                for i, lib in enumerate(LIBRARIES)
+                if counts[i].any()
+            },
+            "global": weekly_rows(weekly_scores[-1]),
+        },
+    }
+
+
+def train_model(
+    chunksize: Optional[int] = None,
+    incremental: bool = False,
+    logs: Any = None,
+    workers: Optional[int] = None,
+    cache: bool = True,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
     """
     Train a simple frequency-based model:
 
-      • Read desk_logs.csv
-      • Map 'desk' to our library names
+      • Stream each desk log in chunks of `chunksize` rows
+        (default TRAIN_CHUNK_ROWS), reading only 'desk' and 'date_time'
+      • Map 'desk' to our library names (once per distinct desk label,
+        via the compiled desk matcher); rows per unmapped label are
+        reported under training.unmapped for the rows read this run
       • Filter to TARGET_LIBRARIES
-      • Bucket timestamps into 3-hour bins
-      • For each library, count observations per bin and normalize:
+      • Bucket UTC timestamps into weekday × SLOT_MINUTES slots
+        (7 × 96 by default) with one bincount per chunk
+      • For each library, count observations per slot and normalize:
             count / max_count_for_that_library
+        shrinking sparse slots toward the weekday × 3-hour bin and then
+        the 3-hour bin (see _smoothed_scores)
       • Also build a global pattern across all libraries
+      • Keep the 3-hour per_library/global patterns for inspection and
+        older clients
+
+    `logs` (default DESK_LOGS_PATH) may be one CSV, a directory of CSVs or
+    a glob. Each file is counted in its own worker process (up to
+    `workers`, default TRAIN_WORKERS) and the per-file
+    [library × day × slot] count tensors are summed, so the result is identical to counting
+    everything in one process.
+
+    Each chunk is reduced to a small count matrix that is summed into the
+    running total, so peak memory depends on the chunk size rather than on
+    the size of the log files.
+
+    With cache=True, a full read of a file also writes its parsed columns
+    (desk code as int32, UTC epoch seconds as int64) to data/log_cache/.
+    Later retrains of an unchanged file count straight from those
+    memory-mapped arrays and skip CSV and timestamp parsing. The cache is
+    keyed by size, mtime and a sampled digest (see log_cache.py).
+
+    Per-file raw counts are saved to lookup_state.json together with the
+    byte offset read up to. With incremental=True only rows appended after
+    each file's watermark are counted; new files are counted in full and
+    deleted files drop out. A file that was truncated/replaced is recounted,
+    and a change to the desk mapping (DESK_TO_LIBRARY or DESK_MAPPING_PATH)
+    or SLOT_MINUTES forces a full rebuild. Appended rows
+    must be whole lines; the watermark is cut back to the last newline, so
+    a row still being written is counted again, whole, by the next run.
 
     Returns a lookup dict like:
 
         {
+          "version": "20251201T101500000000Z",
           "per_library": {
             "Koerner": { "0": 0.12, "1": 0.09, ... },
             "David Lam": { ... },
@@ -174,84 +731,140 @@ def train_model() -> Dict[str, Any]:
             "0": 0.24,
             "1": 0.31,
             ...
+          },
+          "weekly": {
+            "slot_minutes": 15,
+            "per_library": { "Koerner": [[0.1, 0.1, ...], ...], ... },
+            "global": [[...], ...]
+          },
+          "training": {
+            "mode": "full", "files": 1, "mapped_rows": 123456,
+            "unmapped": { "Mystery Desk": 42, ... }
           }
         }
 
-    This is also saved as data/lookup.json.
-    """
-    if not DESK_LOGS_PATH.exists():
-        raise FileNotFoundError(f"Desk logs file not found at {DESK_LOGS_PATH}")
-
-    print("📘 Loading desk logs…")
-    df = pd.read_csv(DESK_LOGS_PATH, low_memory=False)
-
-    required_cols = {"desk", "date_time"}
-    if not required_cols.issubset(df.columns):
-        raise ValueError(f"desk_logs.csv missing required columns: {required_cols}")
+    This is also saved as data/lookup.json, and as the dense binary
+    data/lookup.bin that prediction actually serves from. Every artifact
+    is written to a temp file and renamed into place, so a server reading
+    them mid-training sees the previous model, never a partial file.
 
-    # Map 'desk' to "library"
-    df["library"] = df["desk"].apply(normalize_desk_to_library)
+    `progress`, if given, is called with {"phase", "files_done",
+    "files_total", "fraction"} as training moves through counting,
+    smoothing and writing (see training_jobs.py).
+    """
+    def report(phase: str, files_done: int, fraction: float) -> None:
+        if progress is not None:
+            progress({
+                "phase": phase,
+                "files_done": files_done,
+                "files_total": len(jobs),
+                "fraction": round(fraction, 4),
+            })
+
+    files = resolve_log_files(DESK_LOGS_PATH if logs is None else logs)
+    chunksize = chunksize or TRAIN_CHUNK_ROWS
+    previous = _load_state() if incremental else {}
+
+    # Plan: which byte range of which file still needs counting
+    cache_dir = _log_cache_dir() if cache else None
+    jobs: List[Tuple[Path, int, int, int, List[str], int, Optional[Path]]] = []
+    file_state: Dict[str, Dict[str, Any]] = {}
+    reused = False
+
+    for path in files:
+        end = path.stat().st_size  # snapshot: rows appended while we train wait for next time
+        # The watermark stays on a line boundary: a row still being written
+        # is re-read whole next time instead of from its middle
+        split = _whole_lines_end(path, end)
+        watermark = previous.get(str(path))
+
+        if watermark is not None and _watermark_valid(path, end, watermark):
+            start, columns = watermark["offset"], watermark["columns"]
+            base = np.asarray(watermark["counts"], dtype=np.int64)
+            reused = True
+        else:
+            start, columns = 0, _read_columns(path)
+            base = _empty_counts()
 
-    # Keep only libraries we actually show on the map
-    df = df[df["library"].isin(TARGET_LIBRARIES)].copy()
+        file_state[str(path)] = {"offset": split, "columns": columns, "counts": base}
+        if end > start:
+            jobs.append((path, start, split, end, columns, chunksize, cache_dir))
 
-    if df.empty:
+    mode = "incremental" if reused else "full"
+    if mode == "full":
+        print(f"📘 Loading desk logs ({len(files)} file(s))…")
+    else:
+        print(f"📘 Loading desk logs appended since last run ({len(jobs)} file(s) changed)…")
+
+    # Counting is the bulk of the work: 0 → 90%, one step per file
+    def counted(partitions):
+        results = []
+        for result in partitions:
+            results.append(result)
+            report("counting", len(results), 0.9 * len(results) / max(len(jobs), 1))
+        return results
+
+    report("counting", 0, 0.0)
+    workers = min(workers or TRAIN_WORKERS, len(jobs))
+    with stage("train.count"):
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = counted(pool.map(_count_partition, jobs))
+        else:
+            results = counted(_count_partition(job) for job in jobs)
+
+    mapped_rows = 0
+    label_rows: Dict[str, int] = {}
+    tail_counts = _empty_counts()
+    for job, (new_counts, job_tail, job_mapped, job_labels) in zip(jobs, results):
+        file_state[str(job[0])]["counts"] = file_state[str(job[0])]["counts"] + new_counts
+        tail_counts += job_tail
+        mapped_rows += job_mapped
+        for label, rows in job_labels.items():
+            label_rows[label] = label_rows.get(label, 0) + rows
+    unmapped = get_desk_matcher().unmapped(label_rows)
+
+    if mode == "full" and mapped_rows == 0:
         raise ValueError("No matching study spots in the desk logs after mapping.")
 
-    # Parse timestamps; force UTC so we never get tz-mismatch later
-    df["dt"] = pd.to_datetime(df["date_time"], errors="coerce", utc=True)
-    df = df.dropna(subset=["dt"])
-
-    df["hour"] = df["dt"].dt.hour
-    df["bin"] = df["hour"].apply(get_bin_from_hour)  # 0–7
-
-    # ----- Per-library pattern -----
-    per_lib_counts = (
-        df.groupby(["library", "bin"])
-        .size()
-        .reset_index(name="count")
-    )
-
-    per_library_lookup: Dict[str, Dict[str, float]] = {}
-
-    for lib in per_lib_counts["library"].unique():
-        sub = per_lib_counts[per_lib_counts["library"] == lib]
-        max_count = sub["count"].max()
-        if max_count == 0:
-            continue
-
-        per_library_lookup[lib] = {}
-        for _, row in sub.iterrows():
-            b = int(row["bin"])
-            score = row["count"] / max_count
-            per_library_lookup[lib][str(b)] = round(float(score), 4)
-
-    # ----- Global pattern (all libraries combined) -----
-    global_counts = (
-        df.groupby("bin")
-        .size()
-        .reset_index(name="count")
-    )
-    max_global = global_counts["count"].max()
-    global_lookup: Dict[str, float] = {}
-
-    for _, row in global_counts.iterrows():
-        b = int(row["bin"])
-        score = row["count"] / max_global if max_global else 0.0
-        global_lookup[str(b)] = round(float(score), 4)
-
-    lookup: Dict[str, Any] = {
-        "per_library": per_library_lookup,
-        "global": global_lookup,
+    counts = tail_counts.copy()
+    for entry in file_state.values():
+        counts += entry["counts"]
+
+    report("smoothing", len(jobs), 0.9)
+    with stage("train.smooth"):
+        lookup = _lookup_from_counts(counts)
+    lookup["training"] = {
+        "mode": mode,
+        "files": len(files),
+        "mapped_rows": mapped_rows,
+        "unmapped": unmapped,
     }
 
-    DATA_DIR.mkdir(exist_ok=True)
-    with open(LOOKUP_PATH, "w", encoding="utf-8") as f:
-        json.dump(lookup, f, indent=2)
-
-    print("✅ Training complete.")
-    print(f"  Libraries modeled: {list(per_library_lookup.keys())}")
-    print(f"  Global bins: {len(global_lookup)}")
+    report("writing", len(jobs), 0.95)
+    with stage("train.write"):
+        DATA_DIR.mkdir(exist_ok=True)
+        write_json_atomic(LOOKUP_PATH, lookup, indent=2)
+
+        # Serving artifact; JSON above stays around for inspection. Written
+        # second so it is the newer file and LookupHolder swaps to it.
+        BusyModel.from_lookup(lookup).save(model_artifact_path())
+
+        # Written after lookup.json: if we die in between, the next incremental
+        # run just re-reads the same rows from the old watermarks.
+        for path_str, entry in file_state.items():
+            entry["head"] = _prefix_digest(Path(path_str), entry["offset"])
+            entry["counts"] = entry["counts"].tolist()
+        _save_state(file_state)
+
+    report("done", len(jobs), 1.0)
+    print(f"✅ Training complete ({mode}).")
+    print(f"  Model version: {lookup['version']}")
+    print(f"  Libraries modeled: {list(lookup['per_library'].keys())}")
+    print(f"  Global bins: {len(lookup['global'])}")
+    if unmapped:
+        top = ", ".join(f"{label!r} ({rows})" for label, rows in list(unmapped.items())[:5])
+        print(f"  Unmapped desks: {len(unmapped)} – add them to {Path(DESK_MAPPING_PATH).name}: {top}")
 
     return lookup
 
@@ -259,12 +872,25 @@ def train_model() -> Dict[str, Any]:
 # ---------- Feedback integration ----------
 
 FEEDBACK_WINDOW_DAYS = 14  # look back this many days for recent feedback
+FEEDBACK_MIN_WEIGHT = 0.05  # decayed weight below which feedback is ignored
 
 
 def get_feedback_score(spot: str, now: Optional[datetime] = None) -> Optional[float]:
     """
-    Look at feedback.csv and compute an average busy score for this spot
-    over the last FEEDBACK_WINDOW_DAYS, normalized into [0,1].
+    Recent busy score for this spot, normalized into [0,1].
+
+    Each report is weighted 2^(-age / FEEDBACK_HALF_LIFE_HOURS), so a report
+    from minutes ago outweighs one from last week; once the total weight
+    left is under FEEDBACK_MIN_WEIGHT (≈ one report ~4 half-lives old) the
+    spot has no recent feedback. The weight is taken at the start of
+    `now`'s UTC hour, so the score is the same anywhere in that hour – the
+    same hour the response cache and prediction grid key on. With
+    FEEDBACK_HALF_LIFE_HOURS=0 it's the plain average over the last
+    FEEDBACK_WINDOW_DAYS (whole UTC days).
+
+    feedback.csv is aggregated incrementally by feedback.FeedbackAggregator:
+    parsed once, then only newly appended rows are read. Feedback POSTed
+    to the API is added to the same aggregates as it is committed.
 
     Expected feedback.csv columns (lowercased after normalization):
 
@@ -274,163 +900,478 @@ def get_feedback_score(spot: str, now: Optional[datetime] = None) -> Optional[fl
 
     If file is missing, malformed, or no valid rows → returns None.
     """
-    if not FEEDBACK_PATH.exists():
-        return None
+    # Ensure 'now' is tz-aware UTC to avoid tz-mismatch errors
+    if now is None:
+        now = datetime.now(timezone.utc)
+    elif now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    else:
+        now = now.astimezone(timezone.utc)
 
     try:
-        df = pd.read_csv(FEEDBACK_PATH)
+        aggregator = feedback_aggregator()
+        if aggregator.half_life_hours > 0:
+            # One evaluation time per hour, like the cache key and grid cells
+            hour = now.replace(minute=0, second=0, microsecond=0)
+            avg, weight = aggregator.decayed(spot, hour)  # 1–10 scale
+            if weight < FEEDBACK_MIN_WEIGHT:
+                avg = None
+        else:
+            avg = aggregator.average(spot, now - timedelta(days=FEEDBACK_WINDOW_DAYS))
     except Exception:
         return None
 
-    if df.empty:
+    if avg is None:
         return None
 
-    # Normalize column names (lowercase, strip spaces)
-    df.columns = [c.strip().lower() for c in df.columns]
+    score_0_1 = max(0.0, min(1.0, avg / 10.0))  # normalize to 0–1
 
-    if not {"spot_id", "busy_rating"}.issubset(df.columns):
-        return None
+    return float(round(score_0_1, 4))
 
-    # Parse & time-filter if created_at exists
-    if "created_at" in df.columns:
-        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
-        df = df.dropna(subset=["created_at"])
-        if df.empty:
-            return None
 
-        # Ensure 'now' is tz-aware UTC to avoid tz-mismatch errors
-        if now is None:
-            now = datetime.now(timezone.utc)
-        else:
-            if now.tzinfo is None:
-                now = now.replace(tzinfo=timezone.utc)
-            else:
-                now = now.astimezone(timezone.utc)
-
-        cutoff = now - timedelta(days=FEEDBACK_WINDOW_DAYS)
-        df = df[df["created_at"] >= cutoff]
-        if df.empty:
-            return None
-
-    # Filter by spot/library name (case-insensitive)
-    df = df[df["spot_id"].astype(str).str.upper() == spot.upper()]
-    if df.empty:
-        return None
+def _feedback_log() -> FeedbackLog:
+    # Commits feed the feedback.csv aggregator; replayed into it once,
+    # reading only the day partitions recent enough to still count
+    since = (datetime.now(timezone.utc) - timedelta(days=FEEDBACK_WINDOW_DAYS)).date()
+    return get_feedback_log(FEEDBACK_LOG_PATH, get_aggregator(FEEDBACK_PATH), since=since)
 
-    # Convert busy_rating to numeric and drop NaN
-    df["busy_rating"] = pd.to_numeric(df["busy_rating"], errors="coerce")
-    df = df.dropna(subset=["busy_rating"])
-    if df.empty:
-        return None
 
-    avg = df["busy_rating"].mean()              # 1–10 scale
-    score_0_1 = max(0.0, min(1.0, avg / 10.0))  # normalize to 0–1
+def feedback_aggregator() -> FeedbackAggregator:
+    """Aggregates for feedback.csv plus everything in the feedback log."""
+    _feedback_log()
+    return get_aggregator(FEEDBACK_PATH)
 
-    return float(round(score_0_1, 4))
+
+def check_feedback_time(created: datetime, now: Optional[datetime] = None) -> datetime:
+    """
+    A client-supplied created_at as UTC (naive = UTC). ValueError if it's
+    more than FEEDBACK_MAX_SKEW_SECONDS in the future or older than
+    FEEDBACK_WINDOW_DAYS – a future report would never decay, an old one
+    can't count any more.
+    """
+    now = now or datetime.now(timezone.utc)
+    created = created.replace(tzinfo=timezone.utc) if created.tzinfo is None else created.astimezone(timezone.utc)
+    if created > now + timedelta(seconds=FEEDBACK_MAX_SKEW_SECONDS):
+        raise ValueError("created_at is in the future")
+    if created < now - timedelta(days=FEEDBACK_WINDOW_DAYS):
+        raise ValueError(f"created_at is older than {FEEDBACK_WINDOW_DAYS} days")
+    return created
+
+
+def _feedback_records(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    records = []
+    for item in items:
+        created = item.get("created_at") or now
+        if isinstance(created, str):
+            created = datetime.fromisoformat(created)
+        created = created.replace(tzinfo=timezone.utc) if created.tzinfo is None else created.astimezone(timezone.utc)
+        records.append({**item, "created_at": created.isoformat()})
+    return records
+
+
+def submit_feedback(items: List[Dict[str, Any]]) -> int:
+    """
+    Durably log feedback ({spot_id, busy_rating, created_at?, ...}) and
+    count it into the aggregates. Returns once it is fsynced.
+    """
+    records = _feedback_records(items)
+    _feedback_log().append(records)
+    return len(records)
+
+
+async def submit_feedback_async(items: List[Dict[str, Any]]) -> int:
+    """submit_feedback() that awaits the group commit instead of blocking."""
+    records = _feedback_records(items)
+    # First use replays the log from disk
+    log = await asyncio.to_thread(_feedback_log)
+    await log.append_async(records)
+    return len(records)
 
 
 # ---------- Lookup load ----------
 
-def load_lookup() -> Dict[str, Any]:
-    if not LOOKUP_PATH.exists():
-        raise FileNotFoundError("lookup.json not found. Call /train first.")
-    with open(LOOKUP_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+def model_artifact_path() -> Path:
+    """Binary (memory-mappable) model written next to lookup.json."""
+    return Path(LOOKUP_PATH).with_suffix(".bin")
+
+
+class LookupHolder:
+    """
+    Keeps the trained model in memory so /predict doesn't re-read it on
+    every call.
+
+    Serves lookup.bin (memory-mapped, see busy_model.py) when it is at
+    least as new as lookup.json, otherwise parses lookup.json. Each get()
+    does a stat() per file; when (mtime, size) changes the new model is
+    loaded and swapped in with one reference assignment. Only one thread
+    reloads at a time; the others keep serving the previous model instead
+    of waiting for it.
+    """
+
+    def __init__(self) -> None:
+        self._reload_lock = threading.Lock()
+        # (json path, stamp, model) – replaced as a whole, never mutated
+        self._entry: Optional[Tuple[str, Tuple[Any, ...], BusyModel]] = None
+
+    @staticmethod
+    def _stamp(path: Path) -> Tuple[Any, ...]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError("lookup.json not found. Call /train first.")
+
+        try:
+            bst = path.with_suffix(".bin").stat()
+        except FileNotFoundError:
+            bst = None
+
+        if bst is not None and bst.st_mtime_ns >= st.st_mtime_ns:
+            return ("bin", bst.st_mtime_ns, bst.st_size)
+        return ("json", st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _load(path: Path, stamp: Tuple[Any, ...]) -> BusyModel:
+        if stamp[0] == "bin":
+            model = BusyModel.load(path.with_suffix(".bin"))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                model = BusyModel.from_lookup(json.load(f))
+
+        if not model.version:
+            model.version = f"mtime-{stamp[1]}"
+        return model
+
+    def get(self, path: Any) -> BusyModel:
+        path = Path(path)
+        stamp = self._stamp(path)
+
+        entry = self._entry
+        if entry is not None and entry[0] == str(path) and entry[1] == stamp:
+            metrics.cache_hit("lookup")
+            return entry[2]
+
+        metrics.cache_miss("lookup")
+        # A stale model for the same file can keep serving while another
+        # thread reloads; with nothing to serve we have to wait.
+        have_fallback = entry is not None and entry[0] == str(path)
+        if not self._reload_lock.acquire(blocking=not have_fallback):
+            return entry[2]
+
+        try:
+            entry = self._entry
+            if entry is not None and entry[0] == str(path) and entry[1] == stamp:
+                return entry[2]
+
+            try:
+                model = self._load(path, stamp)
+            except ValueError:
+                # Trainer is mid-write; keep the previous model until it's done
+                if have_fallback:
+                    return self._entry[2]
+                raise
+
+            self._entry = (str(path), stamp, model)
+            return model
+        finally:
+            self._reload_lock.release()
+
+    @property
+    def version(self) -> Optional[str]:
+        entry = self._entry
+        return entry[2].version if entry is not None else None
+
+
+_lookup_holder = LookupHolder()
+
+
+def load_lookup() -> BusyModel:
+    return _lookup_holder.get(LOOKUP_PATH)
+
+
+def model_version() -> Optional[str]:
+    """Version of the model currently held in memory (None before first load)."""
+    return _lookup_holder.version
 
 
 # ---------- Weather adjustment ----------
 
-def apply_weather_adjustment(
-    base_score: float,
+def _to_utc(dt: Optional[datetime]) -> Tuple[Optional[datetime], Optional[str]]:
+    # Ensure ISO string in UTC
+    if dt is None:
+        return None, None
+    if dt.tzinfo is None:
+        dt_utc = dt.replace(tzinfo=timezone.utc)
+    else:
+        dt_utc = dt.astimezone(timezone.utc)
+    return dt_utc, dt_utc.isoformat()
+
+
+def _fetch_weather(
     dt: Optional[datetime],
-) -> Tuple[float, Dict[str, Any]]:
+) -> Tuple[Optional[datetime], Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Call get_weather() for dt (as a UTC ISO string).
+    Returns (dt_utc, weather, error) – weather is None when the call failed.
+    """
+    dt_utc, timestamp_iso = _to_utc(dt)
+    with stage("predict.weather"):
+        try:
+            return dt_utc, get_weather(timestamp_iso), None
+        except Exception as exc:
+            return dt_utc, None, str(exc)
+
+
+async def _fetch_weather_async(
+    dt: Optional[datetime],
+) -> Tuple[Optional[datetime], Optional[Dict[str, Any]], Optional[str]]:
+    """_fetch_weather() via get_weather_async(); never blocks the event loop."""
+    dt_utc, timestamp_iso = _to_utc(dt)
+    with stage("predict.weather"):
+        try:
+            return dt_utc, await get_weather_async(timestamp_iso), None
+        except Exception as exc:
+            return dt_utc, None, str(exc)
+
+
+def weather_factors(weathers: List[Dict[str, Any]]) -> np.ndarray:
     """
-    Call get_weather() and adjust the base_score based on:
+    weather_factor() element-wise: one additive adjustment in [-0.35, 0.35]
+    per weather dict, from:
       • precipitation
       • temperature
       • cloud cover
       • wind speed
-
-    Returns (adjusted_score, weather_details_dict).
+    Missing values (None) don't contribute.
     """
-    # Ensure ISO string in UTC
-    if dt is not None:
-        if dt.tzinfo is None:
-            dt_utc = dt.replace(tzinfo=timezone.utc)
-        else:
-            dt_utc = dt.astimezone(timezone.utc)
-        timestamp_iso = dt_utc.isoformat()
-    else:
-        dt_utc = None
-        timestamp_iso = None
-
-    try:
-        weather = get_weather(timestamp_iso)
-    except Exception as exc:
-        # If weather API fails, just return base score
-        return base_score, {
-            "error": str(exc),
-            "weather_factor": 0.0,
-            "before_weather": round(float(base_score), 4),
-            "after_weather": round(float(base_score), 4),
-        }
+    def column(name: str) -> np.ndarray:
+        return np.array([w.get(name) for w in weathers], dtype=np.float64)  # None → NaN
 
-    wf = 0.0
+    temp = column("temp")
+    precip = column("precip")
+    cloud = column("cloud")
+    wind = column("wind")
 
-    temp = weather.get("temp")
-    precip = weather.get("precip")
-    cloud = weather.get("cloud")
-    wind = weather.get("wind")
+    wf = np.zeros(len(weathers))
 
     # Simple heuristics – tune these later if you like
-    if precip is not None:
-        # Light rain → more people study indoors
-        if precip > 0.1:
-            wf += 0.15
-        # Heavy rain → even more indoors
-        if precip > 2.0:
-            wf += 0.25
-
-    if temp is not None:
-        # Hot → fewer indoors
-        if temp >= 23:
-            wf -= 0.10
-        # Cold → more indoors
-        elif temp <= 5:
-            wf += 0.10
-
-    if cloud is not None:
-        # More cloud → slightly more inside
-        wf += (cloud / 100.0) * 0.05
-
-    if wind is not None and wind > 20:
-        # Strong wind → slightly more inside
-        wf += 0.05
+    # Light rain → more people study indoors
+    wf += np.where(precip > 0.1, 0.15, 0.0)
+    # Heavy rain → even more indoors
+    wf += np.where(precip > 2.0, 0.25, 0.0)
+
+    # Hot → fewer indoors, cold → more indoors
+    wf += np.where(temp >= 23, -0.10, np.where(temp <= 5, 0.10, 0.0))
+
+    # More cloud → slightly more inside
+    wf += np.where(np.isnan(cloud), 0.0, (cloud / 100.0) * 0.05)
+
+    # Strong wind → slightly more inside
+    wf += np.where(wind > 20, 0.05, 0.0)
 
     # Clamp the weather factor so it can't break everything
-    wf = max(-0.35, min(0.35, wf))
+    return np.clip(wf, -0.35, 0.35)
+
+
+def weather_factor(weather: Dict[str, Any]) -> float:
+    """Additive busy-score adjustment in [-0.35, 0.35] for one weather dict."""
+    return float(weather_factors([weather])[0])
 
-    # Apply and clamp final score into [0.01, 1.0]
-    adjusted = base_score + wf
-    adjusted = max(0.01, min(1.0, adjusted))
 
-    weather_details = {
+def _weather_details(
+    weather: Optional[Dict[str, Any]],
+    error: Optional[str],
+    wf: float,
+    before: float,
+    after: float,
+    dt_utc: Optional[datetime],
+) -> Dict[str, Any]:
+    if error is not None:
+        return {
+            "error": error,
+            "weather_factor": 0.0,
+            "before_weather": round(float(before), 4),
+            "after_weather": round(float(after), 4),
+        }
+
+    return {
         "raw": weather,
         "weather_factor": round(wf, 4),
-        "before_weather": round(float(base_score), 4),
-        "after_weather": round(float(adjusted), 4),
+        "before_weather": round(float(before), 4),
+        "after_weather": round(float(after), 4),
         "timestamp_utc": dt_utc.isoformat() if dt_utc is not None else None,
     }
 
-    return adjusted, weather_details
+
+def apply_weather_adjustment(
+    base_score: float,
+    dt: Optional[datetime],
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    Call get_weather() and adjust the base_score by weather_factor().
+
+    Returns (adjusted_score, weather_details_dict).
+    """
+    dt_utc, weather, error = _fetch_weather(dt)
+
+    if weather is None:
+        # If weather API fails, just return base score
+        return base_score, _weather_details(None, error, 0.0, base_score, base_score, dt_utc)
+
+    wf = weather_factor(weather)
+
+    # Apply and clamp final score into [0.01, 1.0]
+    adjusted = base_score + wf
+    adjusted = max(0.01, min(1.0, adjusted))
+
+    return adjusted, _weather_details(weather, None, wf, base_score, adjusted, dt_utc)
 
 
 # ---------- Main Prediction ----------
 
+def known_spots() -> List[str]:
+    """Every spot we can score (the libraries shown on the map)."""
+    return sorted(TARGET_LIBRARIES)
+
+
+def parse_timestamp(timestamp: Optional[str]) -> datetime:
+    """Request timestamp as given (naive or with offset); now (UTC) if missing/invalid."""
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except ValueError:
+            return datetime.utcnow()
+    return datetime.utcnow()
+
+
+def _blend_batch(spots: List[str], dt: datetime) -> Dict[str, Any]:
+    """Model + feedback stage for a batch: everything before weather."""
+    with stage("predict.load_lookup"):
+        model = as_busy_model(load_lookup())
+
+    bin_id = get_bin_from_hour(dt.hour)
+    weekday, minute = dt.weekday(), dt.hour * 60 + dt.minute
+
+    # Per-library score, else global pattern, else 0.5 (mid-busy)
+    with stage("predict.model"):
+        model_scores, per_library_hit = model.scores(spots, weekday, minute)
+
+    with stage("predict.feedback"):
+        feedback_scores = [get_feedback_score(spot, now=dt) for spot in spots]
+    has_feedback = np.array([f is not None for f in feedback_scores])
+    feedback_arr = np.array([f if f is not None else 0.0 for f in feedback_scores])
+
+    blended = np.where(has_feedback, 0.75 * model_scores + 0.25 * feedback_arr, model_scores)
+    blended = np.clip(blended, 0.0, 1.0)
+
+    return {
+        "version": model.version,
+        "bin": bin_id,
+        "weekday": weekday,
+        "slot": model.cell(weekday, minute)[1],
+        "model_scores": model_scores,
+        "per_library_hit": per_library_hit,
+        "feedback_scores": feedback_scores,
+        "has_feedback": has_feedback,
+        "blended": blended,
+    }
+
+
+def _finish_batch(
+    spots: List[str],
+    dt: datetime,
+    blend: Dict[str, Any],
+    fetched: Tuple[Optional[datetime], Optional[Dict[str, Any]], Optional[str]],
+) -> List[Dict[str, Any]]:
+    """Weather stage for a batch, then one response dict per spot."""
+    dt_utc, weather, error = fetched
+    blended = blend["blended"]
+
+    if weather is None:
+        # If weather API fails, just use the blended score
+        wf = 0.0
+        final = blended
+    else:
+        wf = weather_factor(weather)
+        # Apply and clamp final score into [0.01, 1.0]
+        final = np.clip(blended + wf, 0.01, 1.0)
+
+    model_scores = blend["model_scores"]
+    results = []
+    for i, spot in enumerate(spots):
+        results.append({
+            "spot": spot,
+            "timestamp_used": dt.isoformat(),
+            "bin": blend["bin"],
+            "weekday": blend["weekday"],
+            "slot": blend["slot"],
+            "model_score": round(float(model_scores[i]), 4),
+            "model_source": "per_library" if blend["per_library_hit"][i] else "global_fallback",
+            "model_version": blend["version"],
+            "feedback_score": blend["feedback_scores"][i],
+            "blend": (
+                "blend_model_0.75_feedback_0.25"
+                if blend["has_feedback"][i]
+                else "no_feedback_model_only"
+            ),
+            "score_before_weather": round(float(blended[i]), 4),
+            "weather": _weather_details(weather, error, wf, blended[i], final[i], dt_utc),
+            "busy_score": round(float(final[i]), 4),
+        })
+
+    return results
+
+
+def predict_busy_scores(
+    spots: Optional[List[str]] = None,
+    timestamp: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Batch version of predict_busy_score(): the lookup, time bin and weather
+    are resolved once and the blend is computed for all spots as arrays.
+    spots=None scores every known spot.
+
+    Returns one predict_busy_score()-shaped dict per spot, in input order.
+    """
+    if spots is None:
+        spots = known_spots()
+    if not spots:
+        return []
+
+    dt = parse_timestamp(timestamp)
+    blend = _blend_batch(spots, dt)
+    fetched = _fetch_weather(dt)
+    with stage("predict.finish"):
+        return _finish_batch(spots, dt, blend, fetched)
+
+
+async def predict_busy_scores_async(
+    spots: Optional[List[str]] = None,
+    timestamp: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    predict_busy_scores() for async callers: the weather stage awaits the
+    pooled HTTP client, so a slow upstream doesn't pin a worker thread,
+    and the file-backed stages (model load, feedback aggregates) run in a
+    worker thread so they don't stall the event loop.
+    """
+    if spots is None:
+        spots = await asyncio.to_thread(known_spots)
+    if not spots:
+        return []
+
+    dt = parse_timestamp(timestamp)
+    blend = await asyncio.to_thread(_blend_batch, spots, dt)
+    fetched = await _fetch_weather_async(dt)
+    with stage("predict.finish"):
+        return _finish_batch(spots, dt, blend, fetched)
+
+
 def predict_busy_score(spot: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
     """
     Combine:
-      1. 3-hour bin pattern from desk logs (per library or global fallback)
+      1. Weekday × time-slot pattern from desk logs (per library or global
+         fallback)
       2. Recent feedback (if available via feedback.csv)
       3. Weather adjustment via get_weather()
 
@@ -440,8 +1381,11 @@ def predict_busy_score(spot: str, timestamp: Optional[str] = None) -> Dict[str,
         "spot": "Koerner",
         "timestamp_used": "...",
         "bin": 4,
+        "weekday": 0,
+        "slot": 52,
         "model_score": 0.73,
         "model_source": "per_library",
+        "model_version": "20251201T101500000000Z",
         "feedback_score": 0.6,
         "blend": "blend_model_0.75_feedback_0.25",
         "score_before_weather": 0.698,
@@ -449,52 +1393,194 @@ def predict_busy_score(spot: str, timestamp: Optional[str] = None) -> Dict[str,
         "busy_score": 0.82
       }
     """
-    lookup = load_lookup()
+    return predict_busy_scores([spot], timestamp)[0]
 
-    if timestamp:
-        try:
-            dt = datetime.fromisoformat(timestamp)
-        except ValueError:
-            dt = datetime.utcnow()
-    else:
-        dt = datetime.utcnow()
 
-    bin_id = get_bin_from_hour(dt.hour)
-    bin_key = str(bin_id)
+async def predict_busy_score_async(spot: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """Async predict_busy_score(); same result, non-blocking weather call."""
+    return (await predict_busy_scores_async([spot], timestamp))[0]
 
-    per_library = lookup.get("per_library", {})
-    global_lookup = lookup.get("global", {})
 
-    lib_bins = per_library.get(spot)
-    if lib_bins and bin_key in lib_bins:
-        model_score = float(lib_bins[bin_key])
-        model_source = "per_library"
-    else:
-        model_score = float(global_lookup.get(bin_key, 0.5))  # fallback mid-busy
-        model_source = "global_fallback"
+# ---------- Timeline ----------
+
+# Upper bound on points per timeline (a week at 5-minute steps)
+TIMELINE_MAX_POINTS = 7 * 24 * 12
+
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+
+
+def _parse_step(step: Optional[str]) -> int:
+    """Timeline step in seconds: minutes ("15") or a duration ("15min", "1h")."""
+    if not step:
+        return SLOT_MINUTES * 60
+    try:
+        seconds = int(step) * 60 if step.strip().isdigit() else pd.Timedelta(step).total_seconds()
+    except ValueError:
+        raise ValueError(f"Invalid step: {step!r}")
+    if seconds < 60:
+        raise ValueError("step must be at least one minute")
+    return int(seconds)
+
+
+def _timeline_grid(start: Optional[str], end: Optional[str], step: Optional[str]) -> Dict[str, Any]:
+    """
+    The timeline's points as arrays. Weekday/minute/bin come from the
+    wall-clock time of each point (as predict_busy_score() does for one
+    timestamp); weather hours are keyed in UTC.
+    """
+    t0 = parse_timestamp(start)
+    t1 = parse_timestamp(end) if end else t0 + timedelta(hours=24)
+    if (t0.tzinfo is None) != (t1.tzinfo is None):
+        raise ValueError("start and end must both have a UTC offset, or neither")
+    if t1 < t0:
+        raise ValueError("end must not be before start")
+
+    step_seconds = _parse_step(step)
+    n = int((t1 - t0).total_seconds() // step_seconds) + 1
+    if n > TIMELINE_MAX_POINTS:
+        raise ValueError(f"Timeline has {n} points; the limit is {TIMELINE_MAX_POINTS}")
+
+    offsets = np.arange(n, dtype=np.int64) * step_seconds
+    local = int((t0.replace(tzinfo=None) - _EPOCH_NAIVE).total_seconds()) + offsets
+    utc_offset = t0.utcoffset() or timedelta(0)
+    utc_hours = (local - int(utc_offset.total_seconds())) // 3600 * 3600
+
+    minutes = (local % 86400) // 60
+    return {
+        "start": t0,
+        "end": t1,
+        "step_seconds": step_seconds,
+        "timestamps": [(t0 + timedelta(seconds=int(o))).isoformat() for o in offsets],
+        "weekdays": (local // 86400 + 3) % 7,  # 1970-01-01 was a Thursday
+        "minutes": minutes,
+        "bins": minutes // 180,
+        "hours": np.datetime_as_string(utc_hours.astype("datetime64[s]"), unit="m").tolist(),
+    }
+
 
-    feedback_score = get_feedback_score(spot, now=dt)
+def _blend_timeline(spot: str, grid: Dict[str, Any]) -> Dict[str, Any]:
+    """Model + feedback stage for a timeline: everything before weather."""
+    model = as_busy_model(load_lookup())
+    model_scores, per_library_hit = model.series(spot, grid["weekdays"], grid["minutes"])
 
-    if feedback_score is None:
-        blended_score = model_score
-        blend_info = "no_feedback_model_only"
+    # One feedback aggregate for the whole range, windowed from its start
+    feedback = get_feedback_score(spot, now=grid["start"])
+    if feedback is not None:
+        blended = np.clip(0.75 * model_scores + 0.25 * feedback, 0.0, 1.0)
     else:
-        blended_score = 0.75 * model_score + 0.25 * feedback_score
-        blend_info = "blend_model_0.75_feedback_0.25"
+        blended = np.clip(model_scores, 0.0, 1.0)
+
+    return {
+        "version": model.version,
+        "slots": model.cell(grid["weekdays"], grid["minutes"])[1],
+        "model_scores": model_scores,
+        "per_library_hit": per_library_hit,
+        "feedback_score": feedback,
+        "blended": blended,
+    }
+
+
+def _fetch_weather_hours(hours: List[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(weather by hour key, error) – weather is None when the lookup failed."""
+    try:
+        return get_weather_hours(hours), None
+    except Exception as exc:
+        return None, str(exc)
 
-    blended_score = max(0.0, min(1.0, blended_score))
 
-    final_score, weather_details = apply_weather_adjustment(blended_score, dt)
+async def _fetch_weather_hours_async(hours: List[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        return await get_weather_hours_async(hours), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+def _finish_timeline(
+    spot: str,
+    grid: Dict[str, Any],
+    blend: Dict[str, Any],
+    fetched: Tuple[Optional[Dict[str, Any]], Optional[str]],
+) -> Dict[str, Any]:
+    """Weather stage for a timeline, applied to the whole series at once."""
+    weather_by_hour, error = fetched
+    blended = blend["blended"]
+
+    if weather_by_hour is None:
+        # If weather lookup fails, just use the blended scores
+        wf = np.zeros(len(blended))
+        final = blended
+    else:
+        wf = weather_factors([weather_by_hour[h] for h in grid["hours"]])
+        # Apply and clamp final score into [0.01, 1.0]
+        final = np.clip(blended + wf, 0.01, 1.0)
+
+    model_scores = blend["model_scores"]
+    points = []
+    for i, timestamp in enumerate(grid["timestamps"]):
+        points.append({
+            "timestamp": timestamp,
+            "bin": int(grid["bins"][i]),
+            "weekday": int(grid["weekdays"][i]),
+            "slot": int(blend["slots"][i]),
+            "model_score": round(float(model_scores[i]), 4),
+            "model_source": "per_library" if blend["per_library_hit"][i] else "global_fallback",
+            "score_before_weather": round(float(blended[i]), 4),
+            "weather_factor": round(float(wf[i]), 4),
+            "busy_score": round(float(final[i]), 4),
+        })
 
     return {
         "spot": spot,
-        "timestamp_used": dt.isoformat(),
-        "bin": bin_id,
-        "model_score": round(model_score, 4),
-        "model_source": model_source,
-        "feedback_score": feedback_score,
-        "blend": blend_info,
-        "score_before_weather": round(blended_score, 4),
-        "weather": weather_details,
-        "busy_score": round(final_score, 4),
+        "start": grid["start"].isoformat(),
+        "end": grid["end"].isoformat(),
+        "step_minutes": grid["step_seconds"] / 60,
+        "model_version": blend["version"],
+        "feedback_score": blend["feedback_score"],
+        "blend": (
+            "blend_model_0.75_feedback_0.25"
+            if blend["feedback_score"] is not None
+            else "no_feedback_model_only"
+        ),
+        "weather_error": error,
+        "points": points,
     }
+
+
+def predict_timeline(
+    spot: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    step: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Busy scores for `spot` at every `step` from `start` to `end` inclusive
+    (defaults: now, start + 24h, SLOT_MINUTES). `step` is minutes ("15")
+    or a duration string ("30min", "1h").
+
+    The series is computed as arrays: one model slice, one feedback
+    aggregate (windowed from `start`) and one weather lookup for all the
+    hours covered, with weather_factors() applied element-wise. Each
+    point matches predict_busy_score() at that timestamp, except that
+    feedback isn't re-windowed per point.
+
+    Raises ValueError for a bad range/step or more than
+    TIMELINE_MAX_POINTS points.
+    """
+    grid = _timeline_grid(start, end, step)
+    blend = _blend_timeline(spot, grid)
+    return _finish_timeline(spot, grid, blend, _fetch_weather_hours(grid["hours"]))
+
+
+async def predict_timeline_async(
+    spot: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    step: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    predict_timeline() with the weather stage awaited on the pooled client
+    and the model/feedback stages in a worker thread.
+    """
+    grid = _timeline_grid(start, end, step)
+    blend = await asyncio.to_thread(_blend_timeline, spot, grid)
+    return _finish_timeline(spot, grid, blend, await _fetch_weather_hours_async(grid["hours"]))
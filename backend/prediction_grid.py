@@ -0,0 +1,167 @@
+"""
+Spec (prediction_grid.py):
+
+- PredictionGrid(hours):
+    Precomputed predict_busy_score() results for every known spot over the
+    next `hours` (default GRID_HOURS), one cell per step, held in memory.
+    The step divides both the served model's slot and the weather hour,
+    and feedback decay is evaluated at the start of the UTC hour, so a
+    cell holds exactly what a live prediction anywhere in that step
+    would return.
+
+- refresh(force=False):
+    Rebuilds the grid when its inputs changed: model version, feedback
+    aggregates, weather series, or the current hour moved on. Meant to
+    run off the event loop (see main.py's scheduler). Returns True if it
+    rebuilt.
+
+- lookup(spots, timestamp, inputs=None):
+    Cached predictions (with "computed_at") for UTC/naive timestamps
+    inside the grid, or None → compute live. Also None when the grid was
+    built from other inputs than `inputs` (default: current_inputs()), so
+    e.g. feedback committed since the last refresh is never hidden by it.
+
+- current_inputs():
+    (model version, feedback aggregate version, weather token) right now;
+    cheap (stats only, never goes upstream).
+
+- mark_stale():
+    Stop serving until the next refresh (e.g. right after /train).
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import model
+import weather
+from busy_model import as_busy_model
+
+# How far ahead predictions are materialized
+GRID_HOURS = 48
+
+# How often the scheduler checks whether the grid's inputs changed
+GRID_REFRESH_SECONDS = float(os.getenv("GRID_REFRESH_SECONDS", "30"))
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(dt: datetime) -> int:
+    return int((dt - _EPOCH).total_seconds())
+
+
+class PredictionGrid:
+    def __init__(self, hours: int = GRID_HOURS) -> None:
+        self.hours = hours
+        self._refresh_lock = threading.Lock()
+        # (inputs, start epoch s, step s, {spot: [prediction]}, computed_at)
+        # – replaced as a whole, never mutated
+        self._entry: Optional[Tuple[Tuple[Any, ...], int, int, Dict[str, List[Dict[str, Any]]], str]] = None
+        self._stale = False
+        self._stale_marks = 0
+
+    # ----- building -----
+
+    @staticmethod
+    def _inputs(start: datetime) -> Tuple[Any, ...]:
+        return (
+            as_busy_model(model.load_lookup()).version,
+            model.feedback_aggregator().version(),
+            weather.weather_version(),
+            start,
+        )
+
+    @staticmethod
+    def current_inputs() -> Tuple[Any, ...]:
+        return (
+            as_busy_model(model.load_lookup()).version,
+            model.feedback_aggregator().version(),
+            weather.weather_token(),
+        )
+
+    def refresh(self, force: bool = False) -> bool:
+        with self._refresh_lock:
+            marks = self._stale_marks
+            start = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+            inputs = self._inputs(start)
+
+            entry = self._entry
+            if not force and not self._stale and entry is not None and entry[0] == inputs:
+                return False
+
+            # Cells must not straddle a model slot or a weather hour
+            step = math.gcd(model.load_lookup().slot_minutes, 60) * 60
+            spots = model.known_spots()
+            cells: Dict[str, List[Dict[str, Any]]] = {spot: [] for spot in spots}
+
+            for i in range(self.hours * 3600 // step):
+                dt = start + timedelta(seconds=i * step)
+                for prediction in model.predict_busy_scores(spots, dt.isoformat()):
+                    cells[prediction["spot"]].append(prediction)
+
+            computed_at = datetime.now(timezone.utc).isoformat()
+            self._entry = (inputs, _epoch_seconds(start), step, cells, computed_at)
+            # Marked stale mid-build: the new grid may already be outdated
+            self._stale = self._stale_marks != marks
+            return True
+
+    def mark_stale(self) -> None:
+        self._stale_marks += 1
+        self._stale = True
+
+    # ----- serving -----
+
+    def lookup(
+        self,
+        spots: List[str],
+        timestamp: Optional[str] = None,
+        inputs: Optional[Tuple[Any, ...]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entry
+        if entry is None or self._stale:
+            return None
+        if entry[0][:3] != (self.current_inputs() if inputs is None else tuple(inputs)):
+            # Built before the model, feedback or weather last changed
+            return None
+
+        dt = model.parse_timestamp(timestamp)
+        if dt.tzinfo is not None:
+            # Cells are keyed by UTC wall-clock time, which is what the
+            # model sees only for naive or UTC timestamps
+            if dt.utcoffset() != timedelta(0):
+                return None
+            local = dt.replace(tzinfo=None)
+        else:
+            local = dt
+
+        _, start, step, cells, computed_at = entry
+        index = (_epoch_seconds(local) - start) // step
+        if index < 0:
+            return None
+
+        # Same timestamps a live prediction would report
+        stamps = {"timestamp_used": dt.isoformat(), "computed_at": computed_at}
+        timestamp_utc = local.replace(tzinfo=timezone.utc).isoformat()
+
+        results = []
+        for spot in spots:
+            row = cells.get(spot)
+            if row is None or index >= len(row):
+                return None
+            cell = row[index]
+            details = cell["weather"]
+            if "timestamp_utc" in details:
+                details = {**details, "timestamp_utc": timestamp_utc}
+            results.append({**cell, **stamps, "weather": details})
+        return results
+
+
+_grid = PredictionGrid()
+
+
+def get_grid() -> PredictionGrid:
+    return _grid
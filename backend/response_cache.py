@@ -0,0 +1,178 @@
+"""
+Spec (response_cache.py):
+
+- prepare(route, spots, timestamp):
+    Cache key + validators for a /predict-style request. A prediction is
+    fixed by the served model version, the feedback aggregate version,
+    the weather token and the request's cell (model weekday/slot in the
+    request's wall-clock time + UTC weather hour, which also fixes the
+    feedback window and the time feedback decay is evaluated at).
+    Returns Prepared(key, etag, headers, dt), or None when the model has
+    no version to key on.
+      • etag: weak (W/"…") – equivalent responses differ only in the
+        echoed timestamp_used
+      • Cache-Control: max-age RESPONSE_MAX_AGE_SECONDS, cut to the end of
+        the current cell for requests about "now"
+      • inputs: the (model, feedback, weather) part of the key – a grid
+        result or live computation is only stored/validated under this key
+        if it was built from exactly these inputs
+
+- matches(if_none_match, etag):
+    If-None-Match check (weak comparison, lists and "*").
+
+- cacheable(predictions):
+    False when the weather call failed for them – the weather token
+    doesn't change on a failure, so such a response must not stick.
+
+- ResponseCache(max_entries):
+    Bounded LRU of prediction lists by key (RESPONSE_CACHE_ENTRIES).
+    get() restamps timestamp_used/weather.timestamp_utc for the request,
+    like the prediction grid. Hits, misses and evictions are counted in
+    /metrics under cache="response".
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import metrics
+import model
+import weather
+from busy_model import as_busy_model
+
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "4096"))
+
+# Longest a client may reuse a response without revalidating
+RESPONSE_MAX_AGE_SECONDS = int(os.getenv("RESPONSE_MAX_AGE_SECONDS", "60"))
+
+
+class Prepared(NamedTuple):
+    key: Tuple[Any, ...]
+    etag: str
+    headers: Dict[str, str]
+    dt: datetime
+
+    @property
+    def inputs(self) -> Tuple[Any, ...]:
+        """(model version, feedback version, weather token) the key was built from."""
+        return self.key[1:4]
+
+
+def _is_now(timestamp: Optional[str]) -> bool:
+    """True when parse_timestamp() falls back to the current time."""
+    if not timestamp:
+        return True
+    try:
+        datetime.fromisoformat(timestamp)
+    except ValueError:
+        return True
+    return False
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def prepare(route: str, spots: Sequence[str], timestamp: Optional[str]) -> Optional[Prepared]:
+    busy = as_busy_model(model.load_lookup())
+    if not busy.version:
+        return None
+
+    dt = model.parse_timestamp(timestamp)
+    day, slot = busy.cell(dt.weekday(), dt.hour * 60 + dt.minute)
+    key = (
+        tuple(spots),
+        busy.version,
+        model.feedback_aggregator().version(),
+        weather.weather_token(),
+        (int(day), int(slot)),
+        weather.hour_key(_utc(dt)),
+    )
+    etag = 'W/"' + hashlib.sha1(repr((route, key)).encode("utf-8")).hexdigest()[:24] + '"'
+
+    max_age = RESPONSE_MAX_AGE_SECONDS
+    if _is_now(timestamp):
+        # The cell changes at the next slot boundary or UTC hour
+        step = math.gcd(busy.slot_minutes, 60) * 60
+        max_age = min(max_age, step - (dt.minute * 60 + dt.second) % step)
+
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    return Prepared(key, etag, headers, dt)
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    wanted = opaque(etag)
+    return any(tag.strip() == "*" or opaque(tag) == wanted for tag in if_none_match.split(","))
+
+
+def cacheable(predictions: List[Dict[str, Any]]) -> bool:
+    return not any("error" in p.get("weather", {}) for p in predictions)
+
+
+def _restamp(predictions: List[Dict[str, Any]], dt: datetime) -> List[Dict[str, Any]]:
+    stamps = {"timestamp_used": dt.isoformat()}
+    timestamp_utc = _utc(dt).isoformat()
+
+    results = []
+    for prediction in predictions:
+        details = prediction["weather"]
+        if "timestamp_utc" in details:
+            details = {**details, "timestamp_utc": timestamp_utc}
+        results.append({**prediction, **stamps, "weather": details})
+    return results
+
+
+class ResponseCache:
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = RESPONSE_CACHE_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Any, ...], List[Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[Any, ...], dt: datetime) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            predictions = self._entries.get(key)
+            if predictions is not None:
+                self._entries.move_to_end(key)
+
+        if predictions is None:
+            metrics.cache_miss("response")
+            return None
+        metrics.cache_hit("response")
+        return _restamp(predictions, dt)
+
+    def put(self, key: Tuple[Any, ...], predictions: List[Dict[str, Any]]) -> None:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = predictions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        metrics.cache_evicted("response", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ResponseCache()
+
+
+def get_cache() -> ResponseCache:
+    return _cache
@@ -0,0 +1,225 @@
+"""
+Spec (score_stream.py):
+
+- ScoreBroadcaster:
+    One shared computation fanned out to every connected stream client.
+    While anyone is subscribed, a single task checks the inputs every
+    STREAM_POLL_SECONDS – served model version, feedback aggregates,
+    weather token, and the current model slot / UTC weather hour – and
+    only when one changed scores every known spot once (prediction grid
+    first, live batch otherwise) and publishes what moved.
+
+- Events (dicts):
+    {"type": "snapshot", "seq", "reason", "timestamp", "model_version",
+     "scores": {spot: {busy_score, model_source}}} – first event for a
+    client, and after a client fell behind
+    {"type": "delta", ...same, "scores": only the spots whose busy_score
+     changed}
+    reason: "initial" | "model" | "feedback" | "weather" | "time"
+
+- subscribe() / unsubscribe(subscriber):
+    Each client gets a queue of at most STREAM_QUEUE_SIZE events. When a
+    slow client's queue is full its backlog is dropped and replaced by one
+    snapshot, so memory per client stays bounded and it still converges.
+
+- events(broadcaster):
+    Async iterator of SSE frames for one client (": keepalive" comments
+    while idle). It subscribes when first iterated and unsubscribes in the
+    same try/finally, so a client that disconnects before the response
+    starts never leaves a subscriber behind.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import model
+import prediction_grid
+import weather
+from busy_model import as_busy_model
+
+# How often the shared task checks whether any input changed
+STREAM_POLL_SECONDS = 5.0
+
+# Events buffered per client before it's resynced with a snapshot
+STREAM_QUEUE_SIZE = 16
+
+# Idle streams get a comment line this often so proxies keep them open
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+_REASONS = ("model", "feedback", "weather", "time")
+
+
+class Subscriber:
+    def __init__(self, size: int) -> None:
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=size)
+        self.resyncs = 0
+
+    def offer(self, event: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog, catch up from one snapshot
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(snapshot)
+            self.resyncs += 1
+
+
+def _inputs(now: datetime) -> Tuple[Any, ...]:
+    """(model, feedback, weather, time) – what the scores depend on right now."""
+    busy = as_busy_model(model.load_lookup())
+    day, slot = busy.cell(now.weekday(), now.hour * 60 + now.minute)
+    return (
+        busy.version,
+        model.feedback_aggregator().version(),
+        weather.weather_token(),
+        (int(day), int(slot), weather.hour_key(now)),
+    )
+
+
+class ScoreBroadcaster:
+    def __init__(self, queue_size: Optional[int] = None) -> None:
+        self.queue_size = STREAM_QUEUE_SIZE if queue_size is None else queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._inputs: Optional[Tuple[Any, ...]] = None
+        self._scores: Dict[str, Dict[str, Any]] = {}
+        self._seq = 0
+        self._timestamp: Optional[str] = None
+        self._version: Optional[str] = None
+        # Shared computations run, for tests/metrics: one per input change
+        self.computations = 0
+
+    # ----- clients -----
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        if self._scores:
+            subscriber.offer(self._event("snapshot", "initial", self._scores), self.snapshot())
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    # ----- shared computation -----
+
+    def _event(self, kind: str, reason: str, scores: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "type": kind,
+            "seq": self._seq,
+            "reason": reason,
+            "timestamp": self._timestamp,
+            "model_version": self._version,
+            "scores": scores,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._event("snapshot", "resync", self._scores)
+
+    async def update(self, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Recompute if an input changed; returns the published event, if any."""
+        now = now or datetime.now(timezone.utc)
+        inputs = await asyncio.to_thread(_inputs, now)
+        if inputs == self._inputs:
+            return None
+
+        previous = self._inputs
+        reason = "initial" if previous is None else next(
+            name for name, old, new in zip(_REASONS, previous, inputs) if old != new
+        )
+
+        spots = await asyncio.to_thread(model.known_spots)
+        timestamp = now.replace(tzinfo=None).isoformat()
+        predictions = await asyncio.to_thread(prediction_grid.get_grid().lookup, spots, timestamp)
+        if predictions is None:
+            predictions = await model.predict_busy_scores_async(spots, timestamp)
+        self.computations += 1
+
+        scores = {
+            p["spot"]: {"busy_score": p["busy_score"], "model_source": p["model_source"]}
+            for p in predictions
+        }
+        changed = {
+            spot: score
+            for spot, score in scores.items()
+            if self._scores.get(spot, {}).get("busy_score") != score["busy_score"]
+        }
+
+        # Recorded only once scored, so a failed computation is retried
+        self._inputs = inputs
+        first = not self._scores
+        self._scores = scores
+        self._timestamp = timestamp
+        self._version = inputs[0]
+        if not changed:
+            return None
+
+        self._seq += 1
+        event = self._event("snapshot" if first else "delta", reason, scores if first else changed)
+        snapshot = self.snapshot()
+        for subscriber in list(self._subscribers):
+            subscriber.offer(event, snapshot)
+        return event
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self.update()
+            except FileNotFoundError:
+                pass  # nothing trained yet
+            except Exception as exc:
+                print(f"⚠️ Score stream update failed: {exc}")
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+def sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def events(
+    broadcaster: ScoreBroadcaster,
+    keepalive: Optional[float] = None,
+) -> AsyncIterator[str]:
+    keepalive = STREAM_KEEPALIVE_SECONDS if keepalive is None else keepalive
+    subscriber = broadcaster.subscribe()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield sse(event)
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+_broadcaster: Optional[ScoreBroadcaster] = None
+
+
+def get_broadcaster() -> ScoreBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = ScoreBroadcaster()
+    return _broadcaster
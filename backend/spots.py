@@ -0,0 +1,209 @@
+"""
+Spec (spots.py):
+
+- Spot registry:
+    shared/spot_coordinates.json (SPOT_REGISTRY_PATH) holds
+    {"spots": [{id, name, lat, lng, features: [tag, ...]}, ...]} – the same
+    list the frontend shows. `name` is what /predict scores.
+
+- SpotIndex(spots, cell_meters):
+    Uniform grid over an equirectangular projection around the spots'
+    centroid (metres east/north), cell → spot indices. within(lat, lng,
+    radius_m) only visits the cells the radius overlaps, then keeps spots
+    whose haversine distance is inside it, nearest first – cost grows with
+    the spots near the point, not with the registry.
+
+- RegistryFile(path).get():
+    Parsed + indexed registry, rebuilt only when the file's (mtime, size)
+    changes.
+
+- get_index():
+    Index for SPOT_REGISTRY_PATH.
+
+- rank_nearby(nearby, predictions, k):
+    Top k of within()'s spots by predicted busy_score (least busy first,
+    nearer first on ties), as response dicts.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SPOT_REGISTRY_PATH = Path(
+    os.getenv(
+        "SPOT_REGISTRY_PATH",
+        Path(__file__).resolve().parent.parent / "shared" / "spot_coordinates.json",
+    )
+)
+
+# Grid cell edge; about a city block, so a 500 m query touches ~5×5 cells
+CELL_METERS = 200.0
+
+EARTH_RADIUS_M = 6_371_000.0
+
+
+def haversine_m(lat1: Any, lng1: Any, lat2: Any, lng2: Any) -> np.ndarray:
+    """Great-circle distance(s) in metres; array arguments broadcast."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _validate(raw: Any, path: Any) -> List[Dict[str, Any]]:
+    entries = raw.get("spots") if isinstance(raw, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must be a JSON object with a \"spots\" list")
+
+    spots, names = [], set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("name"), str):
+            raise ValueError(f"{path}: every spot needs a name")
+        name = entry["name"]
+        if name in names:
+            raise ValueError(f"{path}: duplicate spot {name!r}")
+        try:
+            lat, lng = float(entry["lat"]), float(entry["lng"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path}: spot {name!r} needs numeric lat/lng")
+        features = entry.get("features") or []
+        if not all(isinstance(f, str) for f in features):
+            raise ValueError(f"{path}: features of {name!r} must be strings")
+
+        names.add(name)
+        spots.append({
+            "id": entry.get("id"),
+            "name": name,
+            "lat": lat,
+            "lng": lng,
+            "features": list(features),
+        })
+    return spots
+
+
+class SpotIndex:
+    def __init__(self, spots: Sequence[Dict[str, Any]], cell_meters: float = CELL_METERS) -> None:
+        self.spots = list(spots)
+        self.cell_meters = cell_meters
+
+        self.lat = np.array([s["lat"] for s in self.spots], dtype=np.float64)
+        self.lng = np.array([s["lng"] for s in self.spots], dtype=np.float64)
+        self._features = [frozenset(s["features"]) for s in self.spots]
+
+        # Local projection: metres per degree at the registry's centre
+        self._lat0 = float(self.lat.mean()) if self.spots else 0.0
+        self._lng0 = float(self.lng.mean()) if self.spots else 0.0
+        self._m_per_deg_lat = math.pi * EARTH_RADIUS_M / 180.0
+        self._m_per_deg_lng = self._m_per_deg_lat * math.cos(math.radians(self._lat0))
+
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, cell in enumerate(zip(*self._cell(self.lat, self.lng))):
+            self._cells.setdefault((int(cell[0]), int(cell[1])), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.spots)
+
+    def _cell(self, lat: Any, lng: Any) -> Tuple[Any, Any]:
+        x = (np.asarray(lng) - self._lng0) * self._m_per_deg_lng
+        y = (np.asarray(lat) - self._lat0) * self._m_per_deg_lat
+        return np.floor(x / self.cell_meters).astype(int), np.floor(y / self.cell_meters).astype(int)
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        radius_m: float,
+        features: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """(spot, distance in metres) within radius_m having all `features`, nearest first."""
+        if not self.spots:
+            return []
+
+        cx, cy = (int(v) for v in self._cell(lat, lng))
+        # Projection error is tiny at campus scale; one extra ring covers it
+        reach = int(math.ceil(radius_m / self.cell_meters)) + 1
+        candidates = [
+            i
+            for dx in range(-reach, reach + 1)
+            for dy in range(-reach, reach + 1)
+            for i in self._cells.get((cx + dx, cy + dy), ())
+        ]
+
+        wanted = frozenset(features or ())
+        if wanted:
+            candidates = [i for i in candidates if wanted <= self._features[i]]
+        if not candidates:
+            return []
+
+        idx = np.array(candidates)
+        dist = haversine_m(lat, lng, self.lat[idx], self.lng[idx])
+        keep = dist <= radius_m
+        order = np.argsort(dist[keep], kind="stable")
+        return [(self.spots[i], float(d)) for i, d in zip(idx[keep][order], dist[keep][order])]
+
+
+class RegistryFile:
+    """Registry at `path`, re-read and re-indexed when the file changes."""
+
+    def __init__(self, path: Any) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # (stamp, index) – replaced as a whole, never mutated
+        self._entry: Optional[Tuple[Any, SpotIndex]] = None
+
+    def _stamp(self) -> Any:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> SpotIndex:
+        stamp = self._stamp()
+        entry = self._entry
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        with self._lock:
+            if stamp is None or stamp[1] == 0:
+                spots: List[Dict[str, Any]] = []
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    spots = _validate(json.load(f), self.path)
+            index = SpotIndex(spots)
+            self._entry = (stamp, index)
+            return index
+
+
+_registry: Optional[RegistryFile] = None
+
+
+def get_index() -> SpotIndex:
+    global _registry
+    if _registry is None or _registry.path != Path(SPOT_REGISTRY_PATH):
+        _registry = RegistryFile(SPOT_REGISTRY_PATH)
+    return _registry.get()
+
+
+def rank_nearby(
+    nearby: List[Tuple[Dict[str, Any], float]],
+    predictions: List[Dict[str, Any]],
+    k: int,
+) -> List[Dict[str, Any]]:
+    ranked = sorted(zip(nearby, predictions), key=lambda item: (item[1]["busy_score"], item[0][1]))
+    return [
+        {
+            **spot,
+            "distance_m": round(distance, 1),
+            "busy_score": prediction["busy_score"],
+            "model_source": prediction["model_source"],
+            "timestamp_used": prediction["timestamp_used"],
+        }
+        for (spot, distance), prediction in ranked[:k]
+    ]
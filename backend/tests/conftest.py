@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import pandas as pd
+import pytest
+
+import feedback_log
+import model
+from response_cache import ResponseCache
+
+
+def fake_weather(ts):
+    """Deterministic weather that varies by hour, so hourly cells differ."""
+    hour = int(ts[11:13])
+    return {"temp": 4 + hour, "precip": 0.5 * (hour % 4), "cloud": 30, "wind": 10}
+
+
+@pytest.fixture
+def trained(tmp_path, monkeypatch):
+    """
+    A small model trained into tmp_path, with every data path (desk logs,
+    lookup, feedback.csv, feedback log) pointed there, weather stubbed
+    (sync and async) and the weather version pinned.
+    """
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({
+        "desk": ["Lam Circ", "Lam Circ", "Law Circ", "Law Circ", "Educ Circ"],
+        "date_time": [
+            "2024-01-01T09:10:00Z", "2024-01-03T12:00:00Z", "2024-01-02T15:00:00Z",
+            "2024-01-02T16:00:00Z", "2024-01-05T20:30:00Z",
+        ],
+    }).to_csv(csv, index=False)
+
+    async def fake_weather_async(ts):
+        return fake_weather(ts)
+
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+    monkeypatch.setattr("model.FEEDBACK_PATH", tmp_path / "feedback.csv")
+    monkeypatch.setattr("model.FEEDBACK_LOG_PATH", tmp_path / "feedback_log")
+    monkeypatch.setattr("model.get_weather", fake_weather)
+    monkeypatch.setattr("model.get_weather_async", fake_weather_async)
+    monkeypatch.setattr("weather.weather_version", lambda: "fixed")
+    monkeypatch.setattr("weather.weather_token", lambda: "fixed")
+    monkeypatch.setattr("response_cache._cache", ResponseCache())
+    model.train_model()
+    yield tmp_path
+    feedback_log.close_feedback_log()
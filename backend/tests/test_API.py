@@ -10,6 +10,15 @@ from main import app
 
 client = TestClient(app, raise_server_exceptions=False)
 
+
+def patch_weather(monkeypatch, fake):
+    """API endpoints are async, so patch both weather entry points."""
+    async def fake_async(*a, **k):
+        return fake(*a, **k)
+
+    monkeypatch.setattr("model.get_weather", fake)
+    monkeypatch.setattr("model.get_weather_async", fake_async)
+
 def test_root():
     r = client.get("/")
     assert r.status_code == 200
@@ -28,8 +37,8 @@ def test_predict_success(monkeypatch):
     }
     monkeypatch.setattr("model.load_lookup", lambda: fake_lookup)
     monkeypatch.setattr("model.get_feedback_score", lambda *a, **k: 0.8)
-    monkeypatch.setattr(
-        "model.get_weather",
+    patch_weather(
+        monkeypatch,
         lambda *a, **k: {"temp": 10, "precip": 0, "cloud": 0, "wind": 0},
     )
 
@@ -39,3 +48,78 @@ def test_predict_success(monkeypatch):
     assert data["spot"] == "Koerner"
     assert 0 <= data["busy_score"] <= 1
 
+
+def test_predict_batch(monkeypatch):
+    fake_lookup = {
+        "per_library": {"Koerner": {"0": 0.7}, "Law": {"0": 0.2}},
+        "global": {"0": 0.5},
+    }
+    calls = []
+    monkeypatch.setattr("model.load_lookup", lambda: fake_lookup)
+    monkeypatch.setattr("model.get_feedback_score", lambda *a, **k: None)
+    patch_weather(
+        monkeypatch,
+        lambda *a, **k: calls.append(1) or {"temp": 10, "precip": 0, "cloud": 0, "wind": 0},
+    )
+
+    r = client.get("/predict/batch?spots=Koerner,Law,Nest&timestamp=2024-01-01T01:00:00")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3
+    assert [p["spot"] for p in data["predictions"]] == ["Koerner", "Law", "Nest"]
+    assert data["predictions"][0]["model_score"] == 0.7
+    assert data["predictions"][2]["model_source"] == "global_fallback"
+    assert len(calls) == 1
+
+    # No spots → every known spot
+    r = client.get("/predict/batch?timestamp=2024-01-01T01:00:00")
+    assert r.json()["count"] == 9
+
+
+def test_predict_timeline(monkeypatch):
+    fake_lookup = {
+        "per_library": {"Koerner": {"0": 0.7, "1": 0.2}},
+        "global": {"0": 0.5},
+    }
+    monkeypatch.setattr("model.load_lookup", lambda: fake_lookup)
+    monkeypatch.setattr("model.get_feedback_score", lambda *a, **k: None)
+    monkeypatch.setattr(
+        "model.get_weather_hours",
+        lambda hours: {h: {"temp": 10, "precip": 0, "cloud": 0, "wind": 0} for h in hours},
+    )
+
+    r = client.get("/predict/timeline?spot=Koerner&start=2024-01-01T01:00:00&end=2024-01-01T04:00:00&step=1h")
+    assert r.status_code == 200
+    data = r.json()
+    assert [p["model_score"] for p in data["points"]] == [0.7, 0.7, 0.2, 0.2]
+    assert data["step_minutes"] == 60
+
+    r = client.get("/predict/timeline?spot=Koerner&start=2024-01-01T01:00:00&step=soon")
+    assert r.status_code == 400
+
+
+def test_async_predict_keeps_file_stages_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    import model
+
+    loop_thread = threading.get_ident()
+    seen = []
+    fake_lookup = {"per_library": {"Koerner": {"0": 0.7}}, "global": {"0": 0.5}}
+
+    def load_lookup():
+        seen.append(threading.get_ident())
+        return fake_lookup
+
+    def feedback_score(*a, **k):
+        seen.append(threading.get_ident())
+        return None
+
+    monkeypatch.setattr("model.load_lookup", load_lookup)
+    monkeypatch.setattr("model.get_feedback_score", feedback_score)
+    patch_weather(monkeypatch, lambda *a, **k: {"temp": 10, "precip": 0, "cloud": 0, "wind": 0})
+
+    result = asyncio.run(model.predict_busy_scores_async(["Koerner"], "2024-01-01T01:00:00"))
+    assert result[0]["model_score"] == 0.7
+    assert seen and loop_thread not in seen
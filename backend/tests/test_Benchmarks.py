@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+for path in (BACKEND_DIR, BACKEND_DIR / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import json
+
+import model
+import run as bench
+from synthetic import write_desk_logs
+
+
+def test_synthetic_logs_are_deterministic(tmp_path):
+    a = write_desk_logs(tmp_path / "a.csv", 3000, seed=7)
+    b = write_desk_logs(tmp_path / "b.csv", 3000, seed=7)
+    assert a.read_bytes() == b.read_bytes()
+    assert len(a.read_text().splitlines()) == 3001
+
+
+def test_benchmark_smoke_run(tmp_path):
+    """Tiny end-to-end run: every benchmark reports, nothing leaks into model state."""
+    lookup_before = model.LOOKUP_PATH
+    out = tmp_path / "result.json"
+
+    report = bench.main([
+        "--rows", "2000", "--feedback-rows", "200", "--predict-calls", "20",
+        "--workdir", str(tmp_path / "work"), "--out", str(out),
+    ])
+
+    saved = json.loads(out.read_text())
+    assert saved == report
+    assert [r["name"] for r in saved["results"]] == ["train_full", "train_cached", "predict", "batch", "timeline"]
+    assert saved["results"][0]["rows_per_s"] > 0 and saved["results"][0]["peak_mb"] > 0
+    assert model.LOOKUP_PATH == lookup_before
+
+    lines = bench.compare(report, saved)
+    assert len(lines) == 5 and all("+0.0%" in line for line in lines)
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import json
+import os
+import random
+
+import pandas as pd
+
+import model
+from desk_mapping import DeskMatcher, MappingFile
+
+
+def _linear_scan(mapping, raw):
+    """The original normalize_desk_to_library() rule, for comparison."""
+    if pd.isna(raw):
+        return None
+    s = str(raw).strip()
+    if s in mapping:
+        return mapping[s]
+    for key, lib in mapping.items():
+        if key.lower() in s.lower():
+            return lib
+    return None
+
+
+def test_matcher_agrees_with_linear_scan():
+    matcher = DeskMatcher(model.DESK_TO_LIBRARY)
+    labels = [
+        "Lam Circ", "  Lam Ref  ", "LAW LIBRARY CIRC (evening)", "Xwi7xwa Off Desk",
+        "chapman lc desk 3", "Educ Ref / Woodward Circ", "Koerner", "", None, float("nan"),
+        "Asian Circ.*", "Unknown Desk",
+    ]
+    for label in labels:
+        assert matcher.match(label) == _linear_scan(model.DESK_TO_LIBRARY, label), label
+
+
+def test_matcher_priority_follows_mapping_order():
+    matcher = DeskMatcher({"Ref": "Law", "Lam": "David Lam"})
+    # Both keys occur; the one listed first wins, wherever it appears
+    assert matcher.match("Lam Ref") == "Law"
+
+
+def test_matcher_priority_beats_position_with_overlapping_keys():
+    # "circ" (lowest priority) occurs first and overlaps both others;
+    # "lam circ" outranks "am c", which starts earlier inside it
+    mapping = {"Lam Circ Annex": "Koerner", "Lam Circ": "David Lam", "am c": "Law", "circ": "IKBLC"}
+    matcher = DeskMatcher(mapping)
+    assert matcher.match("circ desk / LAM CIRC") == "David Lam"
+    assert matcher.match("circ desk / lam circ annex") == "Koerner"
+    assert matcher.match("circ / am cx") == "Law"
+    assert matcher.match("ci rc") is None
+
+    rng = random.Random(7)
+    for _ in range(500):
+        label = "".join(rng.choice("lam circ anex") for _ in range(rng.randint(0, 20)))
+        assert matcher.match(label) == _linear_scan(mapping, label), label
+
+
+def test_matcher_memoizes_per_label():
+    matcher = DeskMatcher({"Lam": "David Lam"})
+    assert matcher.match("Lam Circ 2") == "David Lam"
+    matcher._goto = None  # a second lookup must not need the automaton
+    assert matcher.match("Lam Circ 2") == "David Lam"
+
+
+def test_unmapped_report_sorted_by_rows():
+    matcher = DeskMatcher({"Lam": "David Lam"})
+    report = matcher.unmapped({"Lam Circ": 10, "Mystery": 2, "Annex": 5, "Empty": 0})
+    assert list(report.items()) == [("Annex", 5), ("Mystery", 2)]
+
+
+def test_mapping_file_extends_and_reloads(tmp_path):
+    path = tmp_path / "desk_mapping.json"
+    holder = MappingFile({"Lam Circ": "David Lam"})
+
+    assert holder.get(path).match("IKB Circ") is None
+
+    path.write_text(json.dumps({"IKB Circ": "IKBLC"}))
+    first = holder.get(path)
+    assert first.match("IKB Circ 1") == "IKBLC"
+    assert first.match("Lam Circ") == "David Lam"
+    assert holder.get(path) is first
+
+    path.write_text(json.dumps({"IKB Circ": "IKBLC", "Lam Circ": "Koerner"}))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert holder.get(path).match("Lam Circ") == "Koerner"
+    assert holder.get(path).digest != first.digest
+
+
+def test_training_uses_mapping_file(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({
+        "desk": ["IKB Circ", "IKB Circ", "Lam Circ"],
+        "date_time": ["2024-01-01T13:00:00Z"] * 3,
+    }).to_csv(csv, index=False)
+
+    mapping = tmp_path / "desk_mapping.json"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+    monkeypatch.setattr("model.DESK_MAPPING_PATH", mapping)
+
+    first = model.train_model(incremental=True)
+    assert first["training"]["unmapped"] == {"IKB Circ": 2}
+
+    mapping.write_text(json.dumps({"IKB Circ": "IKBLC"}))
+    second = model.train_model(incremental=True)
+    # New mapping → counts can't be reused
+    assert second["training"]["mode"] == "full"
+    assert second["training"]["unmapped"] == {}
+    assert "IKBLC" in second["per_library"]
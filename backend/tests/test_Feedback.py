@@ -0,0 +1,213 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import feedback_log
+import model
+from feedback import FeedbackAggregator
+
+HEADER = "id,created_at,busy_rating,comment,spot_id\n"
+NOW = datetime(2025, 11, 28, 12, 0, tzinfo=timezone.utc)
+
+
+def _row(i, days_ago, rating, spot, comment=""):
+    ts = (NOW - timedelta(days=days_ago)).isoformat()
+    return f'{i},{ts},{rating},"{comment}",{spot}\n'
+
+
+def test_window_average(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(
+        HEADER
+        + _row(1, 1, 8, "Koerner")
+        + _row(2, 2, 6, "koerner")
+        + _row(3, 30, 1, "Koerner")
+        + _row(4, 1, 2, "Law")
+    )
+
+    agg = FeedbackAggregator(csv)
+    assert agg.average("Koerner", NOW - timedelta(days=14)) == 7.0
+    assert agg.average("Koerner") == 5.0
+    assert agg.average("Asian", NOW - timedelta(days=14)) is None
+
+
+def test_appended_rows_are_tailed(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(HEADER + _row(1, 1, 8, "Koerner", comment="multi\nline"))
+
+    agg = FeedbackAggregator(csv)
+    assert agg.average("Koerner") == 8.0
+    offset = agg._offset
+
+    with open(csv, "a") as f:
+        f.write(_row(2, 0, 4, "Koerner"))
+
+    assert agg.average("Koerner") == 6.0
+    assert agg._offset > offset
+
+
+def test_last_row_without_newline(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(HEADER + _row(1, 1, 8, "Koerner").rstrip("\n"))
+
+    agg = FeedbackAggregator(csv)
+    assert agg.average("Koerner") == 8.0
+
+    # The writer finishes the line and appends another row
+    with open(csv, "a") as f:
+        f.write("\n" + _row(2, 0, 2, "Koerner"))
+
+    assert agg.average("Koerner") == 5.0
+
+
+def test_rewritten_file_is_reloaded(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(HEADER + _row(1, 1, 8, "Koerner"))
+
+    agg = FeedbackAggregator(csv)
+    assert agg.average("Koerner") == 8.0
+
+    csv.write_text("spot_id,busy_rating\nKoerner,2\nKoerner,4\nKoerner,6\n")
+    assert agg.average("Koerner", NOW - timedelta(days=14)) == 4.0
+
+
+def test_same_header_rewrite_in_place_is_reloaded(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(HEADER + "".join(_row(i, 1, 2, "Law") for i in range(3)))
+
+    agg = FeedbackAggregator(csv)
+    assert agg.average("Law") == 2.0
+    inode = csv.stat().st_ino
+
+    # e.g. a fresh export (or pandas to_csv) written over the same file
+    csv.write_text(HEADER + "".join(_row(i, 1, 9, "Law") for i in range(10)))
+    assert csv.stat().st_ino == inode
+    assert agg.average("Law") == 9.0
+
+    # Same size and header: noticed through the mtime + digest
+    version = agg.version()
+    data = csv.read_text().replace(",9,", ",7,")
+    csv.write_text(data)
+    st = csv.stat()
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert agg.average("Law") == 7.0
+    assert agg.version() != version
+
+
+def _hours_row(i, hours_ago, rating, spot):
+    ts = (NOW - timedelta(hours=hours_ago)).isoformat()
+    return f'{i},{ts},{rating},"",{spot}\n'
+
+
+def test_decayed_score_favours_recent_reports(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    # Two half-lives old → weight 1/4; just now → weight 1
+    csv.write_text(HEADER + _hours_row(1, 12, 2, "Law") + _hours_row(2, 0, 10, "Law"))
+
+    agg = FeedbackAggregator(csv, half_life_hours=6)
+    mean, weight = agg.decayed("Law", NOW)
+    assert mean == pytest.approx((2 * 0.25 + 10) / 1.25)
+    assert weight == pytest.approx(1.25)
+    assert agg.decayed("Law", NOW + timedelta(hours=6))[1] == pytest.approx(0.625)
+    assert agg.decayed("Asian", NOW) == (None, 0.0)
+
+    # Live reports fold into the same sums in O(1)
+    agg.add([{"spot_id": "Law", "busy_rating": 2, "created_at": NOW.isoformat()}])
+    mean, weight = agg.decayed("Law", NOW)
+    assert mean == pytest.approx((2 * 0.25 + 10 + 2) / 2.25)
+    assert weight == pytest.approx(2.25)
+
+
+def test_decayed_sums_survive_tail_rereads(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    rows = [_hours_row(i, 3 * i, 1 + i, "Koerner") for i in range(1, 5)]
+    csv.write_text(HEADER + "".join(rows[:3]) + rows[3].rstrip("\n"))
+
+    agg = FeedbackAggregator(csv, half_life_hours=6)
+    agg.decayed("Koerner", NOW)
+    with open(csv, "a") as f:
+        f.write("\n" + _hours_row(5, 0, 9, "Koerner"))
+
+    fresh = FeedbackAggregator(csv, half_life_hours=6)
+    assert agg.decayed("Koerner", NOW) == pytest.approx(fresh.decayed("Koerner", NOW))
+
+
+def test_future_dated_reports_dont_pin_the_decayed_score(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    rows = "".join(f"{i},{(now - timedelta(hours=1)).isoformat()},2,,Law\n" for i in range(20))
+    # The future row is the unfinished last line, so it's re-read (un-applied) below
+    csv.write_text(HEADER + rows + "99,2100-01-01T00:00:00+00:00,10,,Law")
+
+    agg = FeedbackAggregator(csv, half_life_hours=6)
+    assert agg.decayed("Law", now) == pytest.approx((2.0, 20 * 2 ** (-1 / 6)))
+    with open(csv, "a") as f:
+        f.write("\n")
+    agg.add([{"spot_id": "Law", "busy_rating": 10, "created_at": "2100-01-01T00:00:00+00:00"}])
+    assert agg.decayed("Law", now + timedelta(days=7))[0] == pytest.approx(2.0)
+    assert len(agg._sums.pending["LAW"]) == 1
+
+    # Counted once `now` reaches them; the old reports have decayed away
+    assert agg.decayed("Law", datetime(2100, 1, 1, 1, tzinfo=timezone.utc))[0] == 10.0
+
+
+def test_sums_newer_than_now_are_not_decayed(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(HEADER + _hours_row(1, 6, 2, "Law") + _hours_row(2, 0, 10, "Law"))
+
+    agg = FeedbackAggregator(csv, half_life_hours=6)
+    # An hour before the newest report: the sums are taken as they are
+    assert agg.decayed("Law", NOW - timedelta(hours=1)) == pytest.approx(((2 * 0.5 + 10) / 1.5, 1.5))
+
+
+def test_window_reads_only_recent_partitions(tmp_path):
+    csv = tmp_path / "feedback.csv"
+    old = "".join(_row(i, 20 + i, 1, "Koerner") for i in range(400))
+    csv.write_text(HEADER + old + _row(500, 3, 7, "Koerner") + _row(501, 1, 9, "Koerner"))
+
+    agg = FeedbackAggregator(csv, half_life_hours=0)
+    assert agg.average("Koerner", NOW - timedelta(days=14)) == 8.0
+    assert agg.average("Koerner", NOW - timedelta(days=5000)) == pytest.approx(416 / 402)
+    assert agg.decayed("Koerner", NOW) == (None, 0.0)
+
+
+def test_feedback_score_fades_with_age(tmp_path, monkeypatch):
+    csv = tmp_path / "feedback.csv"
+    now = datetime.now(timezone.utc)
+    csv.write_text(f"spot_id,busy_rating,created_at\nLaw,9,{(now - timedelta(days=2)).isoformat()}\n")
+    monkeypatch.setattr("model.FEEDBACK_PATH", csv)
+    monkeypatch.setattr("model.FEEDBACK_LOG_PATH", tmp_path / "feedback_log")
+
+    # Two days at a 6h half-life leaves 1/256 of a report: no recent feedback
+    assert model.get_feedback_score("Law") is None
+    model.submit_feedback([{"spot_id": "Law", "busy_rating": 2}])
+    assert model.get_feedback_score("Law") == pytest.approx(0.2, abs=0.01)
+    feedback_log.close_feedback_log()
+
+    # Half-life 0: the flat FEEDBACK_WINDOW_DAYS average
+    monkeypatch.setattr("feedback.FEEDBACK_HALF_LIFE_HOURS", 0.0)
+    monkeypatch.setattr("feedback._aggregator", None)
+    assert model.get_feedback_score("Law") == 0.55
+    feedback_log.close_feedback_log()
+
+
+def test_feedback_decay_is_fixed_within_the_hour(tmp_path, monkeypatch):
+    csv = tmp_path / "feedback.csv"
+    csv.write_text(f"spot_id,busy_rating,created_at\nLaw,9,{NOW.isoformat()}\n")
+    monkeypatch.setattr("model.FEEDBACK_PATH", csv)
+    monkeypatch.setattr("model.FEEDBACK_LOG_PATH", tmp_path / "feedback_log")
+
+    # The weight drops under FEEDBACK_MIN_WEIGHT ~25.9h after the report,
+    # but the whole hour is scored as of its start (25h: still counted)
+    hour = NOW + timedelta(hours=25)
+    assert model.get_feedback_score("Law", hour + timedelta(minutes=5)) == 0.9
+    assert model.get_feedback_score("Law", hour + timedelta(minutes=58)) == 0.9
+    assert model.get_feedback_score("Law", hour + timedelta(minutes=65)) is None
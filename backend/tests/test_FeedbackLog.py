@@ -0,0 +1,152 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import json
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import feedback_log
+import model
+from feedback import FeedbackAggregator
+from feedback_log import FeedbackLog
+from main import app
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setattr("model.FEEDBACK_PATH", tmp_path / "feedback.csv")
+    monkeypatch.setattr("model.FEEDBACK_LOG_PATH", tmp_path / "feedback_log")
+    yield tmp_path
+    feedback_log.close_feedback_log()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def test_post_feedback_is_logged_and_counted_immediately(paths):
+    assert model.get_feedback_score("Koerner") is None
+
+    r = client.post("/feedback", json={"spot_id": "Koerner", "busy_rating": 8})
+    assert r.status_code == 201
+    assert r.json() == {"accepted": 1}
+    assert model.get_feedback_score("Koerner") == 0.8
+
+    lines = (paths / "feedback_log" / f"{_today()}.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["spot_id"] == "Koerner"
+
+
+def test_bulk_feedback_and_validation(paths):
+    items = [{"spot_id": "Law", "busy_rating": r, "created_at": _now()} for r in (2, 4, 6)]
+    r = client.post("/feedback/bulk", json=items)
+    assert r.status_code == 201
+    assert r.json() == {"accepted": 3}
+    assert model.get_feedback_score("Law") == 0.4
+
+    assert client.post("/feedback", json={"spot_id": "Law", "busy_rating": 11}).status_code == 422
+    assert client.post("/feedback", json={"busy_rating": 3}).status_code == 422
+    too_many = [{"spot_id": "Law", "busy_rating": 5}] * 1001
+    assert client.post("/feedback/bulk", json=too_many).status_code == 400
+
+
+def test_created_at_must_be_recent(paths):
+    def post(**delta):
+        created = (datetime.now(timezone.utc) + timedelta(**delta)).isoformat()
+        return client.post("/feedback", json={"spot_id": "Law", "busy_rating": 10, "created_at": created})
+
+    # Far in the future (would never decay) or outside the feedback window
+    assert post(days=365 * 75).status_code == 422
+    assert post(days=-(model.FEEDBACK_WINDOW_DAYS + 1)).status_code == 422
+    bulk = [{"spot_id": "Law", "busy_rating": 10, "created_at": "2100-01-01T00:00:00Z"}]
+    assert client.post("/feedback/bulk", json=bulk).status_code == 422
+    assert not (paths / "feedback_log").exists() or not list((paths / "feedback_log").iterdir())
+    assert model.get_feedback_score("Law") is None
+
+    # A client clock slightly ahead is fine
+    assert post(minutes=1).status_code == 201
+    assert post(days=-1).status_code == 201
+    assert model.get_feedback_score("Law") == 1.0
+
+
+def test_feedback_combines_with_csv_export(paths):
+    (paths / "feedback.csv").write_text(f"spot_id,busy_rating,created_at\nLaw,2,{_now()}\n")
+    model.submit_feedback([{"spot_id": "Law", "busy_rating": 6}])
+    assert model.get_feedback_score("Law") == 0.4
+
+
+def test_log_is_replayed_after_restart_and_torn_line_dropped(paths):
+    model.submit_feedback([{"spot_id": "Koerner", "busy_rating": 4}])
+    feedback_log.close_feedback_log()
+
+    # Crash mid-write of an unacknowledged record
+    log_dir = paths / "feedback_log"
+    partition = log_dir / f"{_today()}.jsonl"
+    with open(partition, "ab") as f:
+        f.write(b'{"spot_id":"Koerner","busy_ra')
+
+    aggregator = FeedbackAggregator(paths / "feedback.csv")
+    feedback_log.get_feedback_log(log_dir, aggregator)
+    assert aggregator.average("Koerner") == 4.0
+    assert partition.read_bytes().endswith(b"\n")
+
+
+def test_concurrent_appends_share_fsyncs(tmp_path):
+    committed = []
+    log = FeedbackLog(tmp_path / "log", on_commit=committed.extend, flush_ms=5)
+
+    def submit(i):
+        log.append([{"spot_id": "Law", "busy_rating": 1 + i % 10, "created_at": _now()}])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(200)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+
+    assert len(committed) == 200
+    assert len(log.replay()) == 200
+    assert log.batches < 200
+
+
+def test_failed_commit_is_not_acknowledged(tmp_path, monkeypatch):
+    committed = []
+    log = FeedbackLog(tmp_path / "log", on_commit=committed.extend)
+
+    def broken_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("feedback_log.os.fsync", broken_fsync)
+    with pytest.raises(OSError):
+        log.append([{"spot_id": "Law", "busy_rating": 5, "created_at": _now()}])
+    log.close()
+
+    assert committed == []
+    assert log.replay() == []
+
+
+def test_log_is_partitioned_by_day_and_replayed_from_a_date(tmp_path):
+    log = FeedbackLog(tmp_path / "log", flush_ms=0)
+    log.append([
+        {"spot_id": "Law", "busy_rating": 2, "created_at": "2024-01-01T23:30:00-08:00"},
+        {"spot_id": "Law", "busy_rating": 4, "created_at": "2024-01-01T12:00:00+00:00"},
+        {"spot_id": "Law", "busy_rating": 6, "created_at": "2024-01-03T08:00:00+00:00"},
+    ])
+    log.close()
+
+    assert log.partitions() == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert [r["busy_rating"] for r in log.replay()] == [4, 2, 6]
+    assert [r["busy_rating"] for r in log.replay(since=date(2024, 1, 2))] == [2, 6]
@@ -0,0 +1,156 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import csv
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import feedback_sync
+from feedback import FeedbackAggregator
+from feedback_sync import FeedbackSync, SQLiteSource, SupabaseSource
+
+CUTOFF = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HEADER = "id,created_at,accuracy_rating,busy_rating,client_session_id,comment,spot_id\n"
+
+
+class CountingSource(SQLiteSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+
+    def fetch_page(self, after_id, limit):
+        rows = super().fetch_page(after_id, limit)
+        self.calls.append((after_id, len(rows)))
+        return rows
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """SQLite stand-in for the Supabase feedback table."""
+    db = tmp_path / "remote.sqlite"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE feedback (id INTEGER PRIMARY KEY, spot_id INTEGER, busy_rating INTEGER,"
+        " accuracy_rating INTEGER, comment TEXT, client_session_id TEXT, created_at TEXT)"
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+
+def _insert(db, ids, spot_id=6, rating=8):
+    conn = sqlite3.connect(db)
+    conn.executemany(
+        "INSERT INTO feedback VALUES (?, ?, ?, NULL, ?, 'sess', ?)",
+        [(i, spot_id, rating, f"row {i}, busy", f"2024-01-02T15:{i % 60:02d}:00+00:00") for i in ids],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _ids(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [int(r["id"]) for r in csv.DictReader(f)]
+
+
+def test_pages_then_only_new_rows(tmp_path, remote):
+    _insert(remote, range(1, 26))
+    source = CountingSource(remote)
+    sync = FeedbackSync(source, tmp_path / "feedback.csv", tmp_path / "state.json", page_size=10)
+
+    assert sync.run() == {"fetched": 25, "pages": 3, "cursor": 25}
+    assert source.calls == [(0, 10), (10, 10), (20, 5)]
+    assert _ids(tmp_path / "feedback.csv") == list(range(1, 26))
+    assert json.loads((tmp_path / "state.json").read_text())["cursor"] == 25
+
+    assert sync.run()["fetched"] == 0
+    source.calls.clear()
+    _insert(remote, range(26, 31))
+    assert sync.run() == {"fetched": 5, "pages": 1, "cursor": 30}
+    assert source.calls == [(25, 5)]
+    assert _ids(tmp_path / "feedback.csv") == list(range(1, 31))
+
+
+def test_synced_rows_reach_the_aggregator(tmp_path, remote):
+    csv_path = tmp_path / "feedback.csv"
+    sync = FeedbackSync(SQLiteSource(remote), csv_path, tmp_path / "state.json")
+    _insert(remote, [1], rating=8)
+    sync.run()
+
+    agg = FeedbackAggregator(csv_path)
+    # spot_id 6 is "Law" in the spot registry
+    assert agg.average("Law", CUTOFF) == 8
+
+    offset = agg._offset
+    _insert(remote, [2], rating=2)
+    sync.run()
+    assert agg.average("Law", CUTOFF) == 5
+    assert agg._offset > offset  # appended rows read incrementally
+
+
+def test_interrupted_append_is_not_duplicated(tmp_path, remote):
+    csv_path = tmp_path / "feedback.csv"
+    state = tmp_path / "state.json"
+    _insert(remote, range(1, 6))
+    FeedbackSync(SQLiteSource(remote), csv_path, state).run()
+
+    # Rows 6–8 were appended but the process died before saving the cursor
+    _insert(remote, range(6, 11))
+    saved = state.read_text()
+    sync = FeedbackSync(SQLiteSource(remote), csv_path, state, page_size=3)
+    sync.run(max_pages=1)
+    state.write_text(saved)
+
+    assert sync.run()["cursor"] == 10
+    assert _ids(csv_path) == list(range(1, 11))
+
+
+def test_existing_export_sets_the_cursor(tmp_path, remote):
+    csv_path = tmp_path / "feedback.csv"
+    # A manual export without a trailing newline, written before any sync
+    csv_path.write_text(HEADER + '3,2024-01-02T15:03:00+00:00,,5,s,"a, b",Law', encoding="utf-8")
+    _insert(remote, range(1, 6))
+
+    result = FeedbackSync(SQLiteSource(remote), csv_path, tmp_path / "state.json").run()
+    assert result == {"fetched": 2, "pages": 1, "cursor": 5}
+    assert _ids(csv_path) == [3, 4, 5]
+
+
+def test_supabase_source_queries_past_the_cursor(monkeypatch):
+    seen = {}
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [{"id": 8}]
+
+    def fake_get(url, params, headers, timeout):
+        seen.update(url=url, params=params, headers=headers)
+        return FakeResponse()
+
+    monkeypatch.setattr("feedback_sync.requests.get", fake_get)
+    source = SupabaseSource("https://example.supabase.co/", "service-key")
+    assert source.fetch_page(7, 500) == [{"id": 8}]
+    assert seen["url"] == "https://example.supabase.co/rest/v1/feedback"
+    assert seen["params"]["id"] == "gt.7"
+    assert seen["params"]["order"] == "id.asc"
+    assert seen["params"]["limit"] == "500"
+    assert seen["headers"]["Authorization"] == "Bearer service-key"
+
+
+def test_sync_is_off_without_a_source(monkeypatch):
+    for name in ("FEEDBACK_SYNC_SQLITE", "SUPABASE_URL", "SUPABASE_SERVICE_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    assert feedback_sync.sync_from_env() is None
+
+    monkeypatch.setenv("FEEDBACK_SYNC_SQLITE", "/tmp/remote.sqlite")
+    assert isinstance(feedback_sync.sync_from_env().source, SQLiteSource)
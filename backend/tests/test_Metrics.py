@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.testclient import TestClient
+
+import metrics
+from main import app
+from weather import WeatherCache
+
+client = TestClient(app, raise_server_exceptions=False)
+
+FAKE_LOOKUP = {"per_library": {"Koerner": {"0": 0.7}}, "global": {"0": 0.5}}
+
+
+def _patch_predict(monkeypatch):
+    async def fake_weather_async(*a, **k):
+        return {"temp": 10, "precip": 0, "cloud": 0, "wind": 0}
+
+    monkeypatch.setattr("model.load_lookup", lambda: FAKE_LOOKUP)
+    monkeypatch.setattr("model.get_feedback_score", lambda *a, **k: None)
+    monkeypatch.setattr("model.get_weather_async", fake_weather_async)
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value, "a")
+
+    text = "\n".join(h.render())
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+
+
+def test_stage_is_noop_when_disabled(monkeypatch):
+    monkeypatch.setattr("metrics.METRICS_ENABLED", False)
+    before = metrics.STAGE_SECONDS.count("test.disabled")
+
+    with metrics.stage("test.disabled"):
+        pass
+    assert metrics.STAGE_SECONDS.count("test.disabled") == before
+
+    # A debug trace still sees the stage
+    with metrics.trace() as breakdown:
+        with metrics.stage("test.disabled"):
+            pass
+    assert "test.disabled" in breakdown
+    assert metrics.STAGE_SECONDS.count("test.disabled") == before
+
+
+def test_predict_debug_reports_stages(monkeypatch):
+    _patch_predict(monkeypatch)
+
+    r = client.get("/predict?spot=Koerner&timestamp=2024-01-01T01:00:00&debug=true")
+    assert r.status_code == 200
+    stages = r.json()["stages"]
+    for name in ("predict.load_lookup", "predict.model", "predict.feedback", "predict.weather"):
+        assert stages[name] >= 0
+
+    r = client.get("/predict?spot=Koerner&timestamp=2024-01-01T01:00:00")
+    assert "stages" not in r.json()
+
+
+def test_metrics_endpoint_exposes_stages_caches_and_weather(monkeypatch):
+    _patch_predict(monkeypatch)
+    client.get("/predict?spot=Koerner&timestamp=2024-01-01T01:00:00")
+
+    cache = WeatherCache(ttl_seconds=3600, fetcher=lambda: {"k": {}})
+    cache.series()
+    cache.series()
+
+    def failing():
+        raise RuntimeError("down")
+
+    errors_before = metrics.WEATHER_UPSTREAM_ERRORS.value()
+    WeatherCache(ttl_seconds=3600, fetcher=failing).series()
+    assert metrics.WEATHER_UPSTREAM_ERRORS.value() == errors_before + 1
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'findmydesk_stage_seconds_count{stage="predict.model"}' in text
+    assert 'findmydesk_cache_requests_total{cache="weather",result="hit"}' in text
+    assert 'findmydesk_cache_requests_total{cache="prediction_grid",result="miss"}' in text
+    assert 'findmydesk_weather_upstream_seconds_count{outcome="error"}' in text
+    assert 'findmydesk_http_request_seconds_count{route="/predict",status="200"}' in text
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from datetime import datetime, timedelta, timezone
+
+import model
+from prediction_grid import PredictionGrid
+
+
+def _now_plus(**delta):
+    return (datetime.now(timezone.utc) + timedelta(**delta)).replace(tzinfo=None)
+
+
+def test_grid_matches_live_predictions(trained):
+    grid = PredictionGrid(hours=3)
+    assert grid.refresh()
+
+    for ts in (_now_plus(minutes=20).isoformat(), _now_plus(hours=2).isoformat() + "Z"):
+        cached = grid.lookup(model.known_spots(), ts)
+        live = model.predict_busy_scores(model.known_spots(), ts)
+        assert cached is not None
+        for c, l in zip(cached, live):
+            assert c.pop("computed_at")
+            assert c == l
+
+
+def test_grid_only_covers_utc_timestamps_in_range(trained):
+    grid = PredictionGrid(hours=3)
+    grid.refresh()
+
+    assert grid.lookup(["Koerner"], _now_plus(hours=5).isoformat()) is None
+    assert grid.lookup(["Koerner"], _now_plus(hours=-2).isoformat()) is None
+    assert grid.lookup(["Koerner"], _now_plus(hours=1).isoformat() + "-08:00") is None
+    assert grid.lookup(["Koerner", "Nest"], _now_plus(hours=1).isoformat()) is None
+
+
+def test_grid_refreshes_when_inputs_change(trained):
+    grid = PredictionGrid(hours=2)
+    assert grid.refresh()
+    assert not grid.refresh()
+
+    ts = _now_plus(minutes=5).isoformat()
+    assert grid.lookup(["Law"], ts)[0]["feedback_score"] is None
+
+    (trained / "feedback.csv").write_text(
+        "spot_id,busy_rating,created_at\n"
+        f"Law,8,{datetime.now(timezone.utc).isoformat()}\n"
+    )
+    assert grid.refresh()
+    assert grid.lookup(["Law"], ts)[0]["feedback_score"] == 0.8
+
+    grid.mark_stale()
+    assert grid.lookup(["Law"], ts) is None
+    assert grid.refresh()
+    assert grid.lookup(["Law"], ts) is not None
+
+
+def test_predict_endpoint_reads_grid(trained, monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    grid = PredictionGrid(hours=2)
+    grid.refresh()
+    monkeypatch.setattr("prediction_grid._grid", grid)
+
+    def no_live(*a, **k):
+        raise AssertionError("should be served from the grid")
+
+    monkeypatch.setattr("main.predict_busy_score_async", no_live)
+
+    client = TestClient(app)
+    r = client.get(f"/predict?spot=Law&timestamp={_now_plus(minutes=30).isoformat()}")
+    assert r.status_code == 200
+    assert r.json()["spot"] == "Law"
+    assert "computed_at" in r.json()
+
+
+def test_feedback_bypasses_grid_until_refreshed(trained, monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    grid = PredictionGrid(hours=2)
+    grid.refresh()
+    monkeypatch.setattr("prediction_grid._grid", grid)
+
+    client = TestClient(app)
+    url = f"/predict?spot=Law&timestamp={_now_plus(minutes=30).isoformat()}"
+    before = client.get(url).json()
+    assert "computed_at" in before
+    assert before["feedback_score"] is None
+
+    r = client.post("/feedback", json={"spot_id": "Law", "busy_rating": 10})
+    assert r.status_code == 201
+    assert grid.lookup(["Law"], _now_plus(minutes=30).isoformat()) is None
+
+    after = client.get(url).json()
+    assert "computed_at" not in after
+    assert after["feedback_score"] == 1.0
+
+    assert grid.refresh()
+    assert client.get(url).json()["feedback_score"] == 1.0
@@ -0,0 +1,128 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import metrics
+import model
+import response_cache
+from main import app
+from prediction_grid import PredictionGrid
+from response_cache import ResponseCache
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_etag_and_conditional_get(trained):
+    url = "/predict?spot=Law&timestamp=2024-01-02T15:20:00"
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('W/"')
+    assert r.headers["cache-control"] == "public, max-age=60"
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    # Same slot and weather hour → same validators; new feedback → new ETag
+    assert client.get("/predict?spot=Law&timestamp=2024-01-02T15:25:00").headers["etag"] == etag
+    model.submit_feedback([{"spot_id": "Law", "busy_rating": 9, "created_at": "2024-01-02T10:00:00+00:00"}])
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_response_cache_serves_repeat_requests(trained, monkeypatch):
+    first = client.get("/predict/batch?spots=Law,Education&timestamp=2024-01-02T15:20:00").json()
+
+    async def no_live(*a, **k):
+        raise AssertionError("should come from the response cache")
+
+    monkeypatch.setattr("main.predict_busy_scores_async", no_live)
+    again = client.get("/predict/batch?spots=Law,Education&timestamp=2024-01-02T15:22:00")
+    assert again.status_code == 200
+    data = again.json()
+    assert data["predictions"][0]["timestamp_used"] == "2024-01-02T15:22:00"
+    assert data["predictions"][0]["weather"]["timestamp_utc"] == "2024-01-02T15:22:00+00:00"
+    for a, b in zip(first["predictions"], data["predictions"]):
+        assert a["busy_score"] == b["busy_score"]
+
+
+def test_now_requests_expire_with_their_slot(trained):
+    r = client.get("/predict?spot=Law")
+    max_age = int(r.headers["cache-control"].split("max-age=")[1])
+    assert 0 < max_age <= 60
+
+
+def test_weather_failures_are_not_cached(trained, monkeypatch):
+    async def failing(ts):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr("model.get_weather_async", failing)
+    r = client.get("/predict?spot=Law&timestamp=2024-01-03T10:00:00")
+    assert r.status_code == 200
+    assert "etag" not in r.headers
+    assert r.headers["cache-control"] == "no-cache"
+    assert len(response_cache.get_cache()) == 0
+
+
+def test_lru_evicts_oldest_and_counts_it():
+    cache = ResponseCache(max_entries=2)
+    before = metrics.CACHE_EVICTIONS.value("response")
+    for key in ("a", "b"):
+        cache.put((key,), [])
+    cache.get(("a",), pd.Timestamp("2024-01-01").to_pydatetime())  # a is now most recent
+    cache.put(("c",), [])
+
+    assert len(cache) == 2
+    assert cache.get(("b",), pd.Timestamp("2024-01-01").to_pydatetime()) is None
+    assert metrics.CACHE_EVICTIONS.value("response") == before + 1
+
+
+def test_matches_handles_weak_lists_and_star():
+    assert response_cache.matches('"x", W/"abc"', 'W/"abc"')
+    assert response_cache.matches("*", 'W/"abc"')
+    assert not response_cache.matches('W/"other"', 'W/"abc"')
+    assert not response_cache.matches(None, 'W/"abc"')
+
+
+def test_stale_grid_results_are_not_cached_under_new_validators(trained, monkeypatch):
+    grid = PredictionGrid(hours=2)
+    grid.refresh()
+    monkeypatch.setattr("prediction_grid._grid", grid)
+
+    ts = (datetime.now(timezone.utc) + timedelta(minutes=30)).replace(tzinfo=None).isoformat()
+    url = f"/predict?spot=Law&timestamp={ts}"
+    assert client.get(url).json()["feedback_score"] is None
+
+    model.submit_feedback([{"spot_id": "Law", "busy_rating": 10}])
+    assert model.predict_busy_score("Law", ts)["feedback_score"] == 1.0
+
+    # The grid predates the feedback: it must neither answer nor be cached
+    r = client.get(url)
+    assert r.json()["feedback_score"] == 1.0
+    etag = r.headers["etag"]
+    assert client.get(url).json()["feedback_score"] == 1.0
+
+    # Once rebuilt, the grid agrees with the validators clients hold
+    assert grid.refresh()
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert grid.lookup(["Law"], ts)[0]["feedback_score"] == 1.0
+
+
+def test_grid_lookup_rejects_other_inputs(trained):
+    grid = PredictionGrid(hours=2)
+    grid.refresh()
+    ts = (datetime.now(timezone.utc) + timedelta(minutes=5)).replace(tzinfo=None).isoformat()
+    assert grid.lookup(["Law"], ts, PredictionGrid.current_inputs()) is not None
+    assert grid.lookup(["Law"], ts, ("other-model", None, "fixed")) is None
@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import model
+import score_stream
+from main import app
+from score_stream import ScoreBroadcaster, Subscriber
+
+NOW = datetime(2024, 1, 2, 15, 20, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def manual(monkeypatch):
+    """Broadcaster whose updates the test drives itself."""
+    async def no_pump(self):
+        return None
+
+    monkeypatch.setattr(ScoreBroadcaster, "_run", no_pump)
+
+
+def test_one_computation_fans_out_to_every_client(trained, manual):
+    async def scenario():
+        broadcaster = ScoreBroadcaster()
+        clients = [broadcaster.subscribe() for _ in range(1000)]
+
+        first = await broadcaster.update(NOW)
+        assert first["type"] == "snapshot"
+        assert set(first["scores"]) == set(model.known_spots())
+        assert await broadcaster.update(NOW) is None  # nothing changed
+
+        model.submit_feedback([{"spot_id": "Law", "busy_rating": 1, "created_at": NOW.isoformat()}])
+        delta = await broadcaster.update(NOW)
+        assert delta["type"] == "delta"
+        assert delta["reason"] == "feedback"
+        assert list(delta["scores"]) == ["Law"]
+
+        assert broadcaster.computations == 2
+        for client in clients:
+            assert [client.queue.get_nowait()["seq"] for _ in range(2)] == [1, 2]
+
+        # Late joiners start from the current snapshot
+        late = broadcaster.subscribe()
+        snapshot = late.queue.get_nowait()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["scores"]["Law"] == delta["scores"]["Law"]
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_is_resynced_with_bounded_queue():
+    async def scenario():
+        subscriber = Subscriber(size=2)
+        for seq in (1, 2, 3):
+            subscriber.offer({"type": "delta", "seq": seq}, {"type": "snapshot", "seq": seq})
+
+        assert subscriber.queue.qsize() == 1
+        assert subscriber.queue.get_nowait() == {"type": "snapshot", "seq": 3}
+        assert subscriber.resyncs == 1
+
+    asyncio.run(scenario())
+
+
+def test_events_frames_keepalives_and_unsubscribes(manual):
+    async def scenario():
+        broadcaster = ScoreBroadcaster()
+        stream = score_stream.events(broadcaster, keepalive=0.01)
+        assert broadcaster.subscribers == 0  # nothing until the response starts
+
+        assert await stream.__anext__() == ": keepalive\n\n"
+        (subscriber,) = broadcaster._subscribers
+
+        subscriber.offer({"type": "delta", "seq": 7, "scores": {"Law": {"busy_score": 0.4}}}, {})
+        frame = await stream.__anext__()
+        lines = frame.strip().split("\n")
+        assert lines[0] == "id: 7"
+        assert lines[1] == "event: delta"
+        assert json.loads(lines[2][len("data: "):])["scores"]["Law"]["busy_score"] == 0.4
+
+        await stream.aclose()
+        assert broadcaster.subscribers == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_closed_before_start_leaves_no_subscriber(manual):
+    async def scenario():
+        broadcaster = ScoreBroadcaster()
+        stream = score_stream.events(broadcaster, keepalive=0.01)
+        # The client went away before StreamingResponse iterated the body
+        await stream.aclose()
+        assert broadcaster.subscribers == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_route_is_registered():
+    assert any(getattr(route, "path", None) == "/predict/stream" for route in app.routes)
@@ -0,0 +1,136 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import json
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import spots
+from main import app
+from spots import RegistryFile, SpotIndex, haversine_m
+
+client = TestClient(app, raise_server_exceptions=False)
+
+IKBLC = (49.267938, -123.252398)
+
+
+def _random_spots(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tags = ["quiet", "outlets", "group study", "cultural"]
+    return [
+        {
+            "id": i,
+            "name": f"Room {i}",
+            "lat": 49.26 + rng.uniform(-0.01, 0.01),
+            "lng": -123.25 + rng.uniform(-0.015, 0.015),
+            "features": [t for t in tags if rng.random() < 0.5],
+        }
+        for i in range(n)
+    ]
+
+
+def test_index_matches_brute_force():
+    rooms = _random_spots(2000)
+    index = SpotIndex(rooms)
+    lat = np.array([s["lat"] for s in rooms])
+    lng = np.array([s["lng"] for s in rooms])
+
+    for qlat, qlng, radius, features in [
+        (49.26, -123.25, 300, None),
+        (49.265, -123.24, 800, ["quiet"]),
+        (49.255, -123.262, 150, ["quiet", "outlets"]),
+    ]:
+        dist = haversine_m(qlat, qlng, lat, lng)
+        expected = {
+            s["name"] for s, d in zip(rooms, dist)
+            if d <= radius and set(features or ()) <= set(s["features"])
+        }
+        found = index.within(qlat, qlng, radius, features)
+        assert {s["name"] for s, _ in found} == expected
+        distances = [d for _, d in found]
+        assert distances == sorted(distances)
+
+
+def test_shared_registry_has_frontend_spots():
+    index = spots.get_index()
+    assert {s["name"] for s in index.spots} >= {"IKBLC", "Koerner", "Chapman"}
+    near = [s["name"] for s, _ in index.within(*IKBLC, 100)]
+    assert near[0] == "IKBLC"
+
+
+def test_registry_reloads_and_validates(tmp_path):
+    path = tmp_path / "spots.json"
+    registry = RegistryFile(path)
+    assert len(registry.get()) == 0
+
+    path.write_text(json.dumps({"spots": [{"name": "A", "lat": 49.26, "lng": -123.25}]}))
+    assert [s["name"] for s in registry.get().spots] == ["A"]
+
+    path.write_text(json.dumps({"spots": [{"name": "A", "lat": "north"}]}))
+    os.utime(path, ns=(1, 1))
+    with pytest.raises(ValueError):
+        registry.get()
+
+
+def test_nearby_ranks_least_busy_first(monkeypatch):
+    busy = {"IKBLC": 0.9, "Chapman": 0.2, "Koerner": 0.5, "Education": 0.1}
+
+    async def fake_scores(names, timestamp=None):
+        return [
+            {"spot": n, "busy_score": busy.get(n, 0.7), "model_source": "per_library", "timestamp_used": "t"}
+            for n in names
+        ]
+
+    monkeypatch.setattr("main.predict_busy_scores_async", fake_scores)
+    monkeypatch.setattr("main._grid_lookup", lambda *a: None)
+
+    r = client.get(f"/spots/nearby?lat={IKBLC[0]}&lng={IKBLC[1]}&radius=300&k=3")
+    assert r.status_code == 200
+    data = r.json()
+    assert [s["name"] for s in data["spots"]] == ["Education", "Chapman", "Koerner"]
+    assert data["spots"][0]["distance_m"] > 0
+
+    r = client.get(f"/spots/nearby?lat={IKBLC[0]}&lng={IKBLC[1]}&radius=300&features=group study")
+    assert [s["name"] for s in r.json()["spots"]] == ["Chapman"]
+
+    r = client.get("/spots/nearby?lat=0&lng=0&radius=300")
+    assert r.json() == {"count": 0, "spots": []}
+
+
+def test_nearby_rejects_bad_arguments():
+    assert client.get("/spots/nearby?lat=95&lng=0").status_code == 400
+    assert client.get(f"/spots/nearby?lat={IKBLC[0]}&lng={IKBLC[1]}&radius=0").status_code == 400
+    assert client.get(f"/spots/nearby?lat={IKBLC[0]}&lng={IKBLC[1]}&k=500").status_code == 400
+
+
+def test_nearby_keeps_registry_and_grid_off_the_event_loop(monkeypatch):
+    import threading
+
+    threads = {}
+    get_index = spots.get_index
+
+    async def fake_scores(names, timestamp=None):
+        threads["loop"] = threading.get_ident()
+        return [{"spot": n, "busy_score": 0.5, "model_source": "global", "timestamp_used": "t"} for n in names]
+
+    def index():
+        threads["index"] = threading.get_ident()
+        return get_index()
+
+    def grid_lookup(*a):
+        threads["grid"] = threading.get_ident()
+        return None
+
+    monkeypatch.setattr("main.predict_busy_scores_async", fake_scores)
+    monkeypatch.setattr("spots.get_index", index)
+    monkeypatch.setattr("main._grid_lookup", grid_lookup)
+
+    assert client.get(f"/spots/nearby?lat={IKBLC[0]}&lng={IKBLC[1]}&radius=300").status_code == 200
+    assert threads["loop"] not in (threads["index"], threads["grid"])
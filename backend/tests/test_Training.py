@@ -55,3 +55,244 @@ def test_predict_busy_score(tmp_path, monkeypatch):
     assert result["feedback_score"] == 0.6
     assert 0 <= result["busy_score"] <= 1
 
+
+def test_train_model_counts(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    df = pd.DataFrame({
+        "desk": ["Lam Circ", "Lam Circ Desk 2", "Lam Ref", "Educ Circ", "Mystery Desk", None, "Law Circ"],
+        "date_time": [
+            "2024-01-01T13:00:00Z",
+            "2024-01-02T14:30:00Z",
+            "2024-01-01T04:00:00Z",
+            "2024-01-01T13:00:00Z",
+            "2024-01-01T13:00:00Z",
+            "2024-01-01T13:00:00Z",
+            "not a date",
+        ]
+    })
+    df.to_csv(csv, index=False)
+
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    lookup = train_model()
+    assert lookup["per_library"] == {
+        "David Lam": {"1": 0.5, "4": 1.0},
+        "Education": {"4": 1.0},
+    }
+    assert lookup["global"] == {"1": 0.3333, "4": 1.0}
+    assert lookup["training"]["unmapped"] == {"Mystery Desk": 1}
+
+    saved = json.loads((tmp_path / "lookup.json").read_text())
+    assert saved == lookup
+
+    # Streaming in tiny chunks must give the same model
+    chunked = train_model(chunksize=2)
+    assert chunked["per_library"] == lookup["per_library"]
+    assert chunked["global"] == lookup["global"]
+
+
+def test_train_model_missing_columns(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({"desk": ["Lam Circ"], "when": ["2024-01-01T01:00:00Z"]}).to_csv(csv, index=False)
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+
+    with pytest.raises(ValueError):
+        train_model()
+
+
+def _write_logs(path, rows, mode="w"):
+    pd.DataFrame(rows, columns=["desk", "date_time"]).to_csv(
+        path, index=False, header=(mode == "w"), mode=mode
+    )
+
+
+def test_incremental_training_matches_full(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    _write_logs(csv, [
+        ("Lam Circ", "2024-01-01T13:00:00Z"),
+        ("Educ Circ", "2024-01-01T04:00:00Z"),
+    ])
+    first = train_model(incremental=True)
+    assert first["training"]["mode"] == "full"
+    assert (tmp_path / "lookup_state.json").exists()
+
+    _write_logs(csv, [
+        ("Lam Circ", "2024-01-02T04:00:00Z"),
+        ("Lam Ref", "2024-01-02T13:30:00Z"),
+    ], mode="a")
+    inc = train_model(incremental=True)
+    assert inc["training"] == {"mode": "incremental", "files": 1, "mapped_rows": 2, "unmapped": {}}
+
+    full = train_model()
+    assert full["training"]["mode"] == "full"
+    assert inc["per_library"] == full["per_library"]
+    assert inc["global"] == full["global"]
+    assert inc["weekly"] == full["weekly"]
+    assert inc["per_library"]["David Lam"] == {"1": 0.5, "4": 1.0}
+
+
+def test_weekly_slots_separate_weekdays(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    # Busy Monday 14:00–14:15, one visit on Saturday 14:00 and Monday 14:30
+    _write_logs(csv, [("Law Circ", "2024-01-01T14:05:00Z")] * 20 + [
+        ("Law Circ", "2024-01-06T14:00:00Z"),
+        ("Law Circ", "2024-01-01T14:30:00Z"),
+    ])
+    lookup = train_model(incremental=True)
+
+    weekly = lookup["weekly"]
+    assert weekly["slot_minutes"] == 15
+    law = weekly["per_library"]["Law"]
+    assert len(law) == 7 and len(law[0]) == 96
+
+    monday, saturday = law[0], law[5]
+    assert monday[56] == pytest.approx(1.0)
+    assert saturday[56] < monday[56]
+    # Sparse slots lean on the weekday × 3-hour bin instead of dropping to 0
+    assert 0.0 < monday[58] < monday[56]
+    # No observations in that 3-hour bin on any day → global fallback
+    assert monday[4] is None
+
+    # The served model scores the weekday, not just the time of day
+    import model
+    served = model.load_lookup()
+    assert served.score("Law", 0, 14 * 60)[0] > served.score("Law", 5, 14 * 60)[0]
+
+    # A different resolution can't reuse the saved counts
+    monkeypatch.setattr("model.SLOT_MINUTES", 60)
+    coarser = train_model(incremental=True)
+    assert coarser["training"]["mode"] == "full"
+    assert len(coarser["weekly"]["per_library"]["Law"][0]) == 24
+
+
+def test_incremental_training_rebuilds_replaced_log(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    _write_logs(csv, [("Lam Circ", "2024-01-01T13:00:00Z")] * 3)
+    train_model(incremental=True)
+
+    _write_logs(csv, [("Law Circ", "2024-01-01T01:00:00Z")])
+    lookup = train_model(incremental=True)
+    assert lookup["training"]["mode"] == "full"
+    assert list(lookup["per_library"]) == ["Law"]
+
+
+def test_incremental_training_rereads_a_row_being_written(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    _write_logs(csv, [("Lam Circ", "2024-01-01T13:00:00Z")] * 2)
+    size = csv.stat().st_size
+    # The exporter is halfway through its next row
+    with open(csv, "a", newline="") as f:
+        f.write("Law Ci")
+    train_model(incremental=True)
+    state = json.loads((tmp_path / "lookup_state.json").read_text())
+    assert state["files"][str(csv)]["offset"] == size
+
+    with open(csv, "a", newline="") as f:
+        f.write("rc,2024-01-02T04:00:00Z\n")
+    inc = train_model(incremental=True)
+    assert inc["training"] == {"mode": "incremental", "files": 1, "mapped_rows": 1, "unmapped": {}}
+    full = train_model()
+    assert inc["per_library"] == full["per_library"]
+    assert inc["weekly"] == full["weekly"]
+
+
+def test_incremental_training_notices_rewrite_before_watermark(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    _write_logs(csv, [("Lam Circ", "2024-01-01T13:00:00Z")] * 500)
+    train_model(incremental=True)
+
+    # Same size, same first 4 KiB: only the last rows changed, then one appended
+    data = csv.read_bytes()
+    csv.write_bytes(data[:-200] + data[-200:].replace(b"Lam Circ", b"Law Circ"))
+    _write_logs(csv, [("Law Circ", "2024-01-01T13:00:00Z")], mode="a")
+    lookup = train_model(incremental=True)
+    assert lookup["training"]["mode"] == "full"
+    assert set(lookup["per_library"]) == {"David Lam", "Law"}
+
+
+def test_partitioned_training_matches_single_file(tmp_path, monkeypatch):
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    rows = [
+        ("Lam Circ", "2024-01-01T13:00:00Z"),
+        ("Educ Circ", "2024-01-01T04:00:00Z"),
+        ("Lam Ref", "2024-02-01T14:00:00Z"),
+        ("Law Circ", "2024-02-03T20:00:00Z"),
+        ("Asian Ref", "2024-03-01T10:00:00Z"),
+        ("Educ Ref", "2024-03-02T13:00:00Z"),
+    ]
+    single = tmp_path / "all.csv"
+    _write_logs(single, rows)
+
+    parts = tmp_path / "logs"
+    parts.mkdir()
+    for i in range(3):
+        _write_logs(parts / f"2024-0{i + 1}.csv", rows[2 * i: 2 * i + 2])
+
+    expected = train_model(logs=single)
+    pooled = train_model(logs=parts, workers=3)
+    globbed = train_model(logs=parts / "2024-0*.csv", workers=1)
+
+    assert pooled["training"]["files"] == 3
+    for lookup in (pooled, globbed):
+        assert lookup["per_library"] == expected["per_library"]
+        assert lookup["global"] == expected["global"]
+
+    # Dropping a partition only removes its counts on the next incremental run
+    (parts / "2024-03.csv").unlink()
+    inc = train_model(logs=parts, incremental=True)
+    assert inc["training"]["mode"] == "incremental"
+    assert "Asian" not in inc["per_library"]
+
+
+def test_log_cache_skips_parsing_on_retrain(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    _write_logs(csv, [
+        ("Lam Circ", "2024-01-01T13:00:00Z"),
+        ("Lam Circ", "bad timestamp"),
+        ("Educ Circ", "2024-01-01T04:00:00-08:00"),
+    ])
+    first = train_model()
+    assert any((tmp_path / "log_cache").iterdir())
+
+    def no_parsing(*a, **k):
+        raise AssertionError("cached log should not be re-parsed")
+
+    with monkeypatch.context() as m:
+        m.setattr("model._parse_chunk", no_parsing)
+        cached = train_model()
+
+    assert cached["per_library"] == first["per_library"]
+    assert cached["global"] == first["global"]
+    assert cached["training"]["mapped_rows"] == first["training"]["mapped_rows"] == 3
+
+    # Rewriting the source invalidates the cache
+    _write_logs(csv, [("Law Circ", "2024-01-01T01:00:00Z")])
+    assert list(train_model()["per_library"]) == ["Law"]
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import model
+import training_jobs
+from main import app
+from training_jobs import TrainingJobs
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({
+        "desk": ["Lam Circ", "Lam Circ", "Law Circ", "Educ Circ"],
+        "date_time": [
+            "2024-01-01T09:10:00Z", "2024-01-03T12:00:00Z",
+            "2024-01-02T15:00:00Z", "2024-01-05T20:30:00Z",
+        ],
+    }).to_csv(csv, index=False)
+
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+    monkeypatch.setattr("model.DESK_MAPPING_PATH", tmp_path / "desk_mapping.json")
+    monkeypatch.setattr("model.TRAIN_WORKERS", 1)
+    monkeypatch.setattr("training_jobs._jobs", TrainingJobs())
+    return tmp_path
+
+
+def test_post_train_runs_in_background_and_publishes_model(data_dir):
+    r = client.post("/train?full=true")
+    assert r.status_code == 202
+    job = r.json()
+    assert job["status"] in ("queued", "running")
+
+    done = training_jobs.get_jobs().wait(job["job_id"], timeout=60)
+    assert done["status"] == "succeeded", done["error"]
+    assert done["progress"]["phase"] == "done"
+    assert done["progress"]["fraction"] == 1.0
+    assert done["result"]["mode"] == "full"
+
+    status = client.get(f"/train/{job['job_id']}").json()
+    assert status["result"]["model_version"] == model.load_lookup().version
+
+    progress = client.get(f"/train/{job['job_id']}/progress").json()
+    assert progress == {"job_id": job["job_id"], "status": "succeeded", "progress": done["progress"]}
+
+    # Published by rename: no temp files left behind
+    assert not [p.name for p in data_dir.iterdir() if p.name.startswith(".")]
+
+
+def test_failed_job_reports_error(data_dir, monkeypatch):
+    monkeypatch.setattr("model.DESK_LOGS_PATH", data_dir / "missing.csv")
+
+    job = training_jobs.get_jobs().start(full=True)
+    done = training_jobs.get_jobs().wait(job["job_id"], timeout=60)
+    assert done["status"] == "failed"
+    assert "FileNotFoundError" in done["error"]
+    assert not (data_dir / "lookup.json").exists()
+
+
+def test_unknown_job_is_404():
+    assert client.get("/train/nope").status_code == 404
+    assert client.get("/train/nope/progress").status_code == 404
+
+
+def test_progress_callback_and_legacy_get(data_dir):
+    seen = []
+    model.train_model(progress=seen.append)
+    assert [p["phase"] for p in seen] == ["counting", "counting", "smoothing", "writing", "done"]
+    assert seen[1]["files_done"] == seen[1]["files_total"] == 1
+
+    r = client.get("/train")
+    assert r.status_code == 200
+    assert r.json()["message"] == "training complete"
+
+
+def test_write_json_atomic_keeps_old_file_on_failure(tmp_path):
+    path = tmp_path / "lookup.json"
+    model.write_json_atomic(path, {"v": 1})
+
+    with pytest.raises(TypeError):
+        model.write_json_atomic(path, {"v": object()})
+
+    assert json.loads(path.read_text()) == {"v": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["lookup.json"]
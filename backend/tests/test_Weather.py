@@ -0,0 +1,203 @@
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from datetime import datetime, timedelta, timezone
+
+import weather
+from weather import WeatherCache, hour_key
+from weather_store import WeatherStore
+
+
+def _series():
+    return {"2025-11-28T09:00": {"temp": 4.0, "precip": 1.2, "cloud": 90, "wind": 12}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("weather._cache", WeatherCache())
+    monkeypatch.setattr("weather._store", WeatherStore(tmp_path / "weather.sqlite"))
+    monkeypatch.setattr("weather._fetcher", None)
+    monkeypatch.setattr("weather.WEATHER_OFFLINE", False)
+
+
+def test_get_weather_fetches_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr("weather.fetch_hourly_series", lambda: calls.append(1) or _series())
+
+    for _ in range(5):
+        w = weather.get_weather("2025-11-28T09:30:00+00:00")
+    assert w["temp"] == 4.0
+    assert len(calls) == 1
+
+
+def test_get_weather_unknown_hour(monkeypatch):
+    monkeypatch.setattr("weather.fetch_hourly_series", _series)
+    w = weather.get_weather("2024-01-01T01:00:00+00:00")
+    assert w == {"temp": None, "precip": None, "cloud": None, "wind": None}
+
+
+def test_get_weather_fetch_failure(monkeypatch):
+    def boom():
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr("weather.fetch_hourly_series", boom)
+    w = weather.get_weather("2025-11-28T09:00:00Z")
+    assert w["temp"] is None
+
+
+def test_concurrent_misses_single_fetch():
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return _series()
+
+    cache = WeatherCache(fetcher=slow_fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_hour("2025-11-28T09:00")))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r["cloud"] == 90 for r in results)
+
+
+def test_ttl_expiry_refetches():
+    calls = []
+    cache = WeatherCache(ttl_seconds=0, fetcher=lambda: calls.append(1) or _series())
+    cache.get_hour("2025-11-28T09:00")
+    cache.get_hour("2025-11-28T09:00")
+    assert len(calls) == 2
+
+
+def test_past_hours_served_from_store_after_restart(monkeypatch):
+    past = datetime.now(timezone.utc) - timedelta(days=2)
+    key = hour_key(past)
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        return {key: {"temp": 7.5, "precip": 0.0, "cloud": 20, "wind": 3}}
+
+    weather.set_fetcher(fake_fetch)
+    assert weather.warm_up() == 1
+    assert len(calls) == 1
+
+    # Simulate a restart: in-memory cache is gone, store survives
+    monkeypatch.setattr("weather._cache", WeatherCache())
+    w = weather.get_weather(past.isoformat())
+    assert w["temp"] == 7.5
+    assert len(calls) == 1
+
+
+def test_offline_mode_uses_store_only():
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    weather.get_store().put_series(
+        {hour_key(past): {"temp": 2.0, "precip": 4.0, "cloud": 100, "wind": 30}}
+    )
+
+    def no_network():
+        raise AssertionError("offline mode must not fetch")
+
+    weather.set_fetcher(no_network)
+    weather.set_offline(True)
+
+    assert weather.get_weather(past.isoformat())["precip"] == 4.0
+    assert weather.get_weather("2020-01-01T00:00:00Z")["temp"] is None
+
+
+def test_store_forecast_rows_replaced_by_observations(tmp_path):
+    store = WeatherStore(tmp_path / "w.sqlite")
+    t = datetime(2025, 11, 28, 9, tzinfo=timezone.utc)
+    key = hour_key(t)
+
+    store.put_series({key: {"temp": 1.0, "precip": 0, "cloud": 0, "wind": 0}}, now=t - timedelta(hours=2))
+    assert store.get(key)["temp"] == 1.0
+    assert store.get_observed(key) is None
+
+    store.put_series({key: {"temp": 3.0, "precip": 0, "cloud": 0, "wind": 0}}, now=t + timedelta(hours=2))
+    assert store.get_observed(key)["temp"] == 3.0
+
+
+def test_async_weather_shares_cache():
+    calls = []
+    weather.set_fetcher(lambda: calls.append(1) or _series())
+
+    async def run():
+        return await asyncio.gather(
+            *[weather.get_weather_async("2025-11-28T09:00:00Z") for _ in range(5)]
+        )
+
+    results = asyncio.run(run())
+    assert all(r["wind"] == 12 for r in results)
+    assert weather.get_weather("2025-11-28T09:00:00Z")["wind"] == 12
+    assert len(calls) == 1
+
+
+def test_weather_hours_one_store_query_and_one_fetch():
+    now = datetime.now(timezone.utc)
+    observed = hour_key(now - timedelta(hours=3))
+    upcoming = [hour_key(now + timedelta(hours=h)) for h in (1, 2)]
+    weather.get_store().put_series(
+        {observed: {"temp": 1.0, "precip": 0.0, "cloud": 0, "wind": 0}},
+        now=now,
+    )
+
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        return {upcoming[0]: {"temp": 9.0, "precip": 0.0, "cloud": 0, "wind": 0}}
+
+    weather.set_fetcher(fake_fetch)
+    hours = weather.get_weather_hours([upcoming[1], observed, upcoming[0], observed])
+
+    assert list(hours) == sorted({observed, *upcoming})
+    assert hours[observed]["temp"] == 1.0
+    assert hours[upcoming[0]]["temp"] == 9.0
+    assert hours[upcoming[1]]["temp"] is None
+    assert len(calls) == 1
+
+
+def test_rate_limited_download_is_a_failure(monkeypatch):
+    def too_many_requests(url, timeout):
+        res = requests.Response()
+        res.status_code = 429
+        res.url = url
+        res._content = b'{"error": true, "reason": "Too many requests"}'
+        return res
+
+    monkeypatch.setattr("weather.requests.get", too_many_requests)
+    with pytest.raises(requests.HTTPError):
+        weather.fetch_hourly_series()
+
+
+def test_empty_series_is_retried_not_cached(monkeypatch):
+    replies = [{}, _series()]
+    cache = WeatherCache(fetcher=lambda: replies.pop(0))
+
+    assert cache.get_hour("2025-11-28T09:00") is None
+    assert cache.generation == 0
+    assert cache.get_hour("2025-11-28T09:00") is None  # retry window
+    assert len(replies) == 1
+
+    monkeypatch.setattr("weather.WEATHER_RETRY_SECONDS", 0)
+    assert cache.get_hour("2025-11-28T09:00")["temp"] == 4.0
+    assert cache.generation == 1
@@ -62,3 +62,142 @@ def test_predict_busy_score(tmp_path, monkeypatch):
     assert result["model_score"] == 0.8
     assert result["feedback_score"] == 0.6
     assert 0 <= result["busy_score"] <= 1
+
+
+def test_load_lookup_cached_and_hot_reloaded(tmp_path, monkeypatch):
+    """Lookup is served from memory and swapped when lookup.json changes."""
+    import os
+    import model
+
+    lookup_json = tmp_path / "lookup.json"
+    lookup_json.write_text(json.dumps({
+        "version": "v1",
+        "per_library": {"Koerner": {"0": 0.8}},
+        "global": {"0": 0.5},
+    }))
+    monkeypatch.setattr("model.LOOKUP_PATH", lookup_json)
+
+    first = model.load_lookup()
+    assert model.load_lookup() is first
+    assert model.model_version() == "v1"
+
+    lookup_json.write_text(json.dumps({
+        "version": "v2",
+        "per_library": {"Koerner": {"0": 0.3}},
+        "global": {"0": 0.5},
+    }))
+    st = lookup_json.stat()
+    os.utime(lookup_json, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    second = model.load_lookup()
+    assert second is not first
+    assert second.score("Koerner", 0, 0) == (pytest.approx(0.3), "per_library")
+    assert model.model_version() == "v2"
+
+
+def test_trained_model_served_from_binary_artifact(tmp_path, monkeypatch):
+    """Training writes lookup.bin; prediction memory-maps it."""
+    import numpy as np
+    import model
+    from busy_model import BusyModel
+
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({
+        "desk": ["Lam Circ", "Lam Circ", "Educ Circ"],
+        "date_time": ["2024-01-01T13:00:00Z", "2024-01-01T04:00:00Z", "2024-01-01T13:00:00Z"],
+    }).to_csv(csv, index=False)
+
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+
+    lookup = train_model()
+    assert (tmp_path / "lookup.bin").exists()
+
+    served = model.load_lookup()
+    assert isinstance(served.matrix, np.memmap)
+    assert served.version == lookup["version"]
+    # 2024-01-01 is a Monday (weekday 0); scores are looked up by minute of day
+    assert served.score("David Lam", 0, 4 * 60) == (pytest.approx(1.0), "per_library")
+    assert served.score("Education", 0, 4 * 60) == (pytest.approx(0.5), "global_fallback")
+    assert served.score("Koerner", 0, 22 * 60) == (0.5, "global_fallback")
+
+    # JSON export round-trips
+    exported = BusyModel.load(tmp_path / "lookup.bin").to_lookup()
+    assert exported["per_library"] == lookup["per_library"]
+    assert exported["global"] == lookup["global"]
+    assert exported["weekly"] == lookup["weekly"]
+
+
+def test_batch_matches_single_predictions(tmp_path, monkeypatch):
+    """predict_busy_scores gives the same result as one predict_busy_score per spot."""
+    from model import predict_busy_scores
+
+    lookup_json = tmp_path / "lookup.json"
+    lookup_json.write_text(json.dumps({
+        "per_library": {"Koerner": {"4": 0.9}, "Law": {"4": 0.3}},
+        "global": {"4": 0.5},
+    }))
+
+    monkeypatch.setattr("model.LOOKUP_PATH", lookup_json)
+    monkeypatch.setattr(
+        "model.get_feedback_score",
+        lambda spot, now=None: 0.2 if spot == "Law" else None,
+    )
+    monkeypatch.setattr(
+        "model.get_weather",
+        lambda ts: {"temp": 3, "precip": 2.5, "cloud": 80, "wind": 25},
+    )
+
+    ts = "2024-01-01T13:00:00"
+    spots = ["Koerner", "Law", "Asian"]
+    batch = predict_busy_scores(spots, ts)
+
+    assert batch == [predict_busy_score(s, ts) for s in spots]
+    assert batch[1]["blend"] == "blend_model_0.75_feedback_0.25"
+
+
+def test_timeline_matches_single_predictions(tmp_path, monkeypatch):
+    """predict_timeline gives each point the score predict_busy_score would."""
+    from model import predict_timeline
+
+    csv = tmp_path / "desk_logs.csv"
+    pd.DataFrame({
+        "desk": ["Lam Circ"] * 4 + ["Law Circ"] * 3,
+        "date_time": [
+            "2024-01-01T09:10:00Z", "2024-01-01T09:20:00Z", "2024-01-01T12:00:00Z",
+            "2024-01-06T09:00:00Z", "2024-01-02T23:45:00Z", "2024-01-01T10:00:00Z",
+            "2024-01-03T15:00:00Z",
+        ],
+    }).to_csv(csv, index=False)
+
+    monkeypatch.setattr("model.DESK_LOGS_PATH", csv)
+    monkeypatch.setattr("model.LOOKUP_PATH", tmp_path / "lookup.json")
+    monkeypatch.setattr("model.DATA_DIR", tmp_path)
+    train_model()
+
+    def fake_weather(hour):
+        h = int(hour[11:13])
+        return {"temp": 3 if h < 12 else 25, "precip": 0.5 * (h % 5), "cloud": 10 * (h % 10), "wind": h}
+
+    calls = []
+    monkeypatch.setattr("model.get_feedback_score", lambda *a, **k: None)
+    monkeypatch.setattr("model.get_weather", lambda ts: fake_weather(ts[:13] + ":00"))
+    monkeypatch.setattr(
+        "model.get_weather_hours",
+        lambda hours: calls.append(hours) or {h: fake_weather(h) for h in hours},
+    )
+
+    timeline = predict_timeline("David Lam", "2024-01-07T20:00:00+00:00", "2024-01-08T14:00:00+00:00", "20min")
+    points = timeline["points"]
+    assert len(points) == 55
+    assert len(calls) == 1
+
+    for point in points:
+        single = predict_busy_score("David Lam", point["timestamp"])
+        for key in ("bin", "weekday", "slot", "model_score", "model_source", "score_before_weather", "busy_score"):
+            assert point[key] == single[key], (point["timestamp"], key)
+        assert point["weather_factor"] == single["weather"]["weather_factor"]
+
+    with pytest.raises(ValueError):
+        predict_timeline("David Lam", "2024-01-01T00:00:00", "2024-03-01T00:00:00", "1")
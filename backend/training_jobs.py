@@ -0,0 +1,184 @@
+"""
+Spec (training_jobs.py):
+
+- TrainingJobs.start(full):
+    Runs train_model() in a separate process (TRAIN_START_METHOD, default
+    "spawn") so the serving process keeps its CPU and event loop. Returns
+    the job dict; while a job is queued/running, start() returns that job
+    instead of launching a second one (both would write the same files).
+
+- Job dict:
+    {job_id, status: queued|running|succeeded|failed, full, created_at,
+     started_at, finished_at, progress: {phase, files_done, files_total,
+     fraction}, result: summary() of the lookup, error}
+
+- get(job_id):
+    Snapshot of a job, or None. The last MAX_JOBS jobs are kept.
+
+- Publishing:
+    train_model() writes lookup.json/.bin and state via temp file + rename;
+    the serving process picks the new model up on its next load_lookup()
+    (LookupHolder stats the files). On success the prediction grid is
+    marked stale so it's rebuilt on the new model.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import metrics
+import model
+import prediction_grid
+
+TRAIN_START_METHOD = os.getenv("TRAIN_START_METHOD", "spawn")
+
+# Finished jobs kept for /train/{id}
+MAX_JOBS = 20
+
+# model.py settings a test or deployment may have changed at runtime;
+# a spawned child re-imports model.py, so they're passed explicitly
+_SETTINGS = ("DESK_LOGS_PATH", "LOOKUP_PATH", "DATA_DIR", "DESK_MAPPING_PATH", "SLOT_MINUTES", "TRAIN_WORKERS")
+
+
+def summary(lookup: Dict[str, Any]) -> Dict[str, Any]:
+    """What /train reports about a finished training run."""
+    return {
+        "mode": lookup["training"]["mode"],
+        "model_version": lookup["version"],
+        "per_library_entries": sum(len(v) for v in lookup["per_library"].values()),
+        "global_entries": len(lookup["global"]),
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _run(settings: Dict[str, Any], full: bool, messages) -> None:
+    """Child process: train and report progress/outcome over `messages`."""
+    for name, value in settings.items():
+        setattr(model, name, value)
+
+    try:
+        lookup = model.train_model(
+            incremental=not full,
+            progress=lambda p: messages.put(("progress", p)),
+        )
+        messages.put(("succeeded", summary(lookup)))
+    except BaseException as exc:
+        messages.put(("failed", f"{type(exc).__name__}: {exc}"))
+
+
+class TrainingJobs:
+    def __init__(self, start_method: Optional[str] = None) -> None:
+        self._ctx = mp.get_context(start_method or TRAIN_START_METHOD)
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active: Optional[str] = None
+
+    def start(self, full: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            if self._active is not None:
+                return self._snapshot(self._jobs[self._active])
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "full": full,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": {"phase": "queued", "files_done": 0, "files_total": None, "fraction": 0.0},
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            while len(self._jobs) > MAX_JOBS:
+                self._jobs.popitem(last=False)
+            self._active = job_id
+
+            settings = {name: getattr(model, name) for name in _SETTINGS}
+            messages = self._ctx.Queue()
+            process = self._ctx.Process(target=_run, args=(settings, full, messages), name=f"train-{job_id[:8]}")
+            process.start()
+            job["status"] = "running"
+            job["started_at"] = _now()
+
+            threading.Thread(target=self._watch, args=(job, process, messages), daemon=True).start()
+            return self._snapshot(job)
+
+    def _watch(self, job: Dict[str, Any], process, messages) -> None:
+        started = time.perf_counter()
+        status, payload = None, None
+
+        while status is None:
+            try:
+                kind, payload = messages.get(timeout=0.2)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # The child may have exited right after its last put()
+                try:
+                    kind, payload = messages.get(timeout=1.0)
+                except queue.Empty:
+                    kind, payload = "failed", f"training process exited with code {process.exitcode}"
+
+            if kind == "progress":
+                with self._lock:
+                    job["progress"] = payload
+            else:
+                status = kind
+
+        process.join()
+        if metrics.METRICS_ENABLED:
+            metrics.STAGE_SECONDS.observe(time.perf_counter() - started, "train.job")
+
+        if status == "succeeded":
+            # Serve live until the scheduler rebuilds the grid on the new model
+            prediction_grid.get_grid().mark_stale()
+
+        with self._lock:
+            job["status"] = status
+            job["finished_at"] = _now()
+            if status == "succeeded":
+                job["result"] = payload
+            else:
+                job["error"] = payload
+            if self._active == job["job_id"]:
+                self._active = None
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {**job, "progress": dict(job["progress"])}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job is not None else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job finished (or timeout); mainly for tests and scripts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("succeeded", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.05)
+
+
+_jobs = TrainingJobs()
+
+
+def get_jobs() -> TrainingJobs:
+    return _jobs
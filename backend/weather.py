@@ -1,48 +1,433 @@
+import asyncio
+import os
+import threading
+import time
+import httpx
 import requests
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import metrics
+from weather_store import WeatherStore
 
 # UBC Vancouver lat/lon
 UBC_LAT = 49.2606
 UBC_LON = -123.2460
 
-def get_weather(timestamp_iso: str):
+# How long a downloaded hourly series is trusted before asking Open-Meteo again
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "3600"))
+
+# After a failed download, wait this long before trying again
+WEATHER_RETRY_SECONDS = float(os.getenv("WEATHER_RETRY_SECONDS", "60"))
+
+# Durable hourly history so restarts don't re-download hours we already have
+WEATHER_STORE_PATH = Path(
+    os.getenv("WEATHER_STORE_PATH", Path(__file__).resolve().parent / "data" / "weather.sqlite")
+)
+
+# Offline mode: answer purely from the store, never call Open-Meteo
+WEATHER_OFFLINE = os.getenv("WEATHER_OFFLINE", "0") == "1"
+
+FORECAST_URL = (
+    "https://api.open-meteo.com/v1/forecast?"
+    f"latitude={UBC_LAT}&longitude={UBC_LON}"
+    "&hourly=temperature_2m,precipitation,cloud_cover,wind_speed_10m"
+    "&forecast_days=16&past_days=16"
+)
+
+
+def _empty_weather():
+    return {"temp": None, "precip": None, "cloud": None, "wind": None}
+
+
+def hour_key(dt: datetime) -> str:
+    """Open-Meteo's hourly (UTC) time label, e.g. '2025-11-28T09:00'."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return f"{dt.strftime('%Y-%m-%d')}T{dt.hour:02d}:00"
+
+
+def _index_series(data):
+    hourly = data.get("hourly", {})
+    times = hourly.get("time", [])
+    temps = hourly.get("temperature_2m", [])
+    precips = hourly.get("precipitation", [])
+    clouds = hourly.get("cloud_cover", [])
+    winds = hourly.get("wind_speed_10m", [])
+
+    return {
+        t: {"temp": temp, "precip": precip, "cloud": cloud, "wind": wind}
+        for t, temp, precip, cloud, wind in zip(times, temps, precips, clouds, winds)
+    }
+
+
+def fetch_hourly_series():
     """
-    Returns weather conditions at the given timestamp.
-    Uses Open-Meteo's free historical+forecast API.
+    Download the full hourly series (16 past + 16 forecast days) once and
+    index it by hour label so lookups are a dict access instead of a list scan.
+    """
+    res = requests.get(FORECAST_URL, timeout=5)
+    # A 429/5xx body is JSON too, but has no hourly data
+    res.raise_for_status()
+    return _index_series(res.json())
+
+
+# ---------- Async client ----------
+
+_async_client = None
+
+
+def get_async_client():
+    """Shared keep-alive connection pool for async Open-Meteo calls."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=5,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _async_client
+
+
+async def aclose_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def fetch_hourly_series_async():
+    """Async fetch_hourly_series() over the pooled client."""
+    res = await get_async_client().get(FORECAST_URL)
+    res.raise_for_status()
+    return _index_series(res.json())
+
+
+# ---------- Pluggable fetcher + persistent store ----------
+
+_fetcher = None  # None → fetch_hourly_series; tests can plug in a local fake
+_store = None
+_store_lock = threading.Lock()
+
+
+def set_fetcher(fetcher):
+    """Replace the upstream fetcher (a callable returning {hour: weather})."""
+    global _fetcher
+    _fetcher = fetcher
+
+
+def set_offline(offline: bool):
+    global WEATHER_OFFLINE
+    WEATHER_OFFLINE = offline
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WeatherStore(WEATHER_STORE_PATH)
+    return _store
+
+
+def _store_series(series):
+    try:
+        get_store().put_series(series)
+    except Exception:
+        # A broken store shouldn't take live weather down with it
+        pass
+
+
+def _require_series(series):
+    """An empty download is a failure: it must not be cached for a full TTL."""
+    if not series:
+        raise ValueError("weather download has no hourly data")
+    return series
+
+
+def _fetch_and_store():
+    series = _require_series((_fetcher or fetch_hourly_series)())
+    _store_series(series)
+    return series
+
+
+async def _fetch_and_store_async():
+    if _fetcher is not None:
+        return await asyncio.to_thread(_fetch_and_store)
+    series = _require_series(await fetch_hourly_series_async())
+    await asyncio.to_thread(_store_series, series)
+    return series
+
+
+class WeatherCache:
+    """
+    Holds the last downloaded hourly series for WEATHER_CACHE_TTL_SECONDS.
+
+    Concurrent misses are coalesced: one caller downloads while the rest
+    wait on the lock and then read the fresh series. If a refresh fails
+    (including an HTTP error or an empty series) the previous series keeps
+    serving until the next retry window.
+
+    series_async() does the same for coroutines without blocking the event
+    loop: waiters park on an asyncio.Lock instead of a thread lock.
+    """
+
+    def __init__(self, ttl_seconds=None, fetcher=None):
+        self.ttl_seconds = ttl_seconds
+        self._fetcher = fetcher
+        self._lock = threading.Lock()
+        self._async_lock = None
+        self._series = None
+        self._fetched_at = 0.0
+        self._failed_at = None
+        # Bumped on every successful download, so callers can tell the
+        # series changed without comparing it
+        self.generation = 0
+
+    def _ttl(self):
+        return WEATHER_CACHE_TTL_SECONDS if self.ttl_seconds is None else self.ttl_seconds
+
+    def _is_fresh(self, now):
+        if self._series is not None and now - self._fetched_at < self._ttl():
+            return True
+        # Don't hammer the API while it's failing
+        return self._failed_at is not None and now - self._failed_at < WEATHER_RETRY_SECONDS
+
+    def series(self):
+        if self._is_fresh(time.monotonic()):
+            metrics.cache_hit("weather")
+            return self._series
+
+        with self._lock:
+            now = time.monotonic()
+            if self._is_fresh(now):
+                metrics.cache_hit("weather")
+                return self._series
+
+            metrics.cache_miss("weather")
+            fetcher = self._fetcher or _fetch_and_store
+            try:
+                self._series = _require_series(fetcher())
+                self._fetched_at = now
+                self._failed_at = None
+                self.generation += 1
+                metrics.weather_upstream(time.monotonic() - now, ok=True)
+            except Exception:
+                self._failed_at = now
+                metrics.weather_upstream(time.monotonic() - now, ok=False)
+
+            return self._series
+
+    async def series_async(self):
+        if self._is_fresh(time.monotonic()):
+            metrics.cache_hit("weather")
+            return self._series
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        async with self._async_lock:
+            now = time.monotonic()
+            if self._is_fresh(now):
+                metrics.cache_hit("weather")
+                return self._series
+
+            metrics.cache_miss("weather")
+            try:
+                if self._fetcher is not None:
+                    series = _require_series(await asyncio.to_thread(self._fetcher))
+                else:
+                    series = await _fetch_and_store_async()
+                self._series = series
+                self._fetched_at = now
+                self._failed_at = None
+                self.generation += 1
+                metrics.weather_upstream(time.monotonic() - now, ok=True)
+            except Exception:
+                self._failed_at = now
+                metrics.weather_upstream(time.monotonic() - now, ok=False)
+
+            return self._series
+
+    def get_hour(self, key):
+        series = self.series()
+        if not series:
+            return None
+        return series.get(key)
+
+    async def get_hour_async(self, key):
+        series = await self.series_async()
+        if not series:
+            return None
+        return series.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._series = None
+            self._fetched_at = 0.0
+            self._failed_at = None
+
+
+_cache = WeatherCache()
+
+
+def warm_up():
+    """
+    Fill the store at startup. Skips the download when the store already
+    holds observations up to the current hour. Returns hours stored.
     """
+    store = get_store()
+    if WEATHER_OFFLINE:
+        return len(store)
+
+    last_hour = hour_key(datetime.now(timezone.utc) - timedelta(hours=1))
+    if store.get_observed(last_hour) is None:
+        _cache.series()
+
+    return len(store)
+
+
+def weather_version():
+    """
+    Token that changes when upcoming weather may have changed: the cache
+    generation (refreshing the series first if its TTL ran out), or the
+    store size in offline mode.
+    """
+    if WEATHER_OFFLINE:
+        return ("offline", len(get_store()))
+    _cache.series()
+    return ("live", _cache.generation)
+
+
+def weather_token():
+    """
+    weather_version() without the refresh: never goes upstream, so it's
+    cheap enough to compute per request (ETags). The grid scheduler's
+    weather_version() calls keep the generation moving.
+    """
+    if WEATHER_OFFLINE:
+        return ("offline", len(get_store()))
+    return ("live", _cache.generation)
+
+
+def _timestamp_key(timestamp_iso):
     if timestamp_iso is None:
         timestamp_iso = datetime.now(timezone.utc).isoformat()
 
     # Parse timestamp to date/hour
     dt = datetime.fromisoformat(timestamp_iso.replace("Z", "+00:00"))
-    date_str = dt.strftime("%Y-%m-%d")
-    hour = dt.hour
+    return hour_key(dt)
 
-    url = (
-        "https://api.open-meteo.com/v1/forecast?"
-        f"latitude={UBC_LAT}&longitude={UBC_LON}"
-        "&hourly=temperature_2m,precipitation,cloud_cover,wind_speed_10m"
-        "&forecast_days=16&past_days=16"
-    )
 
-    try:
-        res = requests.get(url, timeout=5)
-        data = res.json()
-    except:
-        return {"temp": None, "precip": None, "cloud": None, "wind": None}
+def _from_store(key):
+    """
+    Weather we can answer locally: anything in offline mode, or a past hour
+    already observed. None means go upstream.
+    """
+    if WEATHER_OFFLINE:
+        return get_store().get(key) or _empty_weather()
 
-    hourly = data.get("hourly", {})
-    times = hourly.get("time", [])
+    # Historical hours never change – never fetch them twice
+    if key < hour_key(datetime.now(timezone.utc)):
+        observed = get_store().get_observed(key)
+        if observed is None:
+            metrics.cache_miss("weather_store")
+        else:
+            metrics.cache_hit("weather_store")
+        return observed
 
-    # Find closest hour index
-    try:
-        idx = times.index(f"{date_str}T{hour:02d}:00")
-    except ValueError:
-        return {"temp": None, "precip": None, "cloud": None, "wind": None}
+    return None
 
-    return {
-        "temp": hourly["temperature_2m"][idx],
-        "precip": hourly["precipitation"][idx],
-        "cloud": hourly["cloud_cover"][idx],
-        "wind": hourly["wind_speed_10m"][idx],
-    }
+
+def _resolve(key, hour):
+    if hour is None:
+        # Upstream unavailable: an older forecast beats nothing
+        return get_store().get(key) or _empty_weather()
+    return dict(hour)
+
+
+def get_weather(timestamp_iso: str):
+    """
+    Returns weather conditions at the given timestamp.
+    Uses Open-Meteo's free historical+forecast API, cached in-process for
+    WEATHER_CACHE_TTL_SECONDS. Past hours already in the local store are
+    answered from it without touching the network.
+    """
+    key = _timestamp_key(timestamp_iso)
+
+    local = _from_store(key)
+    if local is not None:
+        return local
+
+    return _resolve(key, _cache.get_hour(key))
+
+
+async def get_weather_async(timestamp_iso: str):
+    """
+    Async get_weather(): same cache and store, but a cache miss awaits the
+    pooled httpx client instead of blocking a worker thread. Store reads
+    (SQLite) run in a worker thread, off the event loop.
+    """
+    key = _timestamp_key(timestamp_iso)
+
+    local = await asyncio.to_thread(_from_store, key)
+    if local is not None:
+        return local
+
+    hour = await _cache.get_hour_async(key)
+    if hour is None:
+        return await asyncio.to_thread(_resolve, key, None)
+    return _resolve(key, hour)
+
+
+def _from_store_range(keys):
+    """_from_store() for sorted, distinct hour keys with one store query."""
+    if WEATHER_OFFLINE:
+        stored = get_store().get_range(keys[0], keys[-1])
+        return {key: stored.get(key) or _empty_weather() for key in keys}
+
+    past = [key for key in keys if key < hour_key(datetime.now(timezone.utc))]
+    if not past:
+        return {}
+    stored = get_store().get_range(past[0], past[-1], observed_only=True)
+    return {key: stored[key] for key in past if key in stored}
+
+
+def get_weather_hours(keys):
+    """
+    get_weather() for many hour keys (see hour_key()) at once: stored hours
+    come from one range query and the rest from one cached series, so a
+    whole timeline costs at most one upstream download.
+    Returns {hour key: weather dict}.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+
+    result = _from_store_range(keys)
+    missing = [key for key in keys if key not in result]
+    if missing:
+        series = _cache.series() or {}
+        for key in missing:
+            result[key] = _resolve(key, series.get(key))
+    return result
+
+
+async def get_weather_hours_async(keys):
+    """
+    Async get_weather_hours(); a cache miss awaits the pooled client and
+    store reads run in a worker thread.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+
+    result = await asyncio.to_thread(_from_store_range, keys)
+    missing = [key for key in keys if key not in result]
+    if missing:
+        series = await _cache.series_async() or {}
+
+        def resolve_missing():
+            return {key: _resolve(key, series.get(key)) for key in missing}
+
+        result.update(await asyncio.to_thread(resolve_missing))
+    return result
@@ -0,0 +1,122 @@
+"""
+Spec (weather_store.py):
+
+- WeatherStore(path):
+    Durable hourly weather history in a small SQLite file, keyed by the
+    UTC hour label Open-Meteo uses ("YYYY-MM-DDTHH:00").
+
+- put_series(series, now):
+    Upserts a fetched {hour: {temp, precip, cloud, wind}} series. Hours at
+    or after `now` are flagged as forecasts so they get replaced by the
+    observed values on a later fetch.
+
+- get(hour) / get_observed(hour):
+    Returns the stored weather dict for an hour (or None). get_observed()
+    ignores forecast rows.
+
+- get_range(first, last, observed_only):
+    {hour: weather} for every stored hour in [first, last], in one query.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    hour        TEXT PRIMARY KEY,
+    temp        REAL,
+    precip      REAL,
+    cloud       REAL,
+    wind        REAL,
+    is_forecast INTEGER NOT NULL,
+    fetched_at  TEXT NOT NULL
+)
+"""
+
+
+class WeatherStore:
+    def __init__(self, path: Any) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def put_series(self, series: Dict[str, Dict[str, Any]], now: Optional[datetime] = None) -> int:
+        if not series:
+            return 0
+
+        if now is None:
+            now = datetime.now(timezone.utc)
+        current_hour = f"{now.strftime('%Y-%m-%d')}T{now.hour:02d}:00"
+        fetched_at = now.isoformat()
+
+        rows = [
+            (
+                hour,
+                w.get("temp"),
+                w.get("precip"),
+                w.get("cloud"),
+                w.get("wind"),
+                int(hour >= current_hour),
+                fetched_at,
+            )
+            for hour, w in series.items()
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hourly "
+                "(hour, temp, precip, cloud, wind, is_forecast, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+        return len(rows)
+
+    def _get(self, hour: str, observed_only: bool) -> Optional[Dict[str, Any]]:
+        sql = "SELECT temp, precip, cloud, wind FROM hourly WHERE hour = ?"
+        if observed_only:
+            sql += " AND is_forecast = 0"
+
+        with self._lock:
+            row = self._conn.execute(sql, (hour,)).fetchone()
+
+        if row is None:
+            return None
+        return {"temp": row[0], "precip": row[1], "cloud": row[2], "wind": row[3]}
+
+    def get(self, hour: str) -> Optional[Dict[str, Any]]:
+        return self._get(hour, observed_only=False)
+
+    def get_observed(self, hour: str) -> Optional[Dict[str, Any]]:
+        return self._get(hour, observed_only=True)
+
+    def get_range(self, first: str, last: str, observed_only: bool = False) -> Dict[str, Dict[str, Any]]:
+        sql = "SELECT hour, temp, precip, cloud, wind FROM hourly WHERE hour BETWEEN ? AND ?"
+        if observed_only:
+            sql += " AND is_forecast = 0"
+
+        with self._lock:
+            rows = self._conn.execute(sql, (first, last)).fetchall()
+
+        return {
+            row[0]: {"temp": row[1], "precip": row[2], "cloud": row[3], "wind": row[4]}
+            for row in rows
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM hourly").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import "leaflet/dist/leaflet.css";
 import MapUBC from "./components/Map/MapUBC";
 import Sidebar from "./components/Sidebar/Sidebar";
@@ -16,9 +16,13 @@ Spec (App.jsx):
     clientSessionId    → unique user/session ID stored in localStorage
 
 - On mount (useEffect):
-    • Fetches busy scores for all initial spots from /predict endpoint.
+    • Fetches busy scores for all initial spots in one /predict/batch call.
     • Updates spotsData and filteredSpots with the results.
     • Defaults busy_score to 0.5 on API failure.
+    • Subscribes to /predict/stream (Server-Sent Events) and applies the
+      pushed snapshot/delta busy scores instead of polling.
+    • Scores already received from the stream win over the /predict/batch
+      response, which may resolve after them and would be older.
 
 - Layout:
     • Left: Sidebar for filtering/selecting spots
@@ -44,33 +48,37 @@ export default function App() {
     return newId;
   });
 
+  // Latest busy_score per spot pushed by /predict/stream
+  const streamedScores = useRef({});
+
   useEffect(() => {
     async function loadScores() {
       const now = new Date().toISOString();
-
-      const updated = await Promise.all(
-        initialSpots.map(async (spot) => {
-          try {
-            const res = await fetch(
-              `http://127.0.0.1:8000/predict?spot=${encodeURIComponent(
-                spot.name
-              )}&timestamp=${now}`
-            );
-
-            if (!res.ok) throw new Error("API error");
-
-            const data = await res.json();
-
-            return {
-              ...spot,
-              busy_score: data.busy_score ?? 0.5,
-            };
-          } catch (err) {
-            console.warn("Failed to fetch busy score for:", spot.name);
-            return { ...spot, busy_score: 0.5 };
-          }
-        })
-      );
+      const names = initialSpots.map((spot) => spot.name).join(",");
+
+      const scores = {};
+      try {
+        const res = await fetch(
+          `http://127.0.0.1:8000/predict/batch?spots=${encodeURIComponent(
+            names
+          )}&timestamp=${now}`
+        );
+
+        if (!res.ok) throw new Error("API error");
+
+        const data = await res.json();
+        for (const p of data.predictions) {
+          scores[p.spot] = p.busy_score;
+        }
+      } catch (err) {
+        console.warn("Failed to fetch busy scores:", err);
+      }
+
+      const updated = initialSpots.map((spot) => ({
+        ...spot,
+        busy_score:
+          streamedScores.current[spot.name] ?? scores[spot.name] ?? 0.5,
+      }));
 
       setSpotsData(updated);
       setFilteredSpots(updated);
@@ -80,6 +88,29 @@ export default function App() {
     loadScores();
   }, []);
 
+  useEffect(() => {
+    const source = new EventSource("http://127.0.0.1:8000/predict/stream");
+
+    function applyScores(event) {
+      const { scores } = JSON.parse(event.data);
+      for (const [name, score] of Object.entries(scores)) {
+        streamedScores.current[name] = score.busy_score;
+      }
+      const patch = (list) =>
+        list.map((spot) =>
+          scores[spot.name]
+            ? { ...spot, busy_score: scores[spot.name].busy_score }
+            : spot
+        );
+      setSpotsData(patch);
+      setFilteredSpots(patch);
+    }
+
+    source.addEventListener("snapshot", applyScores);
+    source.addEventListener("delta", applyScores);
+    return () => source.close();
+  }, []);
+
   return (
     <div style={{ display: "flex", height: "100vh" }}>
       {/* Sidebar */}